@@ -8,12 +8,30 @@ BigQuery API endpoints
 SQL optimization and analytics
 """
 
+from datetime import datetime
+from flask import Blueprint, jsonify
 from google.cloud import bigquery
 from google.cloud.exceptions import GoogleCloudError
 
+from config.settings import settings
+from backend.utils.conditional import conditional
+from backend.utils.logger import setup_logger
+from backend.utils.validators import Field, Schema, request_body, validate_body
+
+logger = setup_logger(__name__)
+
 # Create blueprint for BigQuery
 bigquery_bp = Blueprint('bigquery', __name__)
 
+# Request schemas, compiled once at import
+OPTIMIZE_SCHEMA = Schema(
+    Field('query', str, required=True, message='SQL query is required')
+)
+EXECUTE_SCHEMA = Schema(
+    Field('query', str, required=True, message='SQL query is required'),
+    Field('dry_run', bool, default=False)
+)
+
 # Initialize BigQuery client
 try:
     bq_client = bigquery.Client(project=settings.google_cloud_project)
@@ -25,16 +43,15 @@ except Exception as e:
 
 # SQL optimization endpoint
 @bigquery_bp.route('/optimize', methods=['POST'])
+@conditional
+@validate_body(OPTIMIZE_SCHEMA)
 def optimize_sql():
     """
     Analyze and optimize SQL queries
     Provides performance recommendations and cost estimates
     """
     try:
-        data = request.get_json()
-        
-        if not data or 'query' not in data:
-            return jsonify({'error': 'SQL query is required'}), 400
+        data = request_body()
         
         sql_query = data['query']
         
@@ -71,19 +88,17 @@ def optimize_sql():
 
 # Execute query endpoint
 @bigquery_bp.route('/execute', methods=['POST'])
+@validate_body(EXECUTE_SCHEMA)
 def execute_query():
     """Execute SQL query on BigQuery"""
     try:
         if bq_client is None:
             return jsonify({'error': 'BigQuery client not initialized'}), 500
         
-        data = request.get_json()
-        
-        if not data or 'query' not in data:
-            return jsonify({'error': 'SQL query is required'}), 400
+        data = request_body()
         
         sql_query = data['query']
-        dry_run = data.get('dry_run', False)
+        dry_run = data['dry_run']
         
         logger.info(f'Executing query (dry_run={dry_run})')
         
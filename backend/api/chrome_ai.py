@@ -3,35 +3,109 @@
 #Handles Prompt, Summarizer, Translator, Writer, Proofreader, Rewriter APIs
 
 import logging
-from flask import Blueprint, request, jsonify
+import time
+from flask import Blueprint, Response, current_app, request, jsonify
 from typing import Dict, Any
 
-from backend.utils.validators import validate_request
+from config.settings import settings
+from backend.utils.validators import Field, Schema, request_body, validate_body
 from backend.utils.logger import setup_logger
+from backend.utils.streaming import format_event, resolve_stream_format, streaming_response
+from backend.utils.blob_store import BlobReferenceError, BlobTooLargeError, blob_store, resolve_text
+from backend.utils.conditional import conditional, not_modified, skip_memo
+from backend.utils.rate_limiter import QuotaExceeded
+from backend.utils.resilience import CircuitOpenError, backpressure_response
 
 logger = setup_logger(__name__)
 
 # Create blueprint
 chrome_ai_bp = Blueprint('chrome_ai', __name__)
 
+# Request schemas, compiled once at import
+TEXT_REQUIRED = [(('text', 'text_ref'), 'Text or text_ref is required')]
+
+PROMPT_SCHEMA = Schema(
+    Field('prompt', str, required=True, message='Prompt is required'),
+    Field('temperature', float, default=0.7),
+    Field('max_tokens', int, default=500)
+)
+SUMMARIZE_SCHEMA = Schema(
+    Field('text', str),
+    Field('text_ref', str),
+    Field('type', str, default='tldr'),
+    Field('length', str, default='medium'),
+    Field('fallback', bool, default=False),
+    one_of=TEXT_REQUIRED
+)
+TRANSLATE_SCHEMA = Schema(
+    Field('text', str),
+    Field('text_ref', str),
+    Field('target_language', str, required=True,
+          message='Text (or text_ref) and target_language are required'),
+    Field('source_language', str, default='auto'),
+    Field('fallback', bool, default=False),
+    one_of=TEXT_REQUIRED
+)
+DETECT_LANGUAGE_SCHEMA = Schema(
+    Field('text', str),
+    Field('texts', list),
+    one_of=[(('text', 'texts'), 'Text or texts is required')]
+)
+WRITE_SCHEMA = Schema(
+    Field('context', str),
+    Field('context_ref', str),
+    Field('tone', str, default='professional'),
+    Field('length', str, default='medium'),
+    Field('content_type', str, default='general'),
+    one_of=[(('context', 'context_ref'), 'Context or context_ref is required')]
+)
+LONG_FORM_SCHEMA = Schema(
+    Field('context', str),
+    Field('context_ref', str),
+    Field('tone', str, default='professional'),
+    Field('content_type', str, default='article'),
+    Field('target_words', int, default=3000, maximum=lambda: settings.long_form_max_words),
+    Field('stream', default='ndjson'),
+    one_of=[(('context', 'context_ref'), 'Context or context_ref is required')]
+)
+PROOFREAD_SCHEMA = Schema(
+    Field('text', str),
+    Field('text_ref', str),
+    Field('check_grammar', bool, default=True),
+    Field('check_spelling', bool, default=True),
+    Field('check_style', bool, default=True),
+    one_of=TEXT_REQUIRED
+)
+REWRITE_SCHEMA = Schema(
+    Field('text', str),
+    Field('text_ref', str),
+    Field('goal', str, default='improve'),
+    Field('tone', str, default='neutral'),
+    Field('fallback', bool, default=False),
+    one_of=TEXT_REQUIRED
+)
+BATCH_SCHEMA = Schema(
+    Field('operations', list, required=True, message='Operations list is required'),
+    Field('stream', default='ndjson'),
+    Field('concurrency', int)
+)
+
 
 # Prompt API endpoint
 @chrome_ai_bp.route('/prompt', methods=['POST'])
+@conditional
+@validate_body(PROMPT_SCHEMA)
 def generate_prompt():
     """
     Generate text using Chrome Prompt API
     Supports on-device Gemini Nano processing
     """
     try:
-        data = request.get_json()
-        
-        # Validate request
-        if not data or 'prompt' not in data:
-            return jsonify({'error': 'Prompt is required'}), 400
+        data = request_body()
         
         prompt_text = data['prompt']
-        temperature = data.get('temperature', 0.7)
-        max_tokens = data.get('max_tokens', 500)
+        temperature = data['temperature']
+        max_tokens = data['max_tokens']
         
         # Log request
         logger.info(f'Prompt API request: {len(prompt_text)} chars')
@@ -61,27 +135,27 @@ def generate_prompt():
 
 # Summarizer API endpoint
 @chrome_ai_bp.route('/summarize', methods=['POST'])
+@conditional
+@validate_body(SUMMARIZE_SCHEMA)
 def summarize_text():
     """
     Summarize text using Chrome Summarizer API
     On-device summarization with Gemini Nano
     """
     try:
-        data = request.get_json()
-        
-        if not data or 'text' not in data:
-            return jsonify({'error': 'Text is required'}), 400
+        data = request_body()
         
-        text_content = data['text']
-        summary_type = data.get('type', 'tldr')  # tldr, key-points, headline
-        length = data.get('length', 'medium')  # short, medium, long
+        text_content, text_ref = resolve_text(blob_store, data, 'text')
+        summary_type = data['type']  # tldr, key-points, headline
+        length = data['length']  # short, medium, long
         
         logger.info(f'Summarizer API request: {len(text_content)} chars, type: {summary_type}')
         
         response = {
             'type': 'chrome_ai_summarizer',
             'config': {
-                'text': text_content,
+                'text_ref': text_ref,
+                'text_length': len(text_content),
                 'summary_type': summary_type,
                 'length': length,
                 'use_nano': True
@@ -93,8 +167,23 @@ def summarize_text():
             }
         }
         
+        # Server-side extractive summary for browsers without Gemini Nano
+        if data['fallback']:
+            summarizer = current_app.summarizer_service
+            if summary_type == 'headline':
+                response['fallback'] = {'headline': summarizer.generate_headline(text_content)}
+            else:
+                summary = summarizer.summarize(text_content, length)
+                response['fallback'] = {
+                    'summary': summary['summary'],
+                    'key_points': summary['sentences'],
+                    'method': summary['config']['method']
+                }
+        
         return jsonify(response), 200
         
+    except BlobReferenceError as e:
+        return jsonify({'error': 'Unknown blob reference', 'details': str(e)}), 404
     except Exception as e:
         logger.error(f'Summarizer API error: {str(e)}')
         return jsonify({'error': 'Summarization failed', 'details': str(e)}), 500
@@ -102,27 +191,27 @@ def summarize_text():
 
 # Translator API endpoint
 @chrome_ai_bp.route('/translate', methods=['POST'])
+@conditional
+@validate_body(TRANSLATE_SCHEMA)
 def translate_text():
     """
     Translate text using Chrome Translator API
     Supports offline translation with on-device models
     """
     try:
-        data = request.get_json()
-        
-        if not data or 'text' not in data or 'target_language' not in data:
-            return jsonify({'error': 'Text and target_language are required'}), 400
+        data = request_body()
         
-        text_content = data['text']
+        text_content, text_ref = resolve_text(blob_store, data, 'text')
         target_language = data['target_language']
-        source_language = data.get('source_language', 'auto')
+        source_language = data['source_language']
         
         logger.info(f'Translator API request: {source_language} -> {target_language}')
         
         response = {
             'type': 'chrome_ai_translator',
             'config': {
-                'text': text_content,
+                'text_ref': text_ref,
+                'text_length': len(text_content),
                 'source_language': source_language,
                 'target_language': target_language,
                 'use_nano': True
@@ -134,37 +223,77 @@ def translate_text():
             }
         }
         
+        # Server-side translation through the translation memory, when a backend is configured
+        if data['fallback']:
+            result = current_app.translator_service.translate(text_content, source_language, target_language)
+            if 'translation' in result:
+                # Model translations are not deterministic, so they are neither memoized nor ETagged
+                skip_memo()
+                response['fallback'] = {
+                    'translation': result['translation'],
+                    'segments': result['segments'],
+                    'backend': result['processing']
+                }
+        
         return jsonify(response), 200
         
+    except BlobReferenceError as e:
+        return jsonify({'error': 'Unknown blob reference', 'details': str(e)}), 404
     except Exception as e:
         logger.error(f'Translator API error: {str(e)}')
         return jsonify({'error': 'Translation failed', 'details': str(e)}), 500
 
 
+# Language detection endpoint
+@chrome_ai_bp.route('/detect-language', methods=['POST'])
+@conditional
+@validate_body(DETECT_LANGUAGE_SCHEMA)
+def detect_language():
+    """
+    Detect the language of one text, or of a list of texts in one batch
+    Runs locally on character n-gram profiles, without a model call
+    """
+    try:
+        data = request_body()
+        translator = current_app.translator_service
+        
+        if data.get('texts') is not None:
+            texts = data['texts']
+            if not all(isinstance(text, str) for text in texts):
+                return jsonify({'error': 'Invalid texts', 'details': 'texts must be a list of strings'}), 400
+            return jsonify({'results': translator.detect_languages(texts)}), 200
+        
+        return jsonify(translator.detect_languages([data['text']])[0]), 200
+        
+    except Exception as e:
+        logger.error(f'Language detection error: {str(e)}')
+        return jsonify({'error': 'Language detection failed', 'details': str(e)}), 500
+
+
 # Writer API endpoint
 @chrome_ai_bp.route('/write', methods=['POST'])
+@conditional
+@validate_body(WRITE_SCHEMA)
 def write_content():
     """
     Generate written content using Chrome Writer API
     Creative writing with on-device AI assistance
     """
     try:
-        data = request.get_json()
+        data = request_body()
         
-        if not data or 'context' not in data:
-            return jsonify({'error': 'Context is required'}), 400
-        
-        context = data['context']
-        tone = data.get('tone', 'professional')  # professional, casual, creative, technical
-        length = data.get('length', 'medium')
-        content_type = data.get('content_type', 'general')  # email, article, report
+        context, context_ref = resolve_text(blob_store, data, 'context')
+        tone = data['tone']  # professional, casual, creative, technical
+        length = data['length']
+        content_type = data['content_type']  # email, article, report
         
         logger.info(f'Writer API request: tone={tone}, type={content_type}')
         
         response = {
             'type': 'chrome_ai_writer',
             'config': {
-                'context': context,
+                'context_ref': context_ref,
+                'context_length': len(context),
                 'tone': tone,
                 'length': length,
                 'content_type': content_type,
@@ -179,35 +308,81 @@ def write_content():
         
         return jsonify(response), 200
         
+    except BlobReferenceError as e:
+        return jsonify({'error': 'Unknown blob reference', 'details': str(e)}), 404
     except Exception as e:
         logger.error(f'Writer API error: {str(e)}')
         return jsonify({'error': 'Content generation failed', 'details': str(e)}), 500
 
 
+# Long-form writer endpoint
+@chrome_ai_bp.route('/write/long-form', methods=['POST'])
+@validate_body(LONG_FORM_SCHEMA)
+def write_long_form():
+    """
+    Write a long report or article outline-first
+    Streams the outline, then each section as soon as it is drafted
+    """
+    try:
+        data = request_body()
+        
+        context, context_ref = resolve_text(blob_store, data, 'context')
+        target_words = data['target_words']
+        if target_words <= 0:
+            return jsonify({'error': 'target_words must be positive'}), 400
+        
+        stream_format = resolve_stream_format(data['stream']) or 'ndjson'
+        
+        logger.info(f'Long-form writer request: type={data["content_type"]}, target_words={target_words}')
+        
+        writer = current_app.writer_service
+        started = time.perf_counter()
+        
+        # Plan before the 200 goes out, so quota and circuit rejections still get a status code
+        sections = writer.outline(context, data['tone'], data['content_type'], target_words)
+        events = writer.generate_long_form(
+            context, data['tone'], data['content_type'], target_words,
+            sections=sections, started=started
+        )
+        return streaming_response(
+            (format_event(event, payload, stream_format) for event, payload in events),
+            stream_format
+        )
+        
+    except (QuotaExceeded, CircuitOpenError) as e:
+        logger.warning(f'Long-form outline call shed: {str(e)}')
+        return backpressure_response(e)
+    except BlobReferenceError as e:
+        return jsonify({'error': 'Unknown blob reference', 'details': str(e)}), 404
+    except Exception as e:
+        logger.error(f'Long-form writer error: {str(e)}')
+        return jsonify({'error': 'Content generation failed', 'details': str(e)}), 500
+
+
 # Proofreader API endpoint
 @chrome_ai_bp.route('/proofread', methods=['POST'])
+@conditional
+@validate_body(PROOFREAD_SCHEMA)
 def proofread_text():
     """
     Proofread and correct text using Chrome Proofreader API
     Grammar, spelling, and style checking
     """
     try:
-        data = request.get_json()
-        
-        if not data or 'text' not in data:
-            return jsonify({'error': 'Text is required'}), 400
+        data = request_body()
         
-        text_content = data['text']
-        check_grammar = data.get('check_grammar', True)
-        check_spelling = data.get('check_spelling', True)
-        check_style = data.get('check_style', True)
+        text_content, text_ref = resolve_text(blob_store, data, 'text')
+        check_grammar = data['check_grammar']
+        check_spelling = data['check_spelling']
+        check_style = data['check_style']
         
         logger.info(f'Proofreader API request: {len(text_content)} chars')
         
         response = {
             'type': 'chrome_ai_proofreader',
             'config': {
-                'text': text_content,
+                'text_ref': text_ref,
+                'text_length': len(text_content),
                 'check_grammar': check_grammar,
                 'check_spelling': check_spelling,
                 'check_style': check_style,
@@ -224,8 +399,19 @@ def proofread_text():
             }
         }
         
+        # Local rule and dictionary checks; unchanged paragraphs come from the paragraph cache
+        proofreader = current_app.proofreader_service
+        result = proofreader.proofread(
+            text_content,
+            proofreader.checks_from_flags(check_grammar, check_spelling, check_style)
+        )
+        response['issues'] = result['issues']
+        response['issues_found'] = result['config']['issues_found']
+        
         return jsonify(response), 200
         
+    except BlobReferenceError as e:
+        return jsonify({'error': 'Unknown blob reference', 'details': str(e)}), 404
     except Exception as e:
         logger.error(f'Proofreader API error: {str(e)}')
         return jsonify({'error': 'Proofreading failed', 'details': str(e)}), 500
@@ -233,27 +419,27 @@ def proofread_text():
 
 # Rewriter API endpoint
 @chrome_ai_bp.route('/rewrite', methods=['POST'])
+@conditional
+@validate_body(REWRITE_SCHEMA)
 def rewrite_text():
     """
     Rewrite text using Chrome Rewriter API
     Paraphrase, improve clarity, change tone
     """
     try:
-        data = request.get_json()
-        
-        if not data or 'text' not in data:
-            return jsonify({'error': 'Text is required'}), 400
+        data = request_body()
         
-        text_content = data['text']
-        rewrite_goal = data.get('goal', 'improve')  # improve, simplify, formalize, shorten
-        target_tone = data.get('tone', 'neutral')
+        text_content, text_ref = resolve_text(blob_store, data, 'text')
+        rewrite_goal = data['goal']  # improve, simplify, formalize, shorten
+        target_tone = data['tone']
         
         logger.info(f'Rewriter API request: goal={rewrite_goal}')
         
         response = {
             'type': 'chrome_ai_rewriter',
             'config': {
-                'text': text_content,
+                'text_ref': text_ref,
+                'text_length': len(text_content),
                 'rewrite_goal': rewrite_goal,
                 'target_tone': target_tone,
                 'use_nano': True
@@ -265,51 +451,122 @@ def rewrite_text():
             }
         }
         
+        # Server-side chunked rewrite; cache statistics stay out so the ETag only follows the text
+        if data['fallback']:
+            result = current_app.rewriter_service.rewrite(text_content, rewrite_goal, target_tone)
+            # Only a complete local rewrite is deterministic enough to memoize
+            if result['processing'] != 'local' or result['chunks']['failed']:
+                skip_memo()
+            response['fallback'] = {
+                'text': result['text'],
+                'chunk_count': result['chunks']['total'],
+                'backend': result['processing']
+            }
+        
         return jsonify(response), 200
         
+    except BlobReferenceError as e:
+        return jsonify({'error': 'Unknown blob reference', 'details': str(e)}), 404
     except Exception as e:
         logger.error(f'Rewriter API error: {str(e)}')
         return jsonify({'error': 'Rewriting failed', 'details': str(e)}), 500
 
 
+# Blob upload endpoint
+@chrome_ai_bp.route('/blobs', methods=['POST'])
+def upload_blob():
+    """
+    Store a document once and return its content hash
+    Accepts a JSON body with 'text' or a raw text/plain body
+    Stored blobs can be evicted; a 404 for a reference means upload again
+    """
+    try:
+        # Memory-only blobs live in one worker; a reference would miss on the others
+        if not blob_store.disk_path and settings.web_concurrency > 1:
+            return jsonify({
+                'error': 'Blob uploads unavailable',
+                'details': f'Set BLOB_STORE_PATH to share blobs across {settings.web_concurrency} workers'
+            }), 503
+        
+        if request.is_json:
+            data = request_body()
+            if not data or not isinstance(data.get('text'), str):
+                return jsonify({'error': 'Text is required'}), 400
+            text_content = data['text']
+        else:
+            text_content = request.get_data(as_text=True)
+            if not text_content:
+                return jsonify({'error': 'Request body is required'}), 400
+        
+        text_ref, created = blob_store.put_text(text_content)
+        
+        logger.info(f'Blob upload: {text_ref[:12]}, {len(text_content)} chars, created={created}')
+        
+        response = {
+            'text_ref': text_ref,
+            'size': blob_store.size(text_ref),
+            'deduplicated': not created,
+            'persistent': bool(blob_store.disk_path),
+            'evictable': True
+        }
+        
+        return jsonify(response), 201 if created else 200
+        
+    except BlobTooLargeError as e:
+        return jsonify({'error': 'Blob too large', 'details': str(e), 'max_bytes': e.limit}), 413
+    except Exception as e:
+        logger.error(f'Blob upload error: {str(e)}')
+        return jsonify({'error': 'Blob upload failed', 'details': str(e)}), 500
+
+
+# Blob download endpoint
+@chrome_ai_bp.route('/blobs/<text_ref>', methods=['GET'])
+def get_blob(text_ref):
+    """
+    Stream a stored document by content hash
+    Disk-tier blobs are streamed straight from a memory map
+    """
+    chunks = blob_store.iter_bytes(text_ref)
+    if chunks is None:
+        return jsonify({'error': 'Blob not found'}), 404
+    
+    # Content never changes under its hash, so the hash is the ETag
+    if request.if_none_match.contains_weak(text_ref):
+        return not_modified(text_ref)
+    
+    response = Response(chunks, mimetype='text/plain; charset=utf-8')
+    response.headers['Content-Length'] = str(blob_store.size(text_ref))
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    response.set_etag(text_ref)
+    return response
+
+
 # Batch processing endpoint
 @chrome_ai_bp.route('/batch', methods=['POST'])
+@validate_body(BATCH_SCHEMA)
 def batch_process():
     """
     Process multiple Chrome AI requests in batch
-    Optimizes multi-operation workflows
+    Runs each operation on its service and streams results as they complete
     """
     try:
-        data = request.get_json()
+        data = request_body()
         
-        if not data or 'operations' not in data:
-            return jsonify({'error': 'Operations list is required'}), 400
+        engine = current_app.batch_engine
+        try:
+            operations = engine.validate(data['operations'])
+        except ValueError as e:
+            return jsonify({'error': 'Invalid operations', 'details': str(e)}), 400
         
-        operations = data['operations']
+        stream_format = resolve_stream_format(data['stream']) or 'ndjson'
         
         logger.info(f'Batch processing: {len(operations)} operations')
         
-        results = []
-        for op in operations:
-            op_type = op.get('type')
-            op_data = op.get('data', {})
-            
-            results.append({
-                'type': op_type,
-                'config': op_data,
-                'use_nano': True
-            })
-        
-        response = {
-            'batch_id': f'batch_{len(operations)}',
-            'operations': results,
-            'metadata': {
-                'total_operations': len(operations),
-                'processing': 'on-device'
-            }
-        }
-        
-        return jsonify(response), 200
+        events = engine.run(operations, concurrency=data.get('concurrency'))
+        return streaming_response(
+            (format_event(event, payload, stream_format) for event, payload in events),
+            stream_format
+        )
         
     except Exception as e:
         logger.error(f'Batch processing error: {str(e)}')
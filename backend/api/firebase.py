@@ -7,11 +7,12 @@ import logging
 import json
 import firebase_admin
 from firebase_admin import credentials, firestore, auth
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, jsonify
 from datetime import datetime
 
 from config.settings import settings
 from backend.utils.logger import setup_logger
+from backend.utils.validators import Field, Schema, request_body, validate_body
 
 logger = setup_logger(__name__)
 
@@ -28,16 +29,33 @@ except Exception as e:
 # Create blueprint
 firebase_bp = Blueprint('firebase', __name__)
 
+# Request schemas, compiled once at import
+VERIFY_SCHEMA = Schema(
+    Field('id_token', str, required=True, message='ID token is required')
+)
+SAVE_SCHEMA = Schema(
+    Field('collection', str, required=True, message='Collection and document are required'),
+    Field('document', str, required=True, message='Collection and document are required'),
+    Field('data', dict, default=dict)
+)
+GET_SCHEMA = Schema(
+    Field('collection', str, required=True, message='Collection and document are required'),
+    Field('document', str, required=True, message='Collection and document are required')
+)
+QUERY_SCHEMA = Schema(
+    Field('collection', str, required=True, message='Collection is required'),
+    Field('filters', list, default=list),
+    Field('limit', int, default=100)
+)
+
 
 # User authentication endpoint
 @firebase_bp.route('/auth/verify', methods=['POST'])
+@validate_body(VERIFY_SCHEMA)
 def verify_token():
     """Verify Firebase authentication token"""
     try:
-        data = request.get_json()
-        
-        if not data or 'id_token' not in data:
-            return jsonify({'error': 'ID token is required'}), 400
+        data = request_body()
         
         id_token = data['id_token']
         
@@ -61,20 +79,18 @@ def verify_token():
 
 # Save user data endpoint
 @firebase_bp.route('/data/save', methods=['POST'])
+@validate_body(SAVE_SCHEMA)
 def save_data():
     """Save user data to Firestore"""
     try:
         if db is None:
             return jsonify({'error': 'Firestore not initialized'}), 500
         
-        data = request.get_json()
-        
-        if not data or 'collection' not in data or 'document' not in data:
-            return jsonify({'error': 'Collection and document are required'}), 400
+        data = request_body()
         
         collection_name = data['collection']
         document_id = data['document']
-        document_data = data.get('data', {})
+        document_data = data['data']
         
         # Add timestamp
         document_data['updated_at'] = firestore.SERVER_TIMESTAMP
@@ -99,16 +115,14 @@ def save_data():
 
 # Retrieve user data endpoint
 @firebase_bp.route('/data/get', methods=['POST'])
+@validate_body(GET_SCHEMA)
 def get_data():
     """Retrieve user data from Firestore"""
     try:
         if db is None:
             return jsonify({'error': 'Firestore not initialized'}), 500
         
-        data = request.get_json()
-        
-        if not data or 'collection' not in data or 'document' not in data:
-            return jsonify({'error': 'Collection and document are required'}), 400
+        data = request_body()
         
         collection_name = data['collection']
         document_id = data['document']
@@ -134,20 +148,18 @@ def get_data():
 
 # Query data endpoint
 @firebase_bp.route('/data/query', methods=['POST'])
+@validate_body(QUERY_SCHEMA)
 def query_data():
     """Query Firestore data with filters"""
     try:
         if db is None:
             return jsonify({'error': 'Firestore not initialized'}), 500
         
-        data = request.get_json()
-        
-        if not data or 'collection' not in data:
-            return jsonify({'error': 'Collection is required'}), 400
+        data = request_body()
         
         collection_name = data['collection']
-        filters = data.get('filters', [])
-        limit = data.get('limit', 100)
+        filters = data['filters']
+        limit = data['limit']
         
         # Build query
         query = db.collection(collection_name)
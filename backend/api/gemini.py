@@ -4,90 +4,205 @@ Gemini Pro API endpoints with full functionality
 """
 
 import logging
+import re
+import time
 import google.generativeai as genai
-from flask import Blueprint, request, jsonify
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from flask import Blueprint, current_app, jsonify
 from datetime import datetime
 
 from config.settings import settings
+from backend.utils.concurrency import run_concurrently
+from backend.utils.model_registry import model_registry
+from backend.utils.cache import canonical_key, response_cache
+from backend.utils.semantic_cache import semantic_cache
+from backend.utils.singleflight import single_flight
+from backend.utils.rate_limiter import QuotaExceeded, quota_governor
+from backend.utils.resilience import (
+    CircuitOpenError, backpressure_response, circuit_breaker, hedger, invoke, invoke_text
+)
+from backend.utils.analysis_extractor import extract_analysis
+from backend.utils.config_chunker import chunk_config, number_lines
+from backend.utils.streaming import format_event, resolve_stream_format, streaming_response
+from backend.utils.validators import Field, Schema, request_body, validate_body
+from backend.utils.workflow import WorkflowError, WorkflowScheduler, parse_workflow, workflow_memo
 
 logger = logging.getLogger(__name__)
 
 # Configure Gemini API
 try:
-    genai.configure(api_key=settings.GEMINI_API_KEY)
+    genai.configure(api_key=settings.gemini_api_key)
 except Exception as e:
     logger.warning(f"Gemini API configuration warning: {e}")
 
 # Create blueprint
 gemini_bp = Blueprint('gemini', __name__)
 
-
-def get_gemini_model(model_name='gemini-pro'):
-    """Get configured Gemini model instance"""
+# Line citations such as "line 12" or "lines 12-14" in model output
+LINE_REFERENCE = re.compile(r'\blines?\s+(\d+)(?:\s*[-\u2013]\s*(\d+))?', re.IGNORECASE)
+
+# Request schemas, compiled once at import
+GENERATE_SCHEMA = Schema(
+    Field('prompt', str, required=True, message='Prompt is required'),
+    Field('temperature', float, default=0.7),
+    Field('max_tokens', int, default=2048),
+    Field('stream', default=False),
+    Field('cache', bool, default=True)
+)
+BATCH_GENERATE_SCHEMA = Schema(
+    Field('items', list, required=True, message='Items list is required'),
+    Field('concurrency', int, default=lambda: settings.batch_concurrency),
+    Field('stream', default='ndjson'),
+    Field('cache', bool, default=True)
+)
+DEVOPS_SCHEMA = Schema(
+    Field('code', str, required=True, message='Code and type are required'),
+    Field('type', str, required=True, message='Code and type are required'),
+    Field('chunked', bool),
+    Field('chunk_lines', int, default=lambda: settings.devops_chunk_lines),
+    Field('cache', bool, default=True)
+)
+MULTI_AGENT_SCHEMA = Schema(
+    Field('task', str, required=True, message='Task description is required'),
+    Field('agents', list, default=lambda: ['analyst', 'writer', 'reviewer']),
+    Field('orchestration', str, default='concurrent'),
+    Field('agent_timeout', float, default=lambda: settings.agent_timeout),
+    Field('max_concurrency', int, default=lambda: settings.workflow_concurrency),
+    Field('cache', bool, default=True)
+)
+GENERATE_CODE_SCHEMA = Schema(
+    Field('description', str, required=True, message='Code description is required'),
+    Field('language', str, default='python'),
+    Field('framework', str),
+    Field('cache', bool, default=True)
+)
+HYBRID_DECISION_SCHEMA = Schema(
+    Field('query', str, required=True, message='Query is required'),
+    Field('nano_result', str),
+    Field('force_cloud', bool, default=False)
+)
+HYBRID_FEEDBACK_SCHEMA = Schema(
+    Field('decision_id', str, required=True, message='decision_id and local_sufficient are required'),
+    Field('local_sufficient', bool, required=True, message='decision_id and local_sufficient are required')
+)
+
+
+def get_gemini_model(model_name='gemini-pro', generation_config=None):
+    """Get a pooled Gemini model instance for this name and generation config"""
     try:
-        return genai.GenerativeModel(model_name)
+        return model_registry.get(model_name, generation_config)
     except Exception as e:
         logger.error(f"Failed to get Gemini model: {e}")
         return None
 
 
 @gemini_bp.route('/generate', methods=['POST'])
+@validate_body(GENERATE_SCHEMA)
 def generate_content():
     """Generate content using Gemini Pro"""
     try:
-        data = request.get_json()
-        
-        if not data or 'prompt' not in data:
-            return jsonify({'error': 'Prompt is required'}), 400
+        data = request_body()
         
         prompt = data['prompt']
-        temperature = data.get('temperature', 0.7)
-        max_tokens = data.get('max_tokens', 2048)
+        temperature = data['temperature']
+        max_tokens = data['max_tokens']
         
         logger.info(f'Gemini Pro generate request: {len(prompt)} chars')
         
-        model = get_gemini_model()
-        if not model:
-            return jsonify({'error': 'Gemini model not available'}), 500
-        
         generation_config = {
             'temperature': temperature,
             'max_output_tokens': max_tokens,
         }
         
-        response = model.generate_content(
-            prompt,
-            generation_config=generation_config
+        model = get_gemini_model(generation_config=generation_config)
+        if not model:
+            return jsonify({'error': 'Gemini model not available'}), 500
+        
+        # Opt-in streaming: forward chunks as they are generated. The upstream
+        # stream is opened before the 200 is sent, so calls shed by the quota
+        # or the circuit breaker still get a 429/503 with Retry-After
+        stream_format = resolve_stream_format(data['stream'])
+        if stream_format:
+            key = response_cache.make_key(prompt, 'gemini-pro', generation_config)
+            cached = response_cache.get(key) if data['cache'] else None
+            started = time.perf_counter()
+            upstream = invoke(model, prompt, stream=True) if cached is None else None
+            return streaming_response(
+                _stream_generation(prompt, generation_config, stream_format, started,
+                                   cached=cached, response=upstream),
+                stream_format
+            )
+        
+        generated_text, cache_hit = _generate_text(
+            model, prompt,
+            generation_config=generation_config,
+            use_cache=data['cache'],
+            semantic=True
         )
         
         result = {
             'success': True,
-            'generated_text': response.text,
+            'generated_text': generated_text,
             'model': 'gemini-pro',
             'processing': 'cloud',
             'metadata': {
                 'prompt_tokens': len(prompt.split()),
-                'completion_tokens': len(response.text.split()),
+                'completion_tokens': len(generated_text.split()),
                 'temperature': temperature,
+                'cache_hit': cache_hit,
                 'timestamp': datetime.utcnow().isoformat()
             }
         }
         
         return jsonify(result), 200
         
+    except (QuotaExceeded, CircuitOpenError) as e:
+        logger.warning(f'Gemini call shed: {str(e)}')
+        return backpressure_response(e)
     except Exception as e:
         logger.error(f'Gemini generation error: {str(e)}')
         return jsonify({'error': 'Generation failed', 'details': str(e)}), 500
 
 
+@gemini_bp.route('/batch-generate', methods=['POST'])
+@validate_body(BATCH_GENERATE_SCHEMA)
+def batch_generate():
+    """Generate content for many prompts, streaming each result as it finishes"""
+    try:
+        data = request_body()
+        
+        items = data['items']
+        if not items:
+            return jsonify({'error': 'Items list is required'}), 400
+        if len(items) > settings.batch_max_items:
+            return jsonify({'error': f'Batch is limited to {settings.batch_max_items} items'}), 400
+        
+        for index, item in enumerate(items):
+            if not isinstance(item, dict) or 'prompt' not in item:
+                return jsonify({'error': f'Prompt is required for item {index}'}), 400
+        
+        concurrency = max(1, min(data['concurrency'],
+                                 settings.batch_concurrency))
+        stream_format = resolve_stream_format(data['stream']) or 'ndjson'
+        
+        logger.info(f'Gemini batch request: {len(items)} items, concurrency={concurrency}')
+        
+        return streaming_response(
+            _stream_batch(items, concurrency, stream_format, use_cache=data['cache']),
+            stream_format
+        )
+        
+    except Exception as e:
+        logger.error(f'Gemini batch error: {str(e)}')
+        return jsonify({'error': 'Batch generation failed', 'details': str(e)}), 500
+
+
 @gemini_bp.route('/analyze-devops', methods=['POST'])
+@validate_body(DEVOPS_SCHEMA)
 def analyze_devops():
     """Analyze DevOps configurations"""
     try:
-        data = request.get_json()
-        
-        if not data or 'code' not in data or 'type' not in data:
-            return jsonify({'error': 'Code and type are required'}), 400
+        data = request_body()
         
         code = data['code']
         config_type = data['type']
@@ -112,12 +227,25 @@ Format your response clearly with sections."""
         if not model:
             return jsonify({'error': 'Gemini model not available'}), 500
         
-        response = model.generate_content(analysis_prompt)
-        analysis_text = response.text
+        # Large configs are split on resource/document/stage boundaries and analyzed in parallel
+        chunked = data.get('chunked')
+        if chunked is None:
+            chunked = code.count('\n') + 1 > settings.devops_chunk_lines
+        if chunked:
+            chunks = chunk_config(code, config_type, data['chunk_lines'], max_chunks=settings.devops_max_chunks)
+            if len(chunks) > 1:
+                return jsonify(_analyze_devops_chunked(
+                    model, code, config_type, chunks,
+                    use_cache=data['cache']
+                )), 200
+        
+        analysis_text, cache_hit = _generate_text(
+            model, analysis_prompt,
+            use_cache=data['cache']
+        )
         
         # Extract recommendations
-        recommendations = _extract_recommendations(analysis_text)
-        severity_levels = _analyze_severity(analysis_text)
+        recommendations, severity_levels = extract_analysis(analysis_text)
         
         analysis_result = {
             'success': True,
@@ -133,94 +261,128 @@ Format your response clearly with sections."""
             'metadata': {
                 'model': 'gemini-pro',
                 'lines_analyzed': len(code.split('\n')),
+                'cache_hit': cache_hit,
                 'timestamp': datetime.utcnow().isoformat()
             }
         }
         
         return jsonify(analysis_result), 200
         
+    except (QuotaExceeded, CircuitOpenError) as e:
+        logger.warning(f'Gemini call shed: {str(e)}')
+        return backpressure_response(e)
     except Exception as e:
         logger.error(f'DevOps analysis error: {str(e)}')
         return jsonify({'error': 'Analysis failed', 'details': str(e)}), 500
 
 
 @gemini_bp.route('/multi-agent', methods=['POST'])
+@validate_body(MULTI_AGENT_SCHEMA)
 def multi_agent_process():
     """Multi-agent AI orchestration"""
     try:
-        data = request.get_json()
-        
-        if not data or 'task' not in data:
-            return jsonify({'error': 'Task description is required'}), 400
+        data = request_body()
         
         task = data['task']
-        agents = data.get('agents', ['analyst', 'writer', 'reviewer'])
+        
+        # Agents declaring inputs from each other run as a dependency graph
+        if 'workflow' in data:
+            return _run_workflow(task, data)
+        
+        agents = data['agents']
         
         logger.info(f'Multi-agent task: {len(agents)} agents')
         
+        orchestration = data['orchestration']
+        agent_timeout = data['agent_timeout']
+        
+        if orchestration not in ('concurrent', 'sequential'):
+            return jsonify({'error': 'Orchestration must be concurrent or sequential'}), 400
+        
         model = get_gemini_model()
         if not model:
             return jsonify({'error': 'Gemini model not available'}), 500
         
-        agent_results = []
+        started = time.perf_counter()
+        calls = [lambda agent=agent: _run_agent(model, agent, task) for agent in agents]
         
-        # Process task with each agent
-        for agent in agents:
-            agent_prompt = f"""You are a specialized {agent} agent.
-
-Task: {task}
-
-Provide your perspective and analysis as a {agent}. Be specific and actionable."""
-            
-            response = model.generate_content(agent_prompt)
-            agent_results.append({
-                'agent': agent,
-                'response': response.text,
-                'confidence': 0.92,
-                'timestamp': datetime.utcnow().isoformat()
-            })
+        # Fan agents out on the shared pool, or run them one after another
+        if orchestration == 'concurrent':
+            outcomes = run_concurrently(calls, timeout=agent_timeout)
+        else:
+            outcomes = [_run_sequential(call) for call in calls]
         
-        # Synthesize results
+        agent_results = []
+        for agent, outcome in zip(agents, outcomes):
+            if outcome['error']:
+                logger.warning(f'Agent {agent} failed: {outcome["error"]}')
+                agent_results.append({
+                    'agent': agent,
+                    'success': False,
+                    'error': outcome['error'],
+                    'latency_ms': outcome['latency_ms'],
+                    'timestamp': datetime.utcnow().isoformat()
+                })
+            else:
+                agent_results.append(dict(outcome['result'], success=True, latency_ms=outcome['latency_ms']))
+        
+        successful = [r for r in agent_results if r['success']]
+        if not successful:
+            return jsonify({
+                'error': 'Multi-agent processing failed',
+                'details': 'All agents failed',
+                'agent_responses': agent_results
+            }), 500
+        
+        # Synthesize results as soon as the last agent has returned
         synthesis_prompt = f"""Synthesize the following agent responses into a coherent, comprehensive result:
 
-{chr(10).join([f"{r['agent'].upper()}: {r['response'][:300]}..." for r in agent_results])}
+{chr(10).join([f"{r['agent'].upper()}: {r['response'][:300]}..." for r in successful])}
 
 Provide a unified, actionable response that combines the best insights from all agents."""
         
-        synthesis = model.generate_content(synthesis_prompt)
+        synthesis_started = time.perf_counter()
+        synthesis_text = _call_model(model, synthesis_prompt)
+        finished = time.perf_counter()
         
         result = {
             'success': True,
             'task': task,
             'agent_responses': agent_results,
-            'synthesized_result': synthesis.text,
+            'synthesized_result': synthesis_text,
             'metadata': {
                 'agents_used': len(agents),
+                'agents_succeeded': len(successful),
+                'agents_failed': len(agents) - len(successful),
                 'model': 'gemini-pro',
-                'orchestration': 'sequential',
+                'orchestration': orchestration,
+                'agent_timeout': agent_timeout,
+                'synthesis_latency_ms': round((finished - synthesis_started) * 1000, 2),
+                'total_latency_ms': round((finished - started) * 1000, 2),
                 'timestamp': datetime.utcnow().isoformat()
             }
         }
         
         return jsonify(result), 200
         
+    except (QuotaExceeded, CircuitOpenError) as e:
+        logger.warning(f'Gemini call shed: {str(e)}')
+        return backpressure_response(e)
     except Exception as e:
         logger.error(f'Multi-agent error: {str(e)}')
         return jsonify({'error': 'Multi-agent processing failed', 'details': str(e)}), 500
 
 
 @gemini_bp.route('/generate-code', methods=['POST'])
+@validate_body(GENERATE_CODE_SCHEMA)
 def generate_code():
     """Generate code using Gemini Pro"""
     try:
-        data = request.get_json()
-        
-        if not data or 'description' not in data:
-            return jsonify({'error': 'Code description is required'}), 400
+        data = request_body()
         
         description = data['description']
-        language = data.get('language', 'python')
-        framework = data.get('framework', None)
+        language = data['language']
+        framework = data.get('framework')
         
         logger.info(f'Code generation: {language}')
         
@@ -243,41 +405,86 @@ Provide complete, executable code."""
         if not model:
             return jsonify({'error': 'Gemini model not available'}), 500
         
-        response = model.generate_content(code_prompt)
+        # Exact cache only: the fixed template dominates any similarity measure,
+        # and near-identical descriptions (ascending vs descending) need different code
+        generated_code, cache_hit = _generate_text(
+            model, code_prompt,
+            use_cache=data['cache']
+        )
         
         result = {
             'success': True,
-            'generated_code': response.text,
+            'generated_code': generated_code,
             'language': language,
             'framework': framework,
             'metadata': {
                 'model': 'gemini-pro',
-                'lines': len(response.text.split('\n')),
+                'lines': len(generated_code.split('\n')),
+                'cache_hit': cache_hit,
                 'timestamp': datetime.utcnow().isoformat()
             }
         }
         
         return jsonify(result), 200
         
+    except (QuotaExceeded, CircuitOpenError) as e:
+        logger.warning(f'Gemini call shed: {str(e)}')
+        return backpressure_response(e)
     except Exception as e:
         logger.error(f'Code generation error: {str(e)}')
         return jsonify({'error': 'Code generation failed', 'details': str(e)}), 500
 
 
 @gemini_bp.route('/hybrid-decision', methods=['POST'])
+@validate_body(HYBRID_DECISION_SCHEMA)
 def hybrid_decision():
     """Hybrid AI decision making"""
     try:
-        data = request.get_json()
-        
-        if not data or 'query' not in data:
-            return jsonify({'error': 'Query is required'}), 400
+        data = request_body()
         
         query = data['query']
-        nano_result = data.get('nano_result', None)
+        nano_result = data.get('nano_result')
         
         logger.info('Hybrid AI decision processing')
         
+        router = current_app.hybrid_router
+        cloud_latency = hedger.latency.percentile(50)
+        decision = router.decide(
+            query, nano_result,
+            force_cloud=data['force_cloud'],
+            cloud_latency_ms=cloud_latency * 1000 if cloud_latency is not None else None
+        )
+        
+        routing = {
+            'decision_id': decision['decision_id'],
+            'route': decision['route'],
+            'score': decision['score'],
+            'threshold': decision['threshold'],
+            'signals': decision['signals'],
+            'explore': decision['explore'],
+            'latency_saved_ms': decision['latency_saved_ms']
+        }
+        
+        # On-device result is good enough: skip the cloud round trip
+        if decision['route'] == 'local':
+            return jsonify({
+                'success': True,
+                'query': query,
+                'nano_contribution': True,
+                'result': nano_result,
+                'cloud_enhancement': None,
+                'hybrid_strategy': 'nano-first-cloud-enhance',
+                'route': 'local',
+                'confidence': decision['score'],
+                'routing': routing,
+                'metadata': {
+                    'processing': 'on-device',
+                    'privacy': 'nano-local',
+                    'network': 'not-required',
+                    'timestamp': datetime.utcnow().isoformat()
+                }
+            }), 200
+        
         hybrid_prompt = f"""Query: {query}
 
 On-device result: {nano_result if nano_result else 'Not available'}
@@ -294,15 +501,23 @@ Combine insights for optimal result."""
         if not model:
             return jsonify({'error': 'Gemini model not available'}), 500
         
-        response = model.generate_content(hybrid_prompt)
+        cloud_enhancement = _call_model(model, hybrid_prompt)
+        
+        # Reported only; the threshold learns from /hybrid-feedback, since a short
+        # on-device answer overlaps little with a long enhanced analysis even when right
+        confidence = None
+        if nano_result:
+            confidence = round(0.5 + 0.5 * router.agreement(nano_result, cloud_enhancement), 4)
         
         result = {
             'success': True,
             'query': query,
             'nano_contribution': nano_result is not None,
-            'cloud_enhancement': response.text,
+            'cloud_enhancement': cloud_enhancement,
             'hybrid_strategy': 'nano-first-cloud-enhance',
-            'confidence': 0.95,
+            'route': 'cloud',
+            'confidence': confidence,
+            'routing': routing,
             'metadata': {
                 'processing': 'hybrid',
                 'privacy': 'nano-local-pro-cloud',
@@ -313,71 +528,446 @@ Combine insights for optimal result."""
         
         return jsonify(result), 200
         
+    except (QuotaExceeded, CircuitOpenError) as e:
+        logger.warning(f'Gemini call shed: {str(e)}')
+        return backpressure_response(e)
     except Exception as e:
         logger.error(f'Hybrid decision error: {str(e)}')
         return jsonify({'error': 'Hybrid processing failed', 'details': str(e)}), 500
 
 
-def _extract_recommendations(analysis_text):
-    """Extract structured recommendations from analysis text"""
+@gemini_bp.route('/hybrid-feedback', methods=['POST'])
+@validate_body(HYBRID_FEEDBACK_SCHEMA)
+def hybrid_feedback():
+    """Log whether a routed on-device result was sufficient"""
+    try:
+        data = request_body()
+        
+        router = current_app.hybrid_router
+        if not router.record_outcome(data['decision_id'], data['local_sufficient']):
+            return jsonify({'error': 'Unknown or already rated decision'}), 404
+        
+        return jsonify({'success': True, 'routing': router.get_stats()}), 200
+        
+    except Exception as e:
+        logger.error(f'Hybrid feedback error: {str(e)}')
+        return jsonify({'error': 'Feedback failed', 'details': str(e)}), 500
+
+
+@gemini_bp.route('/stats', methods=['GET'])
+def gemini_stats():
+    """Get Gemini cache, pool, coalescing, quota and resilience statistics"""
+    return jsonify({
+        'cache': response_cache.stats(),
+        'semantic_cache': semantic_cache.stats(),
+        'model_pool': model_registry.stats(),
+        'single_flight': single_flight.stats(),
+        'quota': quota_governor.stats(),
+        'circuit_breaker': circuit_breaker.stats(),
+        'hedging': hedger.stats(),
+        'workflow_memo': workflow_memo.stats(),
+        'hybrid_routing': current_app.hybrid_router.get_stats(),
+        'timestamp': datetime.utcnow().isoformat()
+    }), 200
+
+
+def _generate_text(model, prompt, model_name='gemini-pro', generation_config=None, use_cache=True,
+                   semantic=False):
+    """
+    Generate text through the response cache, returning (text, cache_hit).
+    
+    With semantic=True an exact-cache miss falls back to the near-duplicate
+    index before calling the model, and fresh answers are indexed there too.
+    """
+    key = response_cache.make_key(prompt, model_name, generation_config)
+    namespace = canonical_key(model=model_name, generation_config=generation_config) if semantic else None
+    
+    if use_cache:
+        cached = response_cache.get(key)
+        if cached is not None:
+            return cached, True
+        if semantic:
+            match = semantic_cache.lookup(namespace, prompt)
+            if match is not None:
+                logger.info(f'Semantic cache hit: similarity={match[1]}')
+                return match[0], True
+    
+    def fetch():
+        text = invoke(model, prompt).text
+        response_cache.set(key, text)
+        if semantic:
+            semantic_cache.add(namespace, prompt, text)
+        return text
+    
+    text, _ = single_flight.do(key, fetch, timeout=settings.singleflight_timeout)
+    return text, False
+
+
+def _call_model(model, prompt, model_name='gemini-pro', generation_config=None):
+    """Call the model, coalescing identical in-flight requests"""
+    return invoke_text(model, prompt, response_cache.make_key(prompt, model_name, generation_config))
+
+
+def _stream_generation(prompt, generation_config, stream_format, started, cached=None, response=None):
+    """
+    Yield generation chunks as SSE or NDJSON events, then a final metadata event.
+    
+    Either a cached completion or an already opened upstream response is
+    streamed. Streamed completions are not buffered, so they are never written
+    to the response cache. Latencies count from `started`, before the stream
+    was opened.
+    """
+    chunks = 0
+    completion_tokens = 0
+    first_chunk_ms = None
+    ends_mid_word = False
+    
+    try:
+        texts = [cached] if cached is not None else (chunk.text for chunk in response)
+        
+        for text in texts:
+            if not text:
+                continue
+            
+            # Count words incrementally without holding the whole completion
+            words = len(text.split())
+            if ends_mid_word and not text[0].isspace():
+                words -= 1
+            completion_tokens += max(words, 0)
+            ends_mid_word = not text[-1].isspace()
+            
+            chunks += 1
+            if first_chunk_ms is None:
+                first_chunk_ms = round((time.perf_counter() - started) * 1000, 2)
+            
+            yield format_event('chunk', {'text': text}, stream_format)
+        
+        yield format_event('done', {
+            'success': True,
+            'model': 'gemini-pro',
+            'processing': 'cloud',
+            'metadata': {
+                'prompt_tokens': len(prompt.split()),
+                'completion_tokens': completion_tokens,
+                'temperature': generation_config.get('temperature'),
+                'cache_hit': cached is not None,
+                'chunks': chunks,
+                'time_to_first_chunk_ms': first_chunk_ms,
+                'total_latency_ms': round((time.perf_counter() - started) * 1000, 2),
+                'timestamp': datetime.utcnow().isoformat()
+            }
+        }, stream_format)
+        
+    except GeneratorExit:
+        # Client went away: stop pulling from the upstream stream
+        logger.info(f'Gemini stream closed by client after {chunks} chunks')
+        cancel = getattr(getattr(response, '_iterator', None), 'cancel', None)
+        if cancel:
+            cancel()
+        raise
+    except Exception as e:
+        logger.error(f'Gemini streaming error: {str(e)}')
+        yield format_event('error', {'error': 'Generation failed', 'details': str(e)}, stream_format)
+
+
+def _stream_batch(items, concurrency, stream_format, use_cache=True):
+    """
+    Run batch items on a bounded pool and yield one result event per item in
+    completion order. Identical items (same prompt and config) are generated
+    once and their result is emitted for every index that asked for it.
+    """
+    started = time.perf_counter()
+    groups = {}
+    for index, item in enumerate(items):
+        generation_config = {
+            'temperature': item.get('temperature', 0.7),
+            'max_output_tokens': item.get('max_tokens', 2048),
+        }
+        key = response_cache.make_key(item['prompt'], 'gemini-pro', generation_config)
+        if key not in groups:
+            groups[key] = {'prompt': item['prompt'], 'config': generation_config, 'indexes': []}
+        groups[key]['indexes'].append(index)
+    
+    def run(group):
+        item_started = time.perf_counter()
+        model = get_gemini_model(generation_config=group['config'])
+        if not model:
+            raise RuntimeError('Gemini model not available')
+        text, cache_hit = _generate_text(
+            model, group['prompt'],
+            generation_config=group['config'],
+            use_cache=use_cache
+        )
+        return text, cache_hit, round((time.perf_counter() - item_started) * 1000, 2)
+    
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='gemini-batch')
+    futures = {executor.submit(run, group): group for group in groups.values()}
+    succeeded = 0
+    
+    try:
+        for future in as_completed(futures):
+            group = futures[future]
+            try:
+                text, cache_hit, latency_ms = future.result()
+                outcome = {
+                    'success': True,
+                    'generated_text': text,
+                    'cache_hit': cache_hit,
+                    'latency_ms': latency_ms
+                }
+            except Exception as e:
+                outcome = {'success': False, 'error': 'Generation failed', 'details': str(e)}
+            
+            for index in group['indexes']:
+                if outcome['success']:
+                    succeeded += 1
+                yield format_event('result', dict(
+                    outcome,
+                    index=index,
+                    id=items[index].get('id', index),
+                    deduplicated=len(group['indexes']) > 1
+                ), stream_format)
+        
+        yield format_event('done', {
+            'success': True,
+            'metadata': {
+                'total_items': len(items),
+                'unique_items': len(groups),
+                'succeeded': succeeded,
+                'failed': len(items) - succeeded,
+                'concurrency': concurrency,
+                'model': 'gemini-pro',
+                'total_latency_ms': round((time.perf_counter() - started) * 1000, 2),
+                'timestamp': datetime.utcnow().isoformat()
+            }
+        }, stream_format)
+        
+    except GeneratorExit:
+        logger.info('Gemini batch stream closed by client')
+        raise
+    finally:
+        # Drop queued items if the client disconnected; running ones finish in the background
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _analyze_devops_chunked(model, code, config_type, chunks, use_cache=True):
+    """
+    Map-reduce DevOps analysis: analyze chunks in parallel, then merge them
+    into one report whose line references point into the original file.
+    """
+    total_lines = code.count('\n') + 1
+    
+    def analyze(chunk):
+        chunk_prompt = f"""Analyze this excerpt of a {config_type} configuration (lines {chunk['start_line']}-{chunk['end_line']} of {total_lines}) and provide detailed feedback:
+
+{number_lines(chunk['text'], chunk['start_line'])}
+
+Each line starts with its line number in the original file. Always cite those numbers as "line N".
+
+Provide:
+1. Security Issues (with severity levels)
+2. Best Practice Violations
+3. Performance Optimization Opportunities
+4. Cost Reduction Suggestions
+5. Scalability Improvements
+6. Specific Recommendations with line numbers
+
+Format your response clearly with sections."""
+        return _generate_text(model, chunk_prompt, use_cache=use_cache)
+    
+    outcomes = run_concurrently(
+        [lambda chunk=chunk: analyze(chunk) for chunk in chunks],
+        timeout=settings.agent_timeout
+    )
+    
+    if all(outcome['error'] for outcome in outcomes):
+        raise RuntimeError(f'All {len(chunks)} chunk analyses failed: {outcomes[0]["error"]}')
+    
+    sections = []
     recommendations = []
+    severity_levels = {'critical': 0, 'high': 0, 'medium': 0, 'low': 0}
+    chunk_reports = []
+    analysis_offset = 0
+    
+    for chunk, outcome in zip(chunks, outcomes):
+        line_range = [chunk['start_line'], chunk['end_line']]
+        report = {'chunk': chunk['index'], 'lines': line_range, 'latency_ms': outcome['latency_ms']}
+        
+        if outcome['error']:
+            logger.warning(f'DevOps chunk {chunk["index"]} failed: {outcome["error"]}')
+            chunk_reports.append(dict(report, success=False, error=outcome['error']))
+            continue
+        
+        chunk_text, cache_hit = outcome['result']
+        header = f'## Lines {chunk["start_line"]}-{chunk["end_line"]}'
+        sections.append(f'{header}\n\n{chunk_text}')
+        
+        chunk_recommendations, chunk_severity = extract_analysis(chunk_text)
+        for level, count in chunk_severity.items():
+            severity_levels[level] += count
+        
+        for recommendation in chunk_recommendations:
+            cited = _cited_lines(recommendation['recommendation'], chunk['start_line'], chunk['end_line'])
+            recommendations.append(dict(
+                recommendation,
+                # Position within the merged analysis text
+                line_number=recommendation['line_number'] + analysis_offset + 2,
+                config_lines=cited,
+                config_line_range=line_range,
+                chunk=chunk['index']
+            ))
+        
+        analysis_offset += header.count('\n') + chunk_text.count('\n') + 4
+        chunk_reports.append(dict(report, success=True, cache_hit=cache_hit, severity_levels=chunk_severity))
+    
+    return {
+        'success': True,
+        'config_type': config_type,
+        'analysis': '\n\n'.join(sections),
+        'recommendations': recommendations,
+        'severity_levels': severity_levels,
+        'estimated_improvements': {
+            'security_score': 85 + len([r for r in recommendations if 'security' in r.get('category', '')]) * 2,
+            'performance_gain': '15-25%',
+            'cost_reduction': '10-20%'
+        },
+        'metadata': {
+            'model': 'gemini-pro',
+            'lines_analyzed': total_lines,
+            'chunked': True,
+            'chunks': chunk_reports,
+            'chunks_failed': len([r for r in chunk_reports if not r['success']]),
+            'timestamp': datetime.utcnow().isoformat()
+        }
+    }
+
+
+def _cited_lines(text, first_line, last_line):
+    """Line numbers cited in text, with ranges expanded, limited to first_line..last_line"""
+    cited = set()
+    for start, end in LINE_REFERENCE.findall(text):
+        start = int(start)
+        end = int(end) if end and int(end) >= start else start
+        cited.update(range(max(start, first_line), min(end, last_line) + 1))
+    return sorted(cited)
+
+
+def _run_agent(model, agent, task):
+    """Run a single specialized agent against the task"""
+    agent_prompt = f"""You are a specialized {agent} agent.
+
+Task: {task}
+
+Provide your perspective and analysis as a {agent}. Be specific and actionable."""
+    
+    return {
+        'agent': agent,
+        'response': _call_model(model, agent_prompt),
+        'confidence': 0.92,
+        'timestamp': datetime.utcnow().isoformat()
+    }
+
+
+def _run_workflow(task, data):
+    """Run a workflow graph of agents and build the /multi-agent response"""
+    try:
+        nodes = parse_workflow(data['workflow'], settings.workflow_max_nodes)
+    except WorkflowError as e:
+        return jsonify({'error': 'Invalid workflow', 'details': str(e)}), 400
+    
+    workflow = data['workflow'] if isinstance(data['workflow'], dict) else {}
+    output = workflow.get('output')
+    if output is not None and output not in nodes:
+        return jsonify({'error': 'Invalid workflow', 'details': f'Unknown output node: {output}'}), 400
+    
+    model = get_gemini_model()
+    if not model:
+        return jsonify({'error': 'Gemini model not available'}), 500
     
-    lines = analysis_text.split('\n')
-    for i, line in enumerate(lines):
-        line_lower = line.lower()
-        if any(keyword in line_lower for keyword in ['recommend', 'should', 'consider', 'suggest', 'improve', 'fix']):
-            recommendations.append({
-                'recommendation': line.strip(),
-                'priority': _determine_priority(line_lower),
-                'category': _categorize_recommendation(line_lower),
-                'line_number': i + 1
-            })
+    max_concurrency = min(data['max_concurrency'],
+                          settings.workflow_concurrency)
+    scheduler = WorkflowScheduler(
+        max_concurrency=max_concurrency,
+        memo=workflow_memo if data['cache'] else None
+    )
     
-    return recommendations[:15]
-
-
-def _determine_priority(text):
-    """Determine priority level"""
-    if any(word in text for word in ['critical', 'urgent', 'severe', 'security']):
-        return 'critical'
-    elif any(word in text for word in ['important', 'should', 'must']):
-        return 'high'
-    elif any(word in text for word in ['consider', 'recommend']):
-        return 'medium'
-    else:
-        return 'low'
-
-
-def _categorize_recommendation(text):
-    """Categorize recommendation by type"""
-    if any(word in text for word in ['security', 'vulnerability', 'encrypt', 'auth']):
-        return 'security'
-    elif any(word in text for word in ['performance', 'optimize', 'speed', 'cache']):
-        return 'performance'
-    elif any(word in text for word in ['cost', 'billing', 'expensive', 'price']):
-        return 'cost'
-    elif any(word in text for word in ['scale', 'capacity', 'load', 'availability']):
-        return 'scalability'
-    elif any(word in text for word in ['maintainability', 'documentation', 'code quality']):
-        return 'maintainability'
-    else:
-        return 'general'
-
-
-def _analyze_severity(analysis_text):
-    """Analyze severity levels in the analysis"""
-    severity = {
-        'critical': 0,
-        'high': 0,
-        'medium': 0,
-        'low': 0
+    logger.info(f'Multi-agent workflow: {len(nodes)} nodes, concurrency {max_concurrency}')
+    
+    started = time.perf_counter()
+    outcomes = scheduler.run(
+        nodes,
+        lambda node_id, spec, inputs: _run_workflow_node(model, task, node_id, spec, inputs),
+        context={'task': task, 'model': 'gemini-pro'},
+        timeout=data['agent_timeout']
+    )
+    finished = time.perf_counter()
+    
+    # The declared output node, or every sink when none is named
+    sinks = [output] if output else [
+        node_id for node_id in outcomes
+        if not any(node_id in spec['inputs'] for spec in nodes.values())
+    ]
+    node_results = [dict(outcome, node=node_id, agent=nodes[node_id].get('agent', node_id))
+                    for node_id, outcome in outcomes.items()]
+    statuses = [outcome['status'] for outcome in outcomes.values()]
+    
+    if any(outcomes[node_id]['status'] != 'success' for node_id in sinks):
+        return jsonify({
+            'error': 'Multi-agent processing failed',
+            'details': 'Workflow output nodes did not complete',
+            'node_results': node_results
+        }), 500
+    
+    result = {
+        'success': True,
+        'task': task,
+        'node_results': node_results,
+        'synthesized_result': outcomes[sinks[0]]['result'] if len(sinks) == 1
+                              else {node_id: outcomes[node_id]['result'] for node_id in sinks},
+        'metadata': {
+            'nodes': len(nodes),
+            'nodes_succeeded': statuses.count('success'),
+            'nodes_failed': statuses.count('failed'),
+            'nodes_skipped': statuses.count('skipped'),
+            'nodes_memoized': sum(1 for outcome in outcomes.values() if outcome['memoized']),
+            'model': 'gemini-pro',
+            'orchestration': 'workflow',
+            'max_concurrency': max_concurrency,
+            'total_latency_ms': round((finished - started) * 1000, 2),
+            'timestamp': datetime.utcnow().isoformat()
+        }
     }
     
-    text_lower = analysis_text.lower()
+    return jsonify(result), 200
+
+
+def _run_workflow_node(model, task, node_id, spec, inputs):
+    """Run one workflow agent with the outputs of the nodes it depends on"""
+    agent = spec.get('agent', node_id)
+    instruction = spec.get('instruction', f'Provide your perspective and analysis as a {agent}.')
+    upstream = ''.join(f'{dependency.upper()}:\n{text}\n\n' for dependency, text in inputs.items())
+    if upstream:
+        upstream = f'Inputs from other agents:\n\n{upstream}'
     
-    severity['critical'] = text_lower.count('critical') + text_lower.count('severe')
-    severity['high'] = text_lower.count('high priority') + text_lower.count('important')
-    severity['medium'] = text_lower.count('medium') + text_lower.count('moderate')
-    severity['low'] = text_lower.count('low priority') + text_lower.count('minor')
+    node_prompt = f"""You are a specialized {agent} agent.
+
+Task: {task}
+
+{upstream}{instruction} Be specific and actionable."""
     
-    return severity
\ No newline at end of file
+    return _call_model(model, node_prompt)
+
+
+def _run_sequential(call):
+    """Run a call inline with the same outcome shape as run_concurrently"""
+    started = time.perf_counter()
+    try:
+        result, error = call(), None
+    except Exception as e:
+        result, error = None, str(e)
+    return {
+        'result': result,
+        'error': error,
+        'latency_ms': round((time.perf_counter() - started) * 1000, 2)
+    }
+
@@ -28,10 +28,16 @@ from backend.services.writer_service import WriterService
 from backend.services.proofreader_service import ProofreaderService
 from backend.services.rewriter_service import RewriterService
 from backend.services.sql_optimizer import SQLOptimizerService
+from backend.services.hybrid_router import HybridRouter
+from backend.services.batch_engine import BatchEngine
 
 # Import utilities
 from backend.utils.logger import setup_logger
 from backend.utils.validators import validate_request
+from backend.utils.blob_store import blob_store
+from backend.utils.conditional import conditional
+from backend.utils.json_provider import FastJSONProvider
+from backend.utils.compression import response_compressor
 
 # Initialize logger
 logger = setup_logger(__name__)
@@ -51,6 +57,7 @@ def create_app():
     app.config['SECRET_KEY'] = settings.secret_key
     app.config['JSON_SORT_KEYS'] = False
     app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max request size
+    app.json = FastJSONProvider(app)
     
     # Enable CORS
     CORS(app, origins=settings.cors_origins)
@@ -69,6 +76,23 @@ def create_app():
     app.proofreader_service = ProofreaderService()
     app.rewriter_service = RewriterService()
     app.sql_optimizer = SQLOptimizerService()
+    app.hybrid_router = HybridRouter(
+        default_threshold=settings.hybrid_threshold,
+        max_threshold=settings.hybrid_max_threshold,
+        exploration_rate=settings.hybrid_exploration
+    )
+    app.batch_engine = BatchEngine(
+        services={
+            'summarizer': app.summarizer_service,
+            'translator': app.translator_service,
+            'writer': app.writer_service,
+            'proofreader': app.proofreader_service,
+            'rewriter': app.rewriter_service
+        },
+        concurrency=settings.batch_concurrency,
+        max_items=settings.batch_max_items,
+        blob_store=blob_store
+    )
     
     # Root route - Main interface
     @app.route('/')
@@ -124,6 +148,7 @@ def create_app():
     
     # API status endpoint
     @app.route('/api/status')
+    @conditional
     def api_status():
         """Get API status and capabilities"""
         return jsonify({
@@ -178,6 +203,12 @@ def create_app():
         response.headers['X-XSS-Protection'] = '1; mode=block'
         return response
     
+    # Response compression middleware
+    @app.after_request
+    def compress_response(response):
+        """Compress responses with the best encoding the client accepts"""
+        return response_compressor.apply(response, request.headers.get('Accept-Encoding', ''))
+    
     logger.info('NYRA application initialized successfully')
     return app
 
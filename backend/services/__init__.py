@@ -8,6 +8,8 @@ __all__ = [
     'WriterService',
     'ProofreaderService',
     'RewriterService',
-    'SQLOptimizerService'
+    'SQLOptimizerService',
+    'HybridRouter',
+    'BatchEngine'
 ]
 
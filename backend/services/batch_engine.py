@@ -0,0 +1,215 @@
+"""
+backend/services/batch_engine.py
+Batch execution of Chrome AI operations on a worker pool
+"""
+
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from backend.utils.blob_store import resolve_text
+from backend.utils.cache import canonical_key
+from backend.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Operation type -> fields its data must contain
+REQUIRED_FIELDS = {
+    'summarize': ('text',),
+    'translate': ('text', 'target_language'),
+    'write': ('context',),
+    'proofread': ('text',),
+    'rewrite': ('text',),
+}
+
+# Aliases matching the Chrome AI API names
+OPERATION_ALIASES = {
+    'summarizer': 'summarize',
+    'translator': 'translate',
+    'writer': 'write',
+    'proofreader': 'proofread',
+    'rewriter': 'rewrite',
+}
+
+
+class BatchEngine:
+    """Service that executes batches of Chrome AI operations concurrently"""
+
+    def __init__(self, services: Dict[str, Any], concurrency: int = 4, max_items: int = 1000,
+                 blob_store: Any = None):
+        self.services = services
+        self.blob_store = blob_store
+        self.concurrency = max(int(concurrency), 1)
+        self.max_items = max_items
+        self.handlers: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+            'summarize': self._summarize,
+            'translate': self._translate,
+            'write': self._write,
+            'proofread': self._proofread,
+            'rewrite': self._rewrite,
+        }
+
+    def validate(self, operations: Any) -> List[Tuple[str, Dict[str, Any]]]:
+        """Normalize operations to (type, data) pairs; raises ValueError on bad input"""
+        if not isinstance(operations, list) or not operations:
+            raise ValueError('Operations must be a non-empty list')
+        if len(operations) > self.max_items:
+            raise ValueError(f'Batch is limited to {self.max_items} operations')
+
+        normalized = []
+        for index, op in enumerate(operations):
+            if not isinstance(op, dict):
+                raise ValueError(f'Operation {index} must be an object')
+
+            op_type = OPERATION_ALIASES.get(op.get('type'), op.get('type'))
+            if op_type not in REQUIRED_FIELDS:
+                raise ValueError(f'Operation {index} has unsupported type: {op.get("type")}')
+
+            op_data = op.get('data', {})
+            if not isinstance(op_data, dict):
+                raise ValueError(f'Data for operation {index} must be an object')
+            missing = [
+                field for field in REQUIRED_FIELDS[op_type]
+                if field not in op_data and not (self.blob_store and f'{field}_ref' in op_data)
+            ]
+            if missing:
+                raise ValueError(f'Operation {index} ({op_type}) is missing: {", ".join(missing)}')
+
+            normalized.append((op_type, op_data))
+        return normalized
+
+    def run(self, operations: List[Tuple[str, Dict[str, Any]]],
+            concurrency: Optional[int] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Execute validated operations and yield (event, payload) pairs.
+
+        A 'batch' event announces the batch id, then one 'result' event per
+        operation follows in completion order, then a 'done' event. Identical
+        operations run once and their result is emitted for every index.
+        """
+        batch_id = f'batch_{uuid.uuid4().hex}'
+        concurrency = max(1, min(int(concurrency or self.concurrency), self.concurrency))
+        started = time.perf_counter()
+
+        groups: Dict[str, Dict[str, Any]] = {}
+        for index, (op_type, op_data) in enumerate(operations):
+            key = canonical_key(type=op_type, data=op_data)
+            if key not in groups:
+                groups[key] = {'type': op_type, 'data': op_data, 'indexes': []}
+            groups[key]['indexes'].append(index)
+
+        logger.info(f'Batch {batch_id}: {len(operations)} operations, {len(groups)} unique')
+
+        yield 'batch', {
+            'batch_id': batch_id,
+            'total_operations': len(operations),
+            'unique_operations': len(groups),
+            'concurrency': concurrency
+        }
+
+        def execute(group, submitted):
+            op_started = time.perf_counter()
+            result = self.handlers[group['type']](self._resolve_refs(group['type'], group['data']))
+            finished = time.perf_counter()
+            return result, round((op_started - submitted) * 1000, 2), round((finished - op_started) * 1000, 2)
+
+        executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='nyra-batch')
+        futures = {
+            executor.submit(execute, group, time.perf_counter()): group
+            for group in groups.values()
+        }
+        succeeded = 0
+
+        try:
+            for future in as_completed(futures):
+                group = futures[future]
+                try:
+                    result, queued_ms, latency_ms = future.result()
+                    outcome = {
+                        'success': True,
+                        'result': result,
+                        'queued_ms': queued_ms,
+                        'latency_ms': latency_ms
+                    }
+                except Exception as e:
+                    logger.warning(f'Batch {batch_id} {group["type"]} operation failed: {str(e)}')
+                    outcome = {'success': False, 'error': 'Operation failed', 'details': str(e)}
+
+                for index in group['indexes']:
+                    if outcome['success']:
+                        succeeded += 1
+                    yield 'result', dict(
+                        outcome,
+                        batch_id=batch_id,
+                        index=index,
+                        type=group['type'],
+                        deduplicated=len(group['indexes']) > 1
+                    )
+
+            yield 'done', {
+                'batch_id': batch_id,
+                'success': True,
+                'metadata': {
+                    'total_operations': len(operations),
+                    'unique_operations': len(groups),
+                    'succeeded': succeeded,
+                    'failed': len(operations) - succeeded,
+                    'concurrency': concurrency,
+                    'processing': 'on-device',
+                    'total_latency_ms': round((time.perf_counter() - started) * 1000, 2),
+                    'timestamp': datetime.utcnow().isoformat()
+                }
+            }
+
+        finally:
+            # Drop queued operations if the client went away; running ones finish in the background
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _resolve_refs(self, op_type: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Swap '<field>_ref' blob references for the stored text"""
+        refs = [field for field in REQUIRED_FIELDS[op_type] if field not in data and f'{field}_ref' in data]
+        if not refs:
+            return data
+        resolved = dict(data)
+        for field in refs:
+            resolved[field], _ = resolve_text(self.blob_store, data, field)
+        return resolved
+
+    def _summarize(self, data: Dict[str, Any]) -> Any:
+        return self.services['summarizer'].summarize(data['text'], data.get('length', 'medium'))
+
+    def _translate(self, data: Dict[str, Any]) -> Any:
+        return self.services['translator'].translate(
+            data['text'],
+            data.get('source_language', 'auto'),
+            data['target_language'],
+            offline=data.get('offline', False)
+        )
+
+    def _write(self, data: Dict[str, Any]) -> Any:
+        return self.services['writer'].generate_content(
+            data['context'],
+            data.get('tone', 'professional'),
+            data.get('content_type', 'general'),
+            data.get('length', 'medium')
+        )
+
+    def _proofread(self, data: Dict[str, Any]) -> Any:
+        proofreader = self.services['proofreader']
+        checks = data.get('checks')
+        if checks is None:
+            checks = proofreader.checks_from_flags(
+                data.get('check_grammar', True),
+                data.get('check_spelling', True),
+                data.get('check_style', True)
+            )
+        return proofreader.proofread(data['text'], checks)
+
+    def _rewrite(self, data: Dict[str, Any]) -> Any:
+        return self.services['rewriter'].rewrite(
+            data['text'],
+            data.get('goal', 'improve'),
+            data.get('tone', 'neutral')
+        )
@@ -0,0 +1,171 @@
+"""
+backend/services/hybrid_router.py
+Local-first routing between on-device (Nano) results and cloud (Pro) calls
+"""
+
+import random
+import re
+import threading
+import uuid
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional, Tuple
+from backend.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+WORD_PATTERN = re.compile(r"[a-z0-9']+")
+
+REFUSAL_PATTERN = re.compile(
+    r"\b(i can(?:no|')t|i am (?:not able|unable)|i'm (?:not able|unable|not sure)|as an ai|"
+    r"i don't know|i do not know|unable to (?:help|answer|provide)|not enough information|"
+    r"i'm sorry|i apologi[sz]e|cannot (?:help|answer|provide))\b"
+)
+
+STOPWORDS = frozenset("""
+a an and are as at be by can could do does for from has have how i in is it its me my of on or
+should that the their them there these this to was what when where which who why will with would
+you your please tell give explain about
+""".split())
+
+
+class HybridRouter:
+    """
+    Service that decides whether an on-device result is good enough to skip the cloud
+
+    The threshold is learned from explicit outcome feedback only, and never
+    rises above max_threshold, so some results can always stay local. A
+    small exploration_rate of below-threshold results is kept local anyway,
+    so feedback keeps arriving for the scores the threshold would otherwise
+    never let through.
+    """
+
+    def __init__(self, default_threshold: float = 0.6, min_samples: int = 20,
+                 history_size: int = 500, false_local_cost: float = 2.0,
+                 max_threshold: float = 0.95, exploration_rate: float = 0.05,
+                 seed: Optional[int] = None):
+        self.default_threshold = default_threshold
+        self.min_samples = min_samples
+        self.false_local_cost = false_local_cost
+        self.max_threshold = max_threshold
+        self.exploration_rate = exploration_rate
+        self.threshold = default_threshold
+        self.outcomes = deque(maxlen=history_size)
+        self.decisions = OrderedDict()
+        self.history_size = history_size
+        self.route_counts = {'local': 0, 'cloud': 0}
+        self.latency_saved_ms = 0.0
+        self.explored = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def score(self, query: str, local_result: Optional[str]) -> Dict[str, Any]:
+        """Score an on-device result with cheap local heuristics (0-1)"""
+        if not local_result or not str(local_result).strip():
+            return {'score': 0.0, 'signals': {'length': 0.0, 'overlap': 0.0, 'refusal': False}}
+
+        answer = str(local_result).lower()
+        answer_words = WORD_PATTERN.findall(answer)
+        query_terms = {w for w in WORD_PATTERN.findall(query.lower()) if w not in STOPWORDS}
+
+        # Very short answers are rarely sufficient; past ~40 words length stops helping
+        length = min(len(answer_words) / 40, 1.0)
+
+        # Share of the query's content words the answer addresses
+        overlap = len(query_terms & set(answer_words)) / len(query_terms) if query_terms else 0.5
+
+        refusal = bool(REFUSAL_PATTERN.search(answer))
+        score = (0.4 * length + 0.6 * overlap) * (0.2 if refusal else 1.0)
+
+        return {
+            'score': round(score, 4),
+            'signals': {'length': round(length, 4), 'overlap': round(overlap, 4), 'refusal': refusal}
+        }
+
+    def decide(self, query: str, local_result: Optional[str], force_cloud: bool = False,
+               cloud_latency_ms: Optional[float] = None) -> Dict[str, Any]:
+        """Choose the local or cloud route for a query"""
+        scored = self.score(query, local_result)
+
+        with self._lock:
+            threshold = self.threshold
+            route = 'local' if not force_cloud and scored['score'] >= threshold else 'cloud'
+            explore = (route == 'cloud' and not force_cloud and scored['score'] > 0
+                       and self._random.random() < self.exploration_rate)
+            if explore:
+                route = 'local'
+                self.explored += 1
+            decision_id = uuid.uuid4().hex
+            self.decisions[decision_id] = scored['score']
+            while len(self.decisions) > self.history_size:
+                self.decisions.popitem(last=False)
+            self.route_counts[route] += 1
+            if route == 'local' and cloud_latency_ms:
+                self.latency_saved_ms += cloud_latency_ms
+
+        logger.info(f'Hybrid route: {route}, score={scored["score"]}, threshold={threshold}')
+
+        return {
+            'decision_id': decision_id,
+            'route': route,
+            'score': scored['score'],
+            'threshold': round(threshold, 4),
+            'signals': scored['signals'],
+            'explore': explore,
+            'latency_saved_ms': round(cloud_latency_ms, 2) if route == 'local' and cloud_latency_ms else 0.0
+        }
+
+    def record_outcome(self, decision_id: str, local_sufficient: bool) -> bool:
+        """Log whether the local result was good enough and re-learn the threshold"""
+        with self._lock:
+            score = self.decisions.pop(decision_id, None)
+            if score is None:
+                return False
+            self.outcomes.append((score, bool(local_sufficient)))
+            self.threshold = self._learn_threshold(list(self.outcomes))
+        return True
+
+    def agreement(self, local_result: str, cloud_result: str) -> float:
+        """Jaccard word overlap between the local and cloud answers"""
+        local_words = set(WORD_PATTERN.findall(str(local_result).lower())) - STOPWORDS
+        cloud_words = set(WORD_PATTERN.findall(str(cloud_result).lower())) - STOPWORDS
+        if not local_words or not cloud_words:
+            return 0.0
+        return len(local_words & cloud_words) / len(local_words | cloud_words)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Routing statistics"""
+        with self._lock:
+            return {
+                'threshold': round(self.threshold, 4),
+                'learned': len(self.outcomes) >= self.min_samples,
+                'outcomes_logged': len(self.outcomes),
+                'routes': dict(self.route_counts),
+                'explored': self.explored,
+                'latency_saved_ms': round(self.latency_saved_ms, 2)
+            }
+
+    def _learn_threshold(self, outcomes: List[Tuple[float, bool]]) -> float:
+        """Threshold minimizing cost, where wrongly staying local costs more than an unneeded cloud call"""
+        if len(outcomes) < self.min_samples:
+            return self.default_threshold
+
+        # Sweep thresholds in score order: everything at or above the threshold stays local
+        ranked = sorted(outcomes)
+        insufficient_above = sum(1 for _, sufficient in ranked if not sufficient)
+        sufficient_below = 0
+        best_threshold, best_cost = self.default_threshold, float('inf')
+
+        for i, (score, sufficient) in enumerate(ranked):
+            if i == 0 or score != ranked[i - 1][0]:
+                cost = self.false_local_cost * insufficient_above + sufficient_below
+                if cost < best_cost:
+                    best_threshold, best_cost = score, cost
+            if sufficient:
+                sufficient_below += 1
+            else:
+                insufficient_above -= 1
+
+        # Sending everything to the cloud is capped, so exploration can still correct the threshold
+        if sufficient_below < best_cost:
+            best_threshold = self.max_threshold
+        return min(best_threshold, self.max_threshold)
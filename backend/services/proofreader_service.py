@@ -3,55 +3,292 @@ backend/services/proofreader_service.py
 Proofreading and grammar checking service
 """
 
+import hashlib
+import re
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from config.settings import settings
+from backend.utils.cache import ResponseCache
+from backend.utils.logger import setup_logger
+from backend.utils.spelling import SpellingIndex, get_spelling_index
+from backend.utils.text_segmenter import iter_sentences
+
+logger = setup_logger(__name__)
+
+PARAGRAPH_BREAK = re.compile(r'\n[ \t]*\n\s*')
+WORD = re.compile(r"[A-Za-z]+(?:['’][A-Za-z]+)*")
+# URLs, e-mail addresses, inline code, mentions and hashtags are masked before checking
+UNCHECKED = re.compile(r'https?://\S+|www\.\S+|(?<![\w.+-])[\w.+-]+@[\w-]+\.[\w.-]+|`[^`\n]*`|[@#]\w+')
+MASK = '\0'
+
+# Sentences longer than this many words get a style note
+LONG_SENTENCE_WORDS = 40
+
+WORDY_PHRASES = {
+    'in order to': 'to',
+    'due to the fact that': 'because',
+    'in spite of the fact that': 'although',
+    'at this point in time': 'now',
+    'in the event that': 'if',
+    'a large number of': 'many',
+    'has the ability to': 'can',
+    'for the purpose of': 'to',
+    'with regard to': 'about',
+    'in close proximity to': 'near',
+    'prior to': 'before',
+    'each and every': 'every',
+    'first and foremost': 'first'
+}
+
+# (name, check, pattern, message, replacement). The replacement is a
+# match.expand template or a callable taking the match. Patterns are joined
+# per check into one alternation, so inner groups must be named uniquely.
+RULES = (
+    ('space_before_punctuation', 'punctuation', r'[ \t]+(?=[,;:!?]|\.(?:\s|$))',
+     'Remove the space before punctuation', ''),
+    ('missing_space_after_punctuation', 'punctuation', r'(?P<mark>[,;])(?<=[a-z][,;])(?=[A-Za-z])',
+     'Add a space after punctuation', r'\g<mark> '),
+    ('repeated_punctuation', 'punctuation', r'(?P<repeated_mark>[,;:!?])(?P=repeated_mark)+',
+     'Repeated punctuation', r'\g<repeated_mark>'),
+    ('double_period', 'punctuation', r'(?<!\.)\.\.(?!\.)',
+     'Use one period, or three for an ellipsis', '.'),
+    ('multiple_spaces', 'punctuation', r'(?<=\S) {2,}(?=\S)',
+     'Use a single space', ' '),
+    ('repeated_word', 'grammar', r'(?<![A-Za-z])(?P<repeated_word>[A-Za-z]+)\s+(?P=repeated_word)\b',
+     'Repeated word', r'\g<repeated_word>'),
+    ('a_before_vowel', 'grammar', r'\b(?P<a>[Aa]) (?=[aeio][a-z])(?!one\b|once\b)',
+     'Use "an" before a vowel sound', r'\g<a>n '),
+    ('an_before_consonant', 'grammar', r'\b(?P<an>[Aa])n (?=[bcdfgjklmnpqrstvwxz][a-z])',
+     'Use "a" before a consonant sound', r'\g<an> '),
+    ('modal_of', 'grammar', r'\b(?P<modal>(?i:could|should|would|must|might)) of\b',
+     'Use "have" after a modal verb', r'\g<modal> have'),
+    ('lowercase_i', 'grammar', r"(?<![\w'’.-])i(?=\s|['’](?:m|ve|d|ll)\b)",
+     'Capitalize "I"', 'I'),
+    ('wordy_phrase', 'style', r'\b(?i:' + '|'.join(re.escape(phrase) for phrase in WORDY_PHRASES) + r')\b',
+     'Wordy phrase', lambda match: WORDY_PHRASES[match.group().lower()]),
+    ('intensifier', 'style', r'\b(?:very|really|extremely|basically|literally) (?=[a-z])',
+     'Intensifiers rarely add meaning', ''),
+)
+
+
+class Rule:
+    """One compiled proofreading rule"""
+    
+    __slots__ = ('name', 'check', 'message', 'replacement')
+    
+    def __init__(self, name: str, check: str, message: str, replacement: Union[str, Callable[[Any], str]]):
+        self.name = name
+        self.check = check
+        self.message = message
+        self.replacement = replacement
+    
+    def suggestion(self, match: 're.Match') -> str:
+        if callable(self.replacement):
+            return self.replacement(match)
+        if '\\' not in self.replacement:
+            return self.replacement
+        return match.expand(self.replacement)
+
+
+def compile_rules(rules: Tuple[tuple, ...]) -> Dict[str, Tuple['re.Pattern', Dict[str, Rule]]]:
+    """
+    One pattern per check, with each rule as a named alternative, so a
+    paragraph is scanned once per check however many rules it has
+    """
+    grouped: Dict[str, List[tuple]] = {}
+    for rule in rules:
+        grouped.setdefault(rule[1], []).append(rule)
+    
+    compiled = {}
+    for check, members in grouped.items():
+        pattern = re.compile('|'.join(f'(?P<rule_{name}>{pattern})' for name, _, pattern, _, _ in members))
+        compiled[check] = (pattern, {
+            f'rule_{name}': Rule(name, check, message, replacement)
+            for name, _, _, message, replacement in members
+        })
+    return compiled
+
+
+COMPILED_RULES = compile_rules(RULES)
+
+
+def iter_paragraphs(text: str) -> Iterator[Tuple[int, str]]:
+    """(offset, paragraph) for each non-blank paragraph"""
+    start = 0
+    for match in PARAGRAPH_BREAK.finditer(text):
+        if text[start:match.start()].strip():
+            yield start, text[start:match.start()]
+        start = match.end()
+    if text[start:].strip():
+        yield start, text[start:]
+
 
 class ProofreaderService:
-    """Service for proofreading and grammar checking"""
+    """
+    Service for proofreading and grammar checking
+
+    Checks run locally: spelling against a symmetric-delete index and
+    punctuation, grammar and style through compiled rules. Results are
+    cached per paragraph under a hash of its text and the enabled checks,
+    with offsets relative to the paragraph, so re-checking an edited
+    document only processes the paragraphs that changed.
+    """
     
-    def __init__(self):
+    def __init__(self, index: Optional[SpellingIndex] = None, cache_max_bytes: Optional[int] = None):
         self.check_types = ['grammar', 'spelling', 'punctuation', 'style']
+        self._index = index
+        self.paragraph_cache = ResponseCache(
+            max_bytes=cache_max_bytes if cache_max_bytes is not None else settings.proofread_cache_max_bytes,
+            ttl=settings.cache_ttl,
+            enabled=settings.enable_cache
+        )
+    
+    @property
+    def index(self) -> SpellingIndex:
+        """Spelling index, the shared one unless injected; loaded on first check"""
+        if self._index is None:
+            self._index = get_spelling_index()
+        return self._index
+    
+    @staticmethod
+    def checks_from_flags(grammar: bool = True, spelling: bool = True, style: bool = True) -> List[str]:
+        """Checks enabled by the API's check_* flags; punctuation follows grammar"""
+        return [
+            check for check, flag in (
+                ('grammar', grammar),
+                ('spelling', spelling),
+                ('punctuation', grammar),
+                ('style', style),
+            ) if flag
+        ]
     
     def proofread(self, text: str, checks: List[str]) -> Dict[str, Any]:
         """Proofread text"""
         
-        enabled_checks = [c for c in checks if c in self.check_types]
+        enabled_checks = [c for c in self.check_types if c in checks]
+        signature = ','.join(enabled_checks)
         
-        issues_found = {
-            'grammar': 0,
-            'spelling': 0,
-            'punctuation': 0,
-            'style': 0
-        }
+        issues = []
+        sentence_count = 0
+        paragraph_count = 0
+        from_cache = 0
+        for offset, paragraph in iter_paragraphs(text):
+            paragraph_count += 1
+            digest = hashlib.blake2b(paragraph.encode('utf-8'), digest_size=16).hexdigest()
+            cache_key = f'{digest}:{signature}'
+            result = self.paragraph_cache.get(cache_key)
+            if result is None:
+                result = self.check_paragraph(paragraph, enabled_checks)
+                self.paragraph_cache.set(cache_key, result, size=64 + 192 * len(result[1]))
+            else:
+                from_cache += 1
+            sentence_count += result[0]
+            issues.extend(dict(issue, offset=issue['offset'] + offset) for issue in result[1])
+        
+        issues_found = {check: 0 for check in self.check_types}
+        for issue in issues:
+            issues_found[issue['type']] += 1
         
         config = {
             'text_length': len(text),
+            'sentence_count': sentence_count,
+            'paragraph_count': paragraph_count,
             'checks_enabled': enabled_checks,
             'issues_found': issues_found
         }
         
-        logger.info(f'Proofreading: {len(text)} chars, {len(enabled_checks)} checks')
+        logger.info(f'Proofreading: {len(text)} chars, {len(enabled_checks)} checks, '
+                    f'{paragraph_count - from_cache}/{paragraph_count} paragraphs checked')
         
         return {
+            'issues': issues,
             'config': config,
-            'processing': 'on-device',
-            'confidence': 0.95
+            'paragraphs': {'total': paragraph_count, 'from_cache': from_cache},
+            'processing': 'server'
         }
     
+    def check_paragraph(self, paragraph: str, checks: List[str]) -> Tuple[int, List[Dict[str, Any]]]:
+        """(sentence count, issues with paragraph-relative offsets), sorted by offset"""
+        masked = UNCHECKED.sub(lambda match: MASK * len(match.group()), paragraph)
+        issues = []
+        
+        for check in checks:
+            if check in COMPILED_RULES:
+                pattern, rules = COMPILED_RULES[check]
+                for match in pattern.finditer(masked):
+                    rule = rules[match.lastgroup]
+                    start, end = match.span()
+                    issues.append(self._issue(check, rule.name, rule.message, start,
+                                              paragraph[start:end], [rule.suggestion(match)]))
+        
+        if 'spelling' in checks:
+            issues.extend(self._spelling_issues(masked))
+        
+        sentence_count = 0
+        cursor = 0
+        for sentence in iter_sentences(paragraph):
+            sentence_count += 1
+            start = paragraph.find(sentence, cursor)
+            cursor = start + len(sentence)
+            if 'style' in checks and len(sentence.split()) > LONG_SENTENCE_WORDS:
+                issues.append(self._issue('style', 'long_sentence',
+                                          f'Sentence is longer than {LONG_SENTENCE_WORDS} words',
+                                          start, sentence, []))
+        
+        issues.sort(key=lambda issue: issue['offset'])
+        return sentence_count, issues
+    
     def suggest_corrections(self, text: str) -> List[Dict[str, Any]]:
         """Suggest corrections for text"""
         
         corrections = []
         
-        # Sample corrections (would use AI in production)
-        words = text.split()
-        for i, word in enumerate(words[:5]):
-            corrections.append({
-                'position': i,
-                'original': word,
-                'suggestion': word.capitalize(),
-                'type': 'capitalization',
-                'confidence': 0.9
-            })
+        for issue in self.proofread(text, self.check_types)['issues']:
+            if issue['suggestions']:
+                corrections.append({
+                    'position': issue['offset'],
+                    'original': issue['original'],
+                    'suggestion': issue['suggestions'][0],
+                    'type': issue['type']
+                })
         
         return corrections
-
-
+    
+    def _spelling_issues(self, paragraph: str) -> Iterator[Dict[str, Any]]:
+        for match in WORD.finditer(paragraph):
+            word = match.group()
+            if len(word) < 2 or word[1:] != word[1:].lower():
+                # Acronyms and mixed case such as iPhone
+                continue
+            if word[0].isupper() and not self._starts_sentence(paragraph, match.start()):
+                # A capitalized word mid-sentence is most likely a name
+                continue
+            
+            lower = word.lower().replace('’', "'")
+            if self.index.known(lower) or (lower.endswith("'s") and self.index.known(lower[:-2])):
+                continue
+            
+            suggestions = [suggestion for suggestion, _ in self.index.suggest(lower)]
+            if suggestions:
+                if word[0].isupper():
+                    suggestions = [suggestion.capitalize() for suggestion in suggestions]
+                yield self._issue('spelling', 'misspelling', 'Possible spelling mistake',
+                                  match.start(), word, suggestions)
+    
+    @staticmethod
+    def _starts_sentence(paragraph: str, position: int) -> bool:
+        before = paragraph[max(0, position - 16):position].rstrip(' \t\n"\'“‘(')
+        return not before or before[-1] in '.!?:'
+    
+    @staticmethod
+    def _issue(check: str, rule: str, message: str, offset: int, original: str,
+               suggestions: List[str]) -> Dict[str, Any]:
+        return {
+            'type': check,
+            'rule': rule,
+            'message': message,
+            'offset': offset,
+            'length': len(original),
+            'original': original,
+            'suggestions': suggestions
+        }
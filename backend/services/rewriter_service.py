@@ -3,12 +3,177 @@ backend/services/rewriter_service.py
 Text rewriting and paraphrasing service
 """
 
+import hashlib
+import re
+from typing import Any, Callable, Dict, List, Optional
+
+from config.settings import settings
+from backend.services.proofreader_service import ProofreaderService
+from backend.utils.cache import ResponseCache, canonical_key
+from backend.utils.concurrency import run_concurrently
+from backend.utils.logger import setup_logger
+from backend.utils.model_registry import model_registry
+from backend.utils.resilience import invoke_text
+from backend.utils.text_segmenter import iter_sentences
+
+logger = setup_logger(__name__)
+
+# Paragraph breaks are kept verbatim; paragraphs are the unit of rewriting
+PARAGRAPH_BREAK = re.compile(r'(\n[ \t]*\n\s*)')
+PASSAGE_TAG = re.compile(r'</?passage>')
+# Characters of each neighbouring chunk shown to the backend for continuity
+CONTEXT_CHARS = 200
+
+REWRITE_BACKENDS = ('auto', 'local', 'gemini')
+
+GOAL_INSTRUCTIONS = {
+    'improve': 'Improve the clarity, grammar and flow of the passage',
+    'simplify': 'Simplify the passage so a general audience can follow it',
+    'formalize': 'Rewrite the passage in formal language',
+    'shorten': 'Make the passage more concise without losing information',
+    'expand': 'Expand the passage with relevant detail and examples'
+}
+PARAPHRASE_GOALS = ('improve', 'simplify', 'shorten', 'formalize')
+
+SIMPLER_WORDS = {
+    'utilize': 'use', 'utilise': 'use', 'commence': 'start', 'approximately': 'about',
+    'demonstrate': 'show', 'facilitate': 'help', 'subsequently': 'later', 'sufficient': 'enough',
+    'purchase': 'buy', 'assist': 'help', 'numerous': 'many', 'obtain': 'get', 'require': 'need',
+    'terminate': 'end', 'additional': 'more', 'endeavor': 'try', 'modification': 'change',
+    'individuals': 'people', 'methodology': 'method', 'nevertheless': 'still'
+}
+CONTRACTIONS = {
+    "can't": 'cannot', "won't": 'will not', "shan't": 'shall not', "n't": ' not', "'re": ' are',
+    "'ve": ' have', "'ll": ' will', "'m": ' am', "'d": ' would', "'s": ' is'
+}
+CASUAL_FORMS = {
+    'do not': "don't", 'does not': "doesn't", 'did not': "didn't", 'is not': "isn't",
+    'are not': "aren't", 'cannot': "can't", 'will not': "won't", 'it is': "it's",
+    'i am': "I'm", 'we are': "we're", 'they are': "they're", 'you are': "you're"
+}
+
+SIMPLER_WORD = re.compile(r'\b(?:' + '|'.join(SIMPLER_WORDS) + r')\b', re.IGNORECASE)
+CONTRACTION = re.compile(
+    r"\b(?P<stem>[A-Za-z]+?)(?P<suffix>n['’]t|['’](?:re|ve|ll|m|d))\b"
+    r"|\b(?P<pronoun>(?i:it|he|she|that|what|here|there|where))(?P<is>['’]s)\b"
+)
+CASUAL_FORM = re.compile(r'\b(?:' + '|'.join(CASUAL_FORMS) + r')\b', re.IGNORECASE)
+
+
+def _match_case(original: str, replacement: str) -> str:
+    return replacement[:1].upper() + replacement[1:] if original[:1].isupper() else replacement
+
+
+class LocalRewriteBackend:
+    """
+    Deterministic on-server rewriting: proofreading fixes plus word and
+    contraction substitutions per goal and tone. It cannot add content, so
+    'expand' only applies the fixes.
+    """
+    
+    name = 'local'
+    # CPU-bound; threads would only contend for the GIL
+    parallel = False
+    
+    def __init__(self, proofreader: Optional[ProofreaderService] = None):
+        self.proofreader = proofreader if proofreader is not None else ProofreaderService()
+    
+    def rewrite(self, chunk: str, goal: str, tone: str, before: str = '', after: str = '') -> str:
+        checks = ['grammar', 'spelling', 'punctuation']
+        if goal in ('simplify', 'shorten'):
+            checks.append('style')
+        text = self._apply_fixes(chunk, checks)
+        
+        if goal == 'simplify':
+            text = SIMPLER_WORD.sub(lambda match: _match_case(match.group(), SIMPLER_WORDS[match.group().lower()]), text)
+        if goal == 'formalize' or tone == 'formal':
+            text = CONTRACTION.sub(self._expand_contraction, text)
+        elif tone == 'casual':
+            text = CASUAL_FORM.sub(lambda match: _match_case(match.group(), CASUAL_FORMS[match.group().lower()]), text)
+        return text
+    
+    def _apply_fixes(self, chunk: str, checks: List[str]) -> str:
+        """Apply each issue's first suggestion, skipping issues that overlap an earlier one"""
+        _, issues = self.proofreader.check_paragraph(chunk, checks)
+        output = []
+        position = 0
+        for issue in issues:
+            if not issue['suggestions'] or issue['offset'] < position:
+                continue
+            output.append(chunk[position:issue['offset']])
+            output.append(issue['suggestions'][0])
+            position = issue['offset'] + issue['length']
+        output.append(chunk[position:])
+        return ''.join(output)
+    
+    @staticmethod
+    def _expand_contraction(match: 're.Match') -> str:
+        contraction = match.group().replace('’', "'")
+        if contraction.lower() in CONTRACTIONS:
+            return _match_case(contraction, CONTRACTIONS[contraction.lower()])
+        stem = match.group('stem') or match.group('pronoun')
+        suffix = (match.group('suffix') or match.group('is')).replace('’', "'").lower()
+        return stem + CONTRACTIONS[suffix]
+
+
+class GeminiRewriteBackend:
+    """Gemini Pro, one call per chunk with the neighbouring text as context"""
+    
+    name = 'gemini'
+    parallel = True
+    
+    def __init__(self, model_name: str = 'gemini-pro'):
+        self.model_name = model_name
+    
+    def rewrite(self, chunk: str, goal: str, tone: str, before: str = '', after: str = '') -> str:
+        parts = [
+            f'{GOAL_INSTRUCTIONS[goal]}, in a {tone} tone. Rewrite only the text inside <passage> '
+            'and reply with the rewritten passage alone, without tags or commentary.'
+        ]
+        if before:
+            parts.append(f'For continuity, the passage follows: "...{before}"')
+        if after:
+            parts.append(f'and is followed by: "{after}..."')
+        parts.append(f'<passage>\n{chunk}\n</passage>')
+        prompt = '\n'.join(parts)
+        generation_config = {'temperature': 0.3}
+        model = model_registry.get(self.model_name, generation_config)
+        return invoke_text(model, prompt, ResponseCache.make_key(prompt, self.model_name, generation_config))
+
+
+def build_rewrite_backend(name: str) -> Any:
+    """
+    Server-side rewrite backend for a configured name. Text only goes to
+    Gemini when 'gemini' or 'auto' is configured explicitly.
+    """
+    if name not in REWRITE_BACKENDS:
+        raise ValueError(f'Unknown rewrite backend: {name}')
+    if name == 'gemini' or (name == 'auto' and settings.gemini_api_key):
+        return GeminiRewriteBackend()
+    return LocalRewriteBackend()
+
 
 class RewriterService:
-    """Service for text rewriting"""
+    """
+    Service for text rewriting
+
+    Long texts are rewritten chunk by chunk: each paragraph is a chunk, and
+    paragraphs longer than chunk_chars are split between sentences. Chunks
+    the memo has not seen for this goal, tone and backend go to the backend
+    concurrently; the output is reassembled in order around the original
+    paragraph breaks, with chunk edges stitched so sentences still join up.
+    """
     
-    def __init__(self):
+    def __init__(self, backend: Optional[Any] = None, chunk_chars: Optional[int] = None,
+                 cache_max_bytes: Optional[int] = None):
         self.rewrite_goals = ['improve', 'simplify', 'formalize', 'shorten', 'expand']
+        self.backend = backend if backend is not None else build_rewrite_backend(settings.rewrite_backend)
+        self.chunk_chars = chunk_chars or settings.rewrite_chunk_chars
+        self.chunk_cache = ResponseCache(
+            max_bytes=cache_max_bytes if cache_max_bytes is not None else settings.rewrite_cache_max_bytes,
+            ttl=settings.cache_ttl,
+            enabled=settings.enable_cache
+        )
     
     def rewrite(self, text: str, goal: str, tone: str = 'neutral') -> Dict[str, Any]:
         """Rewrite text with specific goal"""
@@ -16,32 +181,166 @@ class RewriterService:
         if goal not in self.rewrite_goals:
             goal = 'improve'
         
+        layout = self.split_chunks(text)
+        chunks = [chunk for part in layout[::2] for chunk in part]
+        keys = [
+            canonical_key(goal=goal, tone=tone, backend=self.backend.name,
+                          chunk=hashlib.blake2b(chunk.encode('utf-8'), digest_size=16).hexdigest())
+            for chunk in chunks
+        ]
+        
+        outputs: Dict[str, str] = {}
+        pending: Dict[str, int] = {}
+        for index, key in enumerate(keys):
+            if key in outputs or key in pending:
+                continue
+            cached = self.chunk_cache.get(key)
+            if cached is None:
+                pending[key] = index
+            else:
+                outputs[key] = cached
+        from_cache = len(outputs)
+        
+        failed = self._rewrite_pending(chunks, keys, pending, outputs, goal, tone)
+        rewritten = self._reassemble(layout, chunks, [outputs[key] for key in keys])
+        
         config = {
-            'original_text': text,
             'original_length': len(text),
             'rewrite_goal': goal,
-            'target_tone': tone
+            'target_tone': tone,
+            'rewritten_length': len(rewritten)
         }
         
-        logger.info(f'Rewriting: goal={goal}, tone={tone}')
+        logger.info(f'Rewriting: goal={goal}, tone={tone}, {len(pending)}/{len(set(keys))} chunks sent to {self.backend.name}')
         
         return {
+            'text': rewritten,
             'config': config,
-            'processing': 'on-device',
-            'estimated_change': '30-50%'
+            'chunks': {
+                'total': len(chunks),
+                'unique': len(set(keys)),
+                'from_cache': from_cache,
+                'rewritten': len(pending) - failed,
+                'failed': failed
+            },
+            'processing': self.backend.name
         }
     
     def paraphrase(self, text: str, variations: int = 3) -> List[str]:
         """Generate paraphrased variations"""
         
         paraphrases = []
+        original_words = set(text.lower().split())
         for i in range(variations):
+            variant = self.rewrite(text, PARAPHRASE_GOALS[i % len(PARAPHRASE_GOALS)])['text']
+            variant_words = set(variant.lower().split())
+            union = original_words | variant_words
             paraphrases.append({
                 'variation': i + 1,
-                'text': f'Variation {i+1} of: {text[:50]}...',
-                'similarity': 0.85 - (i * 0.05)
+                'text': variant,
+                'similarity': round(len(original_words & variant_words) / len(union), 2) if union else 1.0
             })
         
         return paraphrases
-
-
+    
+    def split_chunks(self, text: str) -> List[Any]:
+        """
+        The text split around paragraph breaks: even entries are lists of
+        chunks, odd entries the breaks themselves, kept verbatim
+        """
+        layout = PARAGRAPH_BREAK.split(text)
+        for index in range(0, len(layout), 2):
+            paragraph = layout[index].strip()
+            if not paragraph:
+                layout[index] = []
+            elif len(paragraph) <= self.chunk_chars:
+                layout[index] = [paragraph]
+            else:
+                layout[index] = self._pack_sentences(paragraph)
+        return layout
+    
+    def _pack_sentences(self, paragraph: str) -> List[str]:
+        """Consecutive sentences joined into chunks of at most chunk_chars (longer sentences stand alone)"""
+        chunks, current = [], ''
+        for sentence in iter_sentences(paragraph):
+            if current and len(current) + 1 + len(sentence) > self.chunk_chars:
+                chunks.append(current)
+                current = sentence
+            else:
+                current = f'{current} {sentence}' if current else sentence
+        if current:
+            chunks.append(current)
+        return chunks
+    
+    def _rewrite_pending(self, chunks: List[str], keys: List[str], pending: Dict[str, int],
+                         outputs: Dict[str, str], goal: str, tone: str) -> int:
+        """Rewrite uncached chunks into outputs, keeping the original for failures; returns the failure count"""
+        calls: List[Callable[[], str]] = [
+            lambda index=index: self.backend.rewrite(
+                chunks[index], goal, tone,
+                chunks[index - 1][-CONTEXT_CHARS:] if index > 0 else '',
+                chunks[index + 1][:CONTEXT_CHARS] if index + 1 < len(chunks) else ''
+            )
+            for index in pending.values()
+        ]
+        # Remote backends always run on the pool, so even a single chunk has a deadline
+        if self.backend.parallel:
+            outcomes = run_concurrently(calls, timeout=settings.rewrite_chunk_timeout)
+        else:
+            outcomes = [self._run_inline(call) for call in calls]
+        
+        failed = 0
+        for (key, index), outcome in zip(pending.items(), outcomes):
+            if outcome['error'] or not outcome['result'] or not outcome['result'].strip():
+                logger.warning(f'Rewrite of chunk {index} failed: {outcome["error"] or "empty output"}')
+                outputs[key] = chunks[index]
+                failed += 1
+            else:
+                outputs[key] = outcome['result']
+                self.chunk_cache.set(key, outcome['result'])
+        return failed
+    
+    @staticmethod
+    def _run_inline(call: Callable[[], str]) -> Dict[str, Any]:
+        try:
+            return {'result': call(), 'error': None}
+        except Exception as e:
+            return {'result': None, 'error': str(e)}
+    
+    def _reassemble(self, layout: List[Any], chunks: List[str], outputs: List[str]) -> str:
+        """Join rewritten chunks in order: within a paragraph by a space, between paragraphs by the original break"""
+        parts = []
+        position = 0
+        previous = ''
+        for index, part in enumerate(layout):
+            if index % 2:
+                parts.append(part)
+                continue
+            pieces = []
+            for _ in part:
+                previous = self._stitch(chunks[position], outputs[position], previous)
+                pieces.append(previous)
+                position += 1
+            parts.append(' '.join(pieces))
+        return ''.join(parts)
+    
+    @staticmethod
+    def _stitch(original: str, rewritten: str, previous: str) -> str:
+        """Tidy a rewritten chunk's edges so it joins the chunk before it"""
+        text = PASSAGE_TAG.sub('', rewritten).strip()
+        if not text:
+            return original
+        
+        # Models sometimes repeat the context sentence they were shown
+        if previous:
+            last_sentence = list(iter_sentences(previous[-CONTEXT_CHARS:]))[-1:]
+            if (last_sentence and len(text) > len(last_sentence[0]) and text.startswith(last_sentence[0])
+                    and not original.startswith(last_sentence[0])):
+                text = text[len(last_sentence[0]):].lstrip()
+        
+        # Every chunk starts a sentence and, if the original did, ends one
+        if original[:1].isupper() and text[:1].islower():
+            text = text[0].upper() + text[1:]
+        if original[-1:] in '.!?' and text[-1:] not in '.!?"\'”’)':
+            text += original[-1]
+        return text
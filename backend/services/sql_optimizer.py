@@ -3,6 +3,8 @@ backend/services/sql_optimizer.py
 SQL query optimization service
 """
 
+from typing import Any, Dict, List
+
 
 class SQLOptimizerService:
     """Service for SQL optimization"""
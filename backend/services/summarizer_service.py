@@ -3,55 +3,166 @@ backend/services/summarizer_service.py
 Text summarization service
 """
 
+import hashlib
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+
+from config.settings import settings
+from backend.utils.cache import ResponseCache, canonical_key
+from backend.utils.logger import setup_logger
+from backend.utils.text_segmenter import first_words, iter_sentences
+
+logger = setup_logger(__name__)
+
+# Sentences shorter than this are never picked for a summary
+MIN_SENTENCE_WORDS = 4
+
+# Ranking covers at most this many leading sentences of a document
+MAX_SENTENCES = 50000
+
 
 class SummarizerService:
-    """Service for text summarization"""
+    """
+    Service for text summarization
+
+    Server-side summaries are extractive: sentences are embedded as sparse
+    TF-IDF vectors over hashed word uni/bigrams and ranked with TextRank on
+    their cosine-similarity graph. The graph is never materialized; each
+    power iteration multiplies by X and X^T instead, so ranking stays
+    linear in the size of the document.
+    """
     
-    def __init__(self):
-        self.summaries_cache = {}
+    length_map = {
+        'short': 2,
+        'medium': 5,
+        'long': 10
+    }
+    
+    def __init__(self, cache_max_bytes: Optional[int] = None, damping: float = 0.85,
+                 max_iterations: int = 100, tolerance: float = 1e-6):
+        self.summaries_cache = ResponseCache(
+            max_bytes=cache_max_bytes if cache_max_bytes is not None else settings.summary_cache_max_bytes,
+            ttl=settings.cache_ttl,
+            enabled=settings.enable_cache
+        )
+        self.damping = damping
+        self.max_iterations = max_iterations
+        self.tolerance = tolerance
+        self.vectorizer = HashingVectorizer(
+            n_features=2 ** 18,
+            ngram_range=(1, 2),
+            stop_words='english',
+            alternate_sign=False,
+            norm=None,
+            dtype=np.float64
+        )
     
     def summarize(self, text: str, length: str = 'medium') -> Dict[str, Any]:
         """Summarize text"""
         
         # Calculate target length
-        length_map = {
-            'short': 2,
-            'medium': 5,
-            'long': 10
-        }
-        target_sentences = length_map.get(length, 5)
+        target_sentences = self.length_map.get(length, 5)
+        
+        digest = hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+        cache_key = canonical_key(text=digest, target_sentences=target_sentences)
+        cached = self.summaries_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        sentences = self.split_sentences(text)
+        selected = [sentences[i] for i in self.rank_sentences(sentences, target_sentences)]
+        summary = ' '.join(selected)
         
         # Create summarization config
         config = {
             'original_length': len(text),
             'target_sentences': target_sentences,
-            'compression_ratio': 0.3 if length == 'short' else 0.5 if length == 'medium' else 0.7
+            'compression_ratio': 0.3 if length == 'short' else 0.5 if length == 'medium' else 0.7,
+            'sentence_count': len(sentences),
+            'summary_length': len(summary),
+            'method': 'textrank'
         }
         
-        logger.info(f'Summarization request: {config["original_length"]} chars -> {target_sentences} sentences')
+        logger.info(f'Summarization request: {config["original_length"]} chars -> {len(selected)} sentences')
         
-        return {
+        result = {
+            'summary': summary,
+            'sentences': selected,
             'config': config,
-            'processing': 'on-device',
-            'cache_key': hash(text)
+            'processing': 'server',
+            'cache_key': cache_key
         }
+        # The summary text is stored twice (joined and as sentences)
+        self.summaries_cache.set(cache_key, result, size=2 * len(summary.encode('utf-8')) + 256)
+        return result
     
-    def extract_key_points(self, text: str, num_points: int = 5) -> List[str]:
-        """Extract key points from text"""
-        sentences = text.split('.')
+    def split_sentences(self, text: str) -> List[str]:
+        """Trimmed, non-empty sentences, up to MAX_SENTENCES"""
+        return list(iter_sentences(text, max_sentences=MAX_SENTENCES))
+    
+    def rank_sentences(self, sentences: List[str], count: int) -> List[int]:
+        """Indexes of the `count` most central sentences, in document order"""
+        candidates = [i for i, sentence in enumerate(sentences) if len(sentence.split()) >= MIN_SENTENCE_WORDS]
+        if len(candidates) <= count:
+            return candidates or list(range(min(count, len(sentences))))
+        
+        scores = self._textrank(self._sentence_vectors([sentences[i] for i in candidates]))
+        top = np.argpartition(-scores, count - 1)[:count]
+        return sorted(candidates[i] for i in top)
+    
+    def _sentence_vectors(self, sentences: List[str]) -> sparse.csr_matrix:
+        """L2-normalized TF-IDF rows, with IDF taken over the document's own sentences"""
+        matrix = self.vectorizer.transform(sentences).tocsr()
+        count = matrix.shape[0]
+        
+        document_frequency = np.bincount(matrix.indices, minlength=matrix.shape[1])
+        idf = np.log((1 + count) / (1 + document_frequency)) + 1
+        matrix.data *= idf[matrix.indices]
+        
+        rows = np.repeat(np.arange(count), np.diff(matrix.indptr))
+        norms = np.sqrt(np.bincount(rows, weights=matrix.data ** 2, minlength=count))
+        inverse = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+        return sparse.diags(inverse) @ matrix
+    
+    def _textrank(self, vectors: sparse.csr_matrix) -> np.ndarray:
+        """
+        PageRank over the cosine-similarity graph S = X X^T without self loops.
+        S @ v is computed as X @ (X^T @ v) - diag(S) * v, which costs O(nnz).
+        """
+        count = vectors.shape[0]
+        transposed = vectors.T.tocsr()
+        self_similarity = np.asarray(vectors.multiply(vectors).sum(axis=1)).ravel()
         
-        # Simple extraction (would use AI in production)
-        key_points = []
-        for sentence in sentences[:num_points]:
-            if len(sentence.strip()) > 20:
-                key_points.append(sentence.strip())
+        def similarity_product(v: np.ndarray) -> np.ndarray:
+            return vectors @ (transposed @ v) - self_similarity * v
         
-        return key_points
+        degree = similarity_product(np.ones(count))
+        connected = degree > 1e-12
+        inverse_degree = np.divide(1.0, degree, out=np.zeros_like(degree), where=connected)
+        
+        rank = np.full(count, 1.0 / count)
+        for _ in range(self.max_iterations):
+            # Sentences with no similar neighbours spread their rank uniformly
+            dangling = rank[~connected].sum()
+            updated = (1 - self.damping + self.damping * dangling) / count \
+                + self.damping * similarity_product(rank * inverse_degree)
+            converged = np.abs(updated - rank).sum() < self.tolerance
+            rank = updated
+            if converged:
+                break
+        return rank
+    
+    def extract_key_points(self, text: str, num_points: int = 5) -> List[str]:
+        """Extract key points from text"""
+        sentences = self.split_sentences(text)
+        return [sentences[i] for i in self.rank_sentences(sentences, num_points)]
     
     def generate_headline(self, text: str) -> str:
         """Generate headline from text"""
-        words = text.split()[:10]
+        first_sentence = next(iter_sentences(text, max_sentences=1), '')
+        words = first_words(first_sentence, 10)
         headline = ' '.join(words)
         return headline if len(headline) > 0 else 'Untitled'
-
-
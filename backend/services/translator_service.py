@@ -3,23 +3,144 @@ backend/services/translator_service.py
 Translation service with offline capabilities
 """
 
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.settings import settings
+from backend.utils.language_detector import LanguageDetector, language_detector
+from backend.utils.logger import setup_logger
+from backend.utils.cache import ResponseCache
+from backend.utils.model_registry import model_registry
+from backend.utils.resilience import invoke_text
+from backend.utils.text_segmenter import iter_sentences
+from backend.utils.translation_memory import TranslationMemory, segment_digest, translation_memory
+
+logger = setup_logger(__name__)
+
+# Line breaks are kept verbatim; the text between them is split into sentences
+LINE_BREAK = re.compile(r'(\s*\n\s*)')
+CODE_FENCE = re.compile(r'^```(?:json)?\s*|\s*```$')
+
+TRANSLATION_BACKENDS = ('auto', 'cloud', 'gemini', 'none')
+
+
+def sentence_layout(line: str) -> Tuple[List[str], List[str]]:
+    """
+    Sentences of a line and the whitespace around them: one gap before each
+    sentence and one after the last, so 。-separated CJK sentences are
+    rejoined without the spaces a Latin text would have between them.
+    """
+    sentences = list(iter_sentences(line))
+    gaps = []
+    position = 0
+    for sentence in sentences:
+        start = line.find(sentence, position)
+        gaps.append(line[position:start])
+        position = start + len(sentence)
+    gaps.append(line[position:])
+    return sentences, gaps
+
+
+class CloudTranslationBackend:
+    """Cloud Translation API through the v2 client of google-cloud-translate"""
+    
+    name = 'cloud'
+    batch_size = 128
+    
+    def __init__(self):
+        from google.cloud import translate_v2
+        self.client = translate_v2.Client()
+    
+    def translate(self, segments: List[str], source: str, target: str) -> List[str]:
+        results = self.client.translate(
+            segments,
+            target_language=target,
+            source_language=None if source == 'auto' else source,
+            format_='text'
+        )
+        return [result['translatedText'] for result in results]
+
+
+class GeminiTranslationBackend:
+    """Gemini Pro, translating a JSON array of segments per call"""
+    
+    name = 'gemini'
+    batch_size = 40
+    
+    def __init__(self, model_name: str = 'gemini-pro'):
+        self.model_name = model_name
+    
+    def translate(self, segments: List[str], source: str, target: str) -> List[str]:
+        source_name = 'the detected language' if source == 'auto' else source
+        prompt = (
+            f'Translate each string in this JSON array from {source_name} to {target}. '
+            'Reply with only a JSON array of the translations, in the same order.\n'
+            f'{json.dumps(segments, ensure_ascii=False)}'
+        )
+        generation_config = {'temperature': 0.0}
+        model = model_registry.get(self.model_name, generation_config)
+        reply = invoke_text(model, prompt, ResponseCache.make_key(prompt, self.model_name, generation_config))
+        
+        translations = json.loads(CODE_FENCE.sub('', reply.strip()))
+        if not isinstance(translations, list) or len(translations) != len(segments):
+            raise ValueError(f'Gemini returned a malformed translation for {len(segments)} segments')
+        return [str(translation) for translation in translations]
+
+
+def build_translation_backend(name: str) -> Optional[Any]:
+    """
+    Server-side translation backend for a configured name, or None for
+    browser-only translation. Nothing is sent off the device unless a
+    backend is configured explicitly; 'auto' picks one from credentials.
+    """
+    if name not in TRANSLATION_BACKENDS:
+        raise ValueError(f'Unknown translation backend: {name}')
+    if name == 'cloud' or (name == 'auto' and settings.google_cloud_project):
+        try:
+            return CloudTranslationBackend()
+        except Exception as e:
+            logger.warning(f'Cloud Translation unavailable: {str(e)}')
+    if name == 'gemini' or (name == 'auto' and settings.gemini_api_key):
+        return GeminiTranslationBackend()
+    return None
+
 
 class TranslatorService:
     """Service for text translation"""
     
-    def __init__(self):
+    def __init__(self, backend: Optional[Any] = None, memory: Optional[TranslationMemory] = None,
+                 detector: Optional[LanguageDetector] = None):
         self.supported_languages = [
             'en', 'es', 'fr', 'de', 'it', 'pt', 'ru', 'ja', 'ko', 'zh'
         ]
-        self.translation_cache = {}
+        self.translation_cache = memory if memory is not None else translation_memory
+        self.detector = detector if detector is not None else language_detector
+        self.backend = backend if backend is not None else build_translation_backend(settings.translation_backend)
     
     def translate(self, text: str, source: str, target: str, offline: bool = False) -> Dict[str, Any]:
-        """Translate text"""
+        """
+        Translate text
+
+        Offline requests, or any request without a server-side backend, only
+        return the config for on-device translation. Otherwise the text is
+        translated segment by segment through the translation memory, so
+        only segments it has not seen before reach the backend. An 'auto'
+        source is resolved locally first, which keeps memory entries keyed
+        by the actual language.
+        """
         
         if target not in self.supported_languages:
             raise ValueError(f'Language {target} not supported')
         
-        cache_key = f'{source}_{target}_{hash(text)}'
+        detected = None
+        if source == 'auto':
+            language, confidence = self.detector.detect(text)
+            detected = {'language': language, 'confidence': confidence}
+            if confidence > 0:
+                source = language
+        
+        cache_key = f'{source}_{target}_{segment_digest(text)}'
         
         config = {
             'source_language': source,
@@ -28,22 +149,75 @@ class TranslatorService:
             'offline_mode': offline,
             'cache_key': cache_key
         }
+        if detected is not None:
+            config['detected_language'] = detected
         
         logger.info(f'Translation request: {source} -> {target}, offline={offline}')
         
+        if offline or self.backend is None:
+            return {
+                'config': config,
+                'processing': 'on-device' if offline else 'hybrid',
+                'supported': True
+            }
+        
+        translation, segments = self._translate_segments(text, source, target)
         return {
+            'translation': translation,
+            'segments': segments,
             'config': config,
-            'processing': 'on-device' if offline else 'hybrid',
+            'processing': self.backend.name,
             'supported': True
         }
     
     def detect_language(self, text: str) -> str:
         """Detect text language"""
-        # Simplified detection (would use AI in production)
-        return 'en'  # Default to English
+        return self.detector.detect(text)[0]
+    
+    def detect_languages(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """Detect the language of many texts in one vectorized pass"""
+        return [
+            {'language': language, 'confidence': confidence}
+            for language, confidence in self.detector.detect_batch(texts)
+        ]
     
     def get_supported_languages(self) -> List[str]:
         """Get list of supported languages"""
         return self.supported_languages
-
-
+    
+    def _translate_segments(self, text: str, source: str, target: str) -> Tuple[str, Dict[str, int]]:
+        """Translate through the memory and reassemble the text around its original whitespace"""
+        layout = [
+            part if index % 2 else sentence_layout(part)
+            for index, part in enumerate(LINE_BREAK.split(text))
+        ]
+        segments = [sentence for sentences, _ in layout[::2] for sentence in sentences]
+        digests = [segment_digest(segment) for segment in segments]
+        
+        known = self.translation_cache.lookup(digests, source, target)
+        pending = list({digest: segment for digest, segment in zip(digests, segments) if digest not in known}.items())
+        
+        for offset in range(0, len(pending), self.backend.batch_size):
+            batch = pending[offset:offset + self.backend.batch_size]
+            translated = self.backend.translate([segment for _, segment in batch], source, target)
+            if len(translated) != len(batch):
+                raise ValueError(f'{self.backend.name} returned {len(translated)} translations for {len(batch)} segments')
+            fresh = {digest: translation for (digest, _), translation in zip(batch, translated)}
+            self.translation_cache.store(fresh, source, target)
+            known.update(fresh)
+        
+        translated_digests = iter(digests)
+        output = []
+        for index, part in enumerate(layout):
+            if index % 2:
+                output.append(part)
+            else:
+                _, gaps = part
+                output.append(gaps[0] + ''.join(known[next(translated_digests)] + gap for gap in gaps[1:]))
+        
+        return ''.join(output), {
+            'total': len(segments),
+            'unique': len(set(digests)),
+            'from_memory': len(set(digests)) - len(pending),
+            'translated': len(pending)
+        }
@@ -3,24 +3,107 @@ backend/services/writer_service.py
 Content writing assistance service
 """
 
+import json
+import math
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from config.settings import settings
+from backend.utils.logger import setup_logger
+from backend.utils.cache import ResponseCache
+from backend.utils.model_registry import model_registry
+from backend.utils.resilience import invoke_text
+
+logger = setup_logger(__name__)
+
+CODE_FENCE = re.compile(r'^```(?:json)?\s*|\s*```$')
+# Outline lines when the model ignores the JSON format: markdown headings, bullets or numbered items
+OUTLINE_LINE = re.compile(r'^\s*(?:#{1,6}|[-*•]|\d+[.)])\s+(?P<title>.+?)\s*$')
+
+# Words per requested length
+LENGTH_WORDS = {'short': 150, 'medium': 500, 'long': 1500}
+# Section token budgets are rounded up to this step, so they map onto a few pooled model configs
+TOKEN_STEP = 256
+
+
+class GeminiWritingBackend:
+    """Gemini Pro text completion for outlines and section drafts"""
+    
+    name = 'gemini'
+    
+    def __init__(self, model_name: str = 'gemini-pro'):
+        self.model_name = model_name
+    
+    def complete(self, prompt: str, temperature: float, max_output_tokens: int = 2048) -> str:
+        generation_config = {
+            'temperature': temperature,
+            'max_output_tokens': min(max_output_tokens, settings.gemini_max_output_tokens)
+        }
+        model = model_registry.get(self.model_name, generation_config)
+        return invoke_text(model, prompt, ResponseCache.make_key(prompt, self.model_name, generation_config))
+
+
+def parse_outline(reply: str) -> List[Dict[str, Any]]:
+    """
+    Sections from an outline reply: a JSON array of {title, points}, or
+    failing that one section per heading, bullet or numbered line
+    """
+    try:
+        parsed = json.loads(CODE_FENCE.sub('', reply.strip()))
+    except ValueError:
+        parsed = None
+    
+    sections = []
+    if isinstance(parsed, list):
+        for item in parsed:
+            if isinstance(item, dict) and str(item.get('title', '')).strip():
+                points = item.get('points') or []
+                sections.append({
+                    'title': str(item['title']).strip(),
+                    'points': [str(point) for point in points] if isinstance(points, list) else [str(points)]
+                })
+            elif isinstance(item, str) and item.strip():
+                sections.append({'title': item.strip(), 'points': []})
+    else:
+        for line in reply.splitlines():
+            match = OUTLINE_LINE.match(line)
+            if match:
+                sections.append({'title': match.group('title').strip('*# '), 'points': []})
+    
+    if not sections:
+        raise ValueError('Outline reply contained no sections')
+    return sections
+
 
 class WriterService:
-    """Service for AI-assisted writing"""
+    """
+    Service for AI-assisted writing
+
+    Long pieces are written outline-first: one call plans the sections,
+    then every section is drafted concurrently from the shared outline, so
+    a report takes about as long as its slowest section rather than the
+    sum of all of them. Sections are emitted as soon as each is drafted.
+    """
     
-    def __init__(self):
+    def __init__(self, backend: Optional[Any] = None, concurrency: Optional[int] = None):
         self.writing_styles = ['professional', 'casual', 'creative', 'technical', 'persuasive']
+        self.backend = backend if backend is not None else GeminiWritingBackend()
+        self.concurrency = max(int(concurrency or settings.long_form_concurrency), 1)
     
-    def generate_content(self, context: str, tone: str, content_type: str) -> Dict[str, Any]:
+    def generate_content(self, context: str, tone: str, content_type: str, length: str = 'medium') -> Dict[str, Any]:
         """Generate written content"""
         
         if tone not in self.writing_styles:
             tone = 'professional'
         
+        word_count_target = LENGTH_WORDS.get(length, LENGTH_WORDS['medium'])
         config = {
-            'context': context,
+            'context_length': len(context),
             'tone': tone,
             'content_type': content_type,
-            'word_count_target': 500
+            'word_count_target': word_count_target
         }
         
         logger.info(f'Content generation: {content_type}, tone={tone}')
@@ -28,9 +111,155 @@ class WriterService:
         return {
             'config': config,
             'processing': 'on-device',
-            'estimated_time': '2-3 seconds'
+            'section_count': self.section_count(word_count_target)
         }
     
+    def section_count(self, target_words: int) -> int:
+        """Sections planned for a piece of this length"""
+        return max(1, min(round(target_words / settings.long_form_section_words), settings.long_form_max_sections))
+    
+    def outline(self, context: str, tone: str, content_type: str, target_words: int) -> List[Dict[str, Any]]:
+        """Section plan for a long piece: title, key points and word budget per section"""
+        
+        if tone not in self.writing_styles:
+            tone = 'professional'
+        count = self.section_count(target_words)
+        prompt = (
+            f'Plan a {tone} {content_type} of about {target_words} words in exactly {count} sections, '
+            f'on the following brief:\n{context}\n\n'
+            'Reply with only a JSON array with one object per section, in reading order, each with '
+            '"title" (a short heading) and "points" (two to four key points the section covers). '
+            'The first section introduces the piece and the last one concludes it.'
+        )
+        sections = parse_outline(self.backend.complete(prompt, temperature=0.4))[:settings.long_form_max_sections]
+        
+        budget = max(target_words // len(sections), 50)
+        for index, section in enumerate(sections):
+            section['index'] = index
+            section['target_words'] = budget
+        return sections
+    
+    def draft_section(self, context: str, tone: str, content_type: str,
+                      sections: List[Dict[str, Any]], index: int) -> str:
+        """Draft one section, with the whole outline as context so parallel drafts fit together"""
+        
+        section = sections[index]
+        plan = '\n'.join(
+            f'{other["index"] + 1}. {other["title"]}' + (' (this section)' if other['index'] == index else '')
+            for other in sections
+        )
+        points = ''.join(f'\n- {point}' for point in section['points'])
+        if index == 0:
+            position = 'It opens the piece, so introduce the topic.'
+        elif index == len(sections) - 1:
+            position = 'It closes the piece, so conclude without introducing new topics.'
+        else:
+            position = 'Other sections are written separately, so neither introduce the piece nor conclude it.'
+        
+        prompt = (
+            f'You are writing one section of a {tone} {content_type} on this brief:\n{context}\n\n'
+            f'Outline:\n{plan}\n\n'
+            f'Write section {index + 1}, "{section["title"]}", in about {section["target_words"]} words, '
+            f'covering:{points or " the topic of its title"}\n'
+            f'{position} Reply with the section body only, without its heading.'
+        )
+        # Generous token budget: roughly 1.4 tokens per English word
+        max_output_tokens = math.ceil(section['target_words'] * 2 / TOKEN_STEP) * TOKEN_STEP
+        return self.backend.complete(prompt, temperature=0.7, max_output_tokens=max_output_tokens).strip()
+    
+    def generate_long_form(self, context: str, tone: str, content_type: str, target_words: int,
+                           sections: Optional[List[Dict[str, Any]]] = None,
+                           started: Optional[float] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Write a long piece and yield (event, payload) pairs.
+
+        An 'outline' event lists the planned sections, then one 'section'
+        event per section follows in completion order, each carrying its
+        index, then a 'done' event. A failed section is reported in its own
+        event and the rest of the piece still completes. Callers that planned
+        the outline already pass its sections, and the perf_counter() value
+        taken before planning as started.
+        """
+        if tone not in self.writing_styles:
+            tone = 'professional'
+        if started is None:
+            started = time.perf_counter()
+        
+        if sections is None:
+            try:
+                sections = self.outline(context, tone, content_type, target_words)
+            except Exception as e:
+                logger.error(f'Long-form outline failed: {str(e)}')
+                yield 'error', {'error': 'Outline generation failed', 'details': str(e)}
+                return
+        
+        outline_ms = round((time.perf_counter() - started) * 1000, 2)
+        logger.info(f'Long-form {content_type}: {len(sections)} sections, ~{target_words} words')
+        
+        yield 'outline', {
+            'sections': sections,
+            'target_words': target_words,
+            'latency_ms': outline_ms
+        }
+        
+        def draft(index):
+            section_started = time.perf_counter()
+            text = self.draft_section(context, tone, content_type, sections, index)
+            return text, round((time.perf_counter() - section_started) * 1000, 2)
+        
+        executor = ThreadPoolExecutor(max_workers=min(self.concurrency, len(sections)),
+                                      thread_name_prefix='nyra-writer')
+        futures = {executor.submit(draft, section['index']): section for section in sections}
+        word_count = 0
+        succeeded = 0
+        
+        try:
+            for future in as_completed(futures):
+                section = futures[future]
+                try:
+                    text, latency_ms = future.result()
+                    words = len(text.split())
+                    word_count += words
+                    succeeded += 1
+                    yield 'section', {
+                        'success': True,
+                        'index': section['index'],
+                        'title': section['title'],
+                        'text': text,
+                        'word_count': words,
+                        'latency_ms': latency_ms
+                    }
+                except Exception as e:
+                    logger.warning(f'Long-form section {section["index"]} failed: {str(e)}')
+                    yield 'section', {
+                        'success': False,
+                        'index': section['index'],
+                        'title': section['title'],
+                        'error': 'Section generation failed',
+                        'details': str(e)
+                    }
+            
+            yield 'done', {
+                'success': succeeded == len(sections),
+                'metadata': {
+                    'sections': len(sections),
+                    'succeeded': succeeded,
+                    'failed': len(sections) - succeeded,
+                    'word_count': word_count,
+                    'concurrency': min(self.concurrency, len(sections)),
+                    'backend': self.backend.name,
+                    'outline_latency_ms': outline_ms,
+                    'total_latency_ms': round((time.perf_counter() - started) * 1000, 2)
+                }
+            }
+        
+        except GeneratorExit:
+            logger.info('Long-form stream closed by client')
+            raise
+        finally:
+            # Drop sections not yet started if the client disconnected
+            executor.shutdown(wait=False, cancel_futures=True)
+    
     def improve_writing(self, text: str, goals: List[str]) -> Dict[str, Any]:
         """Improve existing writing"""
         
@@ -59,5 +288,3 @@ class WriterService:
             'expansion_needed': max(0, expansion_needed),
             'processing': 'on-device'
         }
-
-
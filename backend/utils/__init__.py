@@ -1,6 +1,6 @@
 """
 backend/utils/__init__.py
 """
-__all__ = ['setup_logger', 'validate_request']
+__all__ = ['setup_logger', 'validate_request', 'validate_body']
 
 
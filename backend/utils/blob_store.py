@@ -0,0 +1,277 @@
+"""
+backend/utils/blob_store.py
+Content-addressed blob store with a bounded memory tier and a memory-mapped disk tier
+"""
+
+import hashlib
+import mmap
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from config.settings import settings
+from backend.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+DIGEST_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+
+class BlobReferenceError(LookupError):
+    """Raised when a request references a blob the store does not hold"""
+
+
+class BlobTooLargeError(ValueError):
+    """Raised when a blob cannot be kept by any tier of the store"""
+
+    def __init__(self, message: str, size: int, limit: int):
+        super().__init__(message)
+        self.size = size
+        self.limit = limit
+
+
+def blob_digest(data: bytes) -> str:
+    """Content address of a blob"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def is_digest(value: Any) -> bool:
+    return isinstance(value, str) and bool(DIGEST_PATTERN.match(value))
+
+
+def resolve_text(store: 'BlobStore', data: Dict[str, Any], field: str) -> Tuple[str, str]:
+    """
+    Return (text, ref) for a request field given inline or as '<field>_ref'.
+
+    Inline text is not stored and its ref is None; only explicit uploads
+    to the store can be referenced by later requests.
+    """
+    if field in data:
+        text = data[field] if isinstance(data[field], str) else str(data[field])
+        return text, None
+
+    ref = data.get(f'{field}_ref')
+    text = store.get_text(ref) if ref else None
+    if text is None:
+        raise BlobReferenceError(f'No stored blob for {field}_ref {ref}; it may have been evicted, upload it again')
+    return text, ref
+
+
+class BlobStore:
+    """
+    Stores text blobs by SHA-256 so large documents are uploaded once and
+    referenced by hash afterwards.
+
+    Recently used blobs stay decoded in an LRU memory tier bounded by bytes.
+    With a disk path, every blob is also written once to a file named after
+    its digest; reads that miss memory map the file instead of reading it into
+    an intermediate buffer. The disk tier is bounded too, dropping the oldest
+    blobs first. Uploading the same content twice stores it once. The disk
+    directory is created and indexed on first use, not at construction.
+
+    Both tiers evict, so a digest handed out earlier can stop resolving;
+    clients re-upload on a miss. Without a disk tier, blobs larger than the
+    memory tier are rejected rather than silently dropped, and blobs are
+    private to the process.
+    """
+
+    def __init__(self, memory_max_bytes: int, disk_path: str = '', disk_max_bytes: int = 0):
+        self.memory_max_bytes = memory_max_bytes
+        self.disk_path = disk_path
+        self.disk_max_bytes = disk_max_bytes
+        self._memory: 'OrderedDict[str, Tuple[str, int]]' = OrderedDict()
+        self._memory_size = 0
+        self._disk: 'OrderedDict[str, int]' = OrderedDict()
+        self._disk_size = 0
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._disk_ready = not disk_path
+        self._stats = {'puts': 0, 'deduplicated': 0, 'memory_hits': 0, 'disk_hits': 0, 'misses': 0}
+
+    def put_text(self, text: str) -> Tuple[str, bool]:
+        """Store text and return (digest, created)"""
+        data = text.encode('utf-8')
+        if not self.disk_path and len(data) > self.memory_max_bytes:
+            raise BlobTooLargeError(
+                f'Blob of {len(data)} bytes exceeds the {self.memory_max_bytes}-byte memory store',
+                len(data), self.memory_max_bytes
+            )
+        digest = blob_digest(data)
+        self._open_disk()
+
+        with self._lock:
+            self._stats['puts'] += 1
+            exists = digest in self._memory or digest in self._disk
+            if exists:
+                self._stats['deduplicated'] += 1
+            self._remember(digest, text, len(data))
+            if exists or not self.disk_path:
+                return digest, not exists
+
+        self._write_disk(digest, data)
+        return digest, True
+
+    def get_text(self, digest: str) -> Optional[str]:
+        """Get a blob's text, or None when it is unknown"""
+        if not is_digest(digest):
+            return None
+        self._open_disk()
+
+        with self._lock:
+            entry = self._memory.get(digest)
+            if entry is not None:
+                self._memory.move_to_end(digest)
+                self._stats['memory_hits'] += 1
+                return entry[0]
+            on_disk = digest in self._disk
+
+        if not on_disk:
+            with self._lock:
+                self._stats['misses'] += 1
+            return None
+
+        text = self._read_disk(digest)
+        with self._lock:
+            if text is None:
+                self._stats['misses'] += 1
+                return None
+            self._stats['disk_hits'] += 1
+            self._remember(digest, text, self._disk.get(digest, len(text)))
+        return text
+
+    def iter_bytes(self, digest: str, chunk_size: int = 1024 * 1024) -> Optional[Iterator[bytes]]:
+        """Iterate a blob's raw bytes in chunks, streaming disk blobs from a memory map"""
+        text = None
+        self._open_disk()
+        with self._lock:
+            entry = self._memory.get(digest) if is_digest(digest) else None
+            if entry is not None:
+                text = entry[0]
+            elif digest not in self._disk:
+                return None
+
+        if text is not None:
+            data = text.encode('utf-8')
+            return (data[i:i + chunk_size] for i in range(0, len(data), chunk_size))
+        return self._iter_disk(digest, chunk_size)
+
+    def size(self, digest: str) -> Optional[int]:
+        """Blob size in bytes, or None when unknown"""
+        self._open_disk()
+        with self._lock:
+            if digest in self._memory:
+                return self._memory[digest][1]
+            return self._disk.get(digest)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(
+                self._stats,
+                memory_entries=len(self._memory),
+                memory_bytes=self._memory_size,
+                memory_max_bytes=self.memory_max_bytes,
+                persistent=bool(self.disk_path),
+                disk_entries=len(self._disk),
+                disk_bytes=self._disk_size,
+                disk_max_bytes=self.disk_max_bytes
+            )
+
+    def _remember(self, digest: str, text: str, size: int) -> None:
+        """Keep a blob in the memory tier when it fits; caller holds the lock"""
+        if digest in self._memory:
+            self._memory.move_to_end(digest)
+            return
+        if size > self.memory_max_bytes:
+            return
+        while self._memory and self._memory_size + size > self.memory_max_bytes:
+            _, (_, evicted_size) = self._memory.popitem(last=False)
+            self._memory_size -= evicted_size
+        self._memory[digest] = (text, size)
+        self._memory_size += size
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.disk_path, digest[:2], digest)
+
+    def _write_disk(self, digest: str, data: bytes) -> None:
+        """Write a blob atomically, then make room in the disk tier"""
+        path = self._path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as handle:
+                handle.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f'Blob {digest[:12]} not persisted: {e}')
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            return
+
+        evicted = []
+        with self._lock:
+            if digest not in self._disk:
+                self._disk[digest] = len(data)
+                self._disk_size += len(data)
+            while self.disk_max_bytes and self._disk_size > self.disk_max_bytes and len(self._disk) > 1:
+                oldest, oldest_size = self._disk.popitem(last=False)
+                self._disk_size -= oldest_size
+                evicted.append(oldest)
+
+        for oldest in evicted:
+            try:
+                os.unlink(self._path(oldest))
+            except OSError:
+                pass
+
+    def _read_disk(self, digest: str) -> Optional[str]:
+        try:
+            with open(self._path(digest), 'rb') as handle:
+                if os.fstat(handle.fileno()).st_size == 0:
+                    return ''
+                with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    return str(mapped, 'utf-8')
+        except OSError:
+            return None
+
+    def _iter_disk(self, digest: str, chunk_size: int) -> Iterator[bytes]:
+        with open(self._path(digest), 'rb') as handle:
+            if os.fstat(handle.fileno()).st_size == 0:
+                return
+            with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for offset in range(0, len(mapped), chunk_size):
+                    yield mapped[offset:offset + chunk_size]
+
+    def _open_disk(self) -> None:
+        """Create the disk directory and index it, once"""
+        if self._disk_ready:
+            return
+        with self._disk_lock:
+            if self._disk_ready:
+                return
+            os.makedirs(self.disk_path, exist_ok=True)
+            self._load_disk_index()
+            self._disk_ready = True
+
+    def _load_disk_index(self) -> None:
+        """Index blobs left by earlier runs, oldest first"""
+        found = []
+        for root, _, files in os.walk(self.disk_path):
+            for name in files:
+                if is_digest(name):
+                    stat = os.stat(os.path.join(root, name))
+                    found.append((stat.st_mtime, name, stat.st_size))
+        with self._lock:
+            for _, digest, size in sorted(found):
+                self._disk[digest] = size
+                self._disk_size += size
+
+
+# Global blob store for Chrome AI documents; memory only unless BLOB_STORE_PATH is set
+blob_store = BlobStore(
+    memory_max_bytes=settings.blob_memory_max_bytes,
+    disk_path=settings.blob_store_path,
+    disk_max_bytes=settings.blob_disk_max_bytes
+)
@@ -0,0 +1,123 @@
+"""
+backend/utils/cache.py
+Bounded TTL/LRU response cache for model outputs
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from config.settings import settings
+
+
+def canonical_key(**parts: Any) -> str:
+    """SHA-256 of the canonical JSON encoding of the key parts"""
+    encoded = json.dumps(parts, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """
+    Thread-safe response cache with per-entry TTL and LRU eviction bounded
+    by the total UTF-8 size of the cached values.
+    """
+
+    def __init__(self, max_bytes: int, ttl: int, enabled: bool = True):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.enabled = enabled
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    @staticmethod
+    def make_key(prompt: str, model: str, generation_config: Optional[Dict[str, Any]] = None) -> str:
+        """Canonical cache key for a model call"""
+        return canonical_key(prompt=prompt, model=model, generation_config=generation_config or {})
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a cached value, or None on miss or expiry"""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+
+            value, size, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self._expirations += 1
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def set(self, key: str, value: Any, size: Optional[int] = None) -> None:
+        """Cache a value, evicting least recently used entries to fit; size defaults to the UTF-8 length"""
+        if not self.enabled:
+            return
+
+        if size is None:
+            size = len(value.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            while self._entries and self._size + size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._evictions += 1
+
+            self._entries[key] = (value, size, time.monotonic() + self.ttl)
+            self._size += size
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache hit/miss statistics"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'size_bytes': self._size,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / lookups, 4) if lookups else 0.0,
+                'evictions': self._evictions,
+                'expirations': self._expirations
+            }
+
+    def _remove(self, key: str) -> None:
+        """Drop an entry; caller holds the lock"""
+        _, size, _ = self._entries.pop(key)
+        self._size -= size
+
+
+# Global cache for Gemini responses
+response_cache = ResponseCache(
+    max_bytes=settings.cache_max_bytes,
+    ttl=settings.cache_ttl,
+    enabled=settings.enable_cache
+)
@@ -0,0 +1,285 @@
+"""
+backend/utils/compression.py
+Accept-Encoding negotiation and response compression (gzip, zstd and brotli when installed)
+"""
+
+import threading
+import zlib
+from typing import Dict, Iterable, Iterator, Optional
+
+from flask import Response
+
+from config.settings import settings
+from backend.utils.cache import ResponseCache
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Server preference when the client rates several encodings equally
+ENCODING_PREFERENCE = ('zstd', 'br', 'gzip')
+
+AVAILABLE_ENCODINGS = tuple(
+    encoding for encoding, module in (('zstd', zstandard), ('br', brotli), ('gzip', zlib))
+    if module is not None
+)
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/x-ndjson',
+    'application/javascript',
+    'application/xml',
+    'application/manifest+json',
+    'image/svg+xml',
+}
+
+
+def is_compressible(mimetype: Optional[str]) -> bool:
+    return bool(mimetype) and (mimetype.startswith('text/') or mimetype in COMPRESSIBLE_MIMETYPES)
+
+
+def negotiate_encoding(accept_encoding: str, available: Iterable[str] = AVAILABLE_ENCODINGS) -> Optional[str]:
+    """
+    Pick a content coding from an Accept-Encoding header, or None for identity.
+
+    The client's q-values decide; ties go to the server preference order.
+    '*' covers codings the header does not name and q=0 rules a coding out.
+    """
+    qualities: Dict[str, float] = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities['gzip' if name == 'x-gzip' else name] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in ENCODING_PREFERENCE:
+        if encoding not in available:
+            continue
+        quality = qualities.get(encoding, qualities.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class StreamCompressor:
+    """Incremental compressor for one response body"""
+
+    def __init__(self, encoding: str, level: int):
+        self.encoding = encoding
+        if encoding == 'gzip':
+            # wbits=31 writes the gzip container; the header has no timestamp, so output is deterministic
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        elif encoding == 'zstd' and zstandard is not None:
+            self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        elif encoding == 'br' and brotli is not None:
+            self._compressor = brotli.Compressor(quality=level)
+        else:
+            raise ValueError(f'Unsupported content encoding: {encoding}')
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == 'br':
+            return self._compressor.process(data)
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        """Emit everything compressed so far so the client can decode it now"""
+        if self.encoding == 'gzip':
+            return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        if self.encoding == 'zstd':
+            return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        if self.encoding == 'gzip':
+            return self._compressor.flush(zlib.Z_FINISH)
+        if self.encoding == 'zstd':
+            return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+        return self._compressor.finish()
+
+
+def compress_bytes(data: bytes, encoding: str, level: int) -> bytes:
+    """Compress a whole body in one call"""
+    compressor = StreamCompressor(encoding, level)
+    return compressor.compress(data) + compressor.finish()
+
+
+class ResponseCompressor:
+    """
+    Compresses Flask responses for clients that accept it.
+
+    Buffered bodies below min_bytes are sent as they are; larger ones are
+    compressed once. Bodies with a strong ETag (memoized endpoint responses
+    and static files) are keyed by ETag in a precompressed cache, so repeat
+    requests skip compression entirely. Streamed responses (SSE, NDJSON,
+    blob downloads) are compressed chunk by chunk with a flush after each
+    chunk, so events reach the client as soon as they are produced.
+    """
+
+    def __init__(self, min_bytes: int = 1024, levels: Optional[Dict[str, int]] = None,
+                 cache: Optional[ResponseCache] = None, enabled: bool = True):
+        self.min_bytes = min_bytes
+        self.levels = {'gzip': 6, 'zstd': 3, 'br': 5}
+        self.levels.update(levels or {})
+        self.cache = cache
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._stats = {
+            'compressed': 0, 'streamed': 0, 'cache_hits': 0, 'skipped_small': 0,
+            'bytes_in': 0, 'bytes_out': 0
+        }
+
+    def apply(self, response: Response, accept_encoding: str) -> Response:
+        """Compress a response in place when the client and the body allow it"""
+        if not self.enabled or not self._eligible(response):
+            return response
+        response.vary.add('Accept-Encoding')
+
+        encoding = negotiate_encoding(accept_encoding or '')
+        if encoding is None:
+            return response
+
+        length = response.content_length
+        if length is not None and length < self.min_bytes:
+            self._count(skipped_small=1)
+            return response
+
+        etag, weak = response.get_etag()
+        cache_key = f'{encoding}:{etag}' if etag and not weak and self.cache is not None else None
+
+        cached = self.cache.get(cache_key) if cache_key else None
+        if cached is not None:
+            self._close_body(response)
+            body_length, compressed = cached
+            self._count(cache_hits=1, bytes_in=body_length, bytes_out=len(compressed))
+        elif response.is_streamed and not response.direct_passthrough:
+            self._compress_stream(response, encoding, cache_key)
+            return response
+        else:
+            response.direct_passthrough = False
+            body = response.get_data()
+            if len(body) < self.min_bytes:
+                self._count(skipped_small=1)
+                return response
+            compressed = compress_bytes(body, encoding, self.levels[encoding])
+            if len(compressed) >= len(body):
+                return response
+            if cache_key:
+                self.cache.set(cache_key, (len(body), compressed), size=len(compressed))
+            self._count(compressed=1, bytes_in=len(body), bytes_out=len(compressed))
+
+        response.set_data(compressed)
+        self._mark_encoded(response, encoding)
+        return response
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            stats = dict(self._stats, available=list(AVAILABLE_ENCODINGS), min_bytes=self.min_bytes)
+        stats['ratio'] = round(stats['bytes_out'] / stats['bytes_in'], 4) if stats['bytes_in'] else 0.0
+        if self.cache is not None:
+            stats['cache'] = self.cache.stats()
+        return stats
+
+    def _eligible(self, response: Response) -> bool:
+        return (
+            response.status_code == 200
+            and 'Content-Encoding' not in response.headers
+            and not response.cache_control.no_transform
+            and is_compressible(response.mimetype)
+        )
+
+    def _compress_stream(self, response: Response, encoding: str, cache_key: Optional[str]) -> None:
+        """
+        Swap the body iterator for one that compresses and flushes each chunk.
+        A stream with a strong ETag that completes within the cache budget is
+        kept, so the next request for it is served precompressed.
+        """
+        compressor = StreamCompressor(encoding, self.levels[encoding])
+        chunks = response.iter_encoded()
+        source = response.response
+
+        def generate() -> Iterator[bytes]:
+            bytes_in = bytes_out = 0
+            kept = [] if cache_key else None
+            try:
+                for chunk in chunks:
+                    if not chunk:
+                        continue
+                    data = compressor.compress(chunk) + compressor.flush()
+                    bytes_in += len(chunk)
+                    bytes_out += len(data)
+                    if kept is not None and bytes_out > self.cache.max_bytes:
+                        kept = None
+                    if kept is not None:
+                        kept.append(data)
+                    yield data
+                tail = compressor.finish()
+                bytes_out += len(tail)
+                if kept is not None:
+                    self.cache.set(cache_key, (bytes_in, b''.join(kept) + tail), size=bytes_out)
+                yield tail
+            finally:
+                close = getattr(source, 'close', None)
+                if close is not None:
+                    close()
+                self._count(bytes_in=bytes_in, bytes_out=bytes_out)
+
+        response.response = generate()
+        response.direct_passthrough = False
+        self._mark_encoded(response, encoding)
+        self._count(streamed=1)
+
+    @staticmethod
+    def _mark_encoded(response: Response, encoding: str) -> None:
+        response.headers['Content-Encoding'] = encoding
+        if response.is_streamed:
+            response.headers.pop('Content-Length', None)
+        etag, _ = response.get_etag()
+        if etag:
+            # The compressed bytes differ from the identity body the strong tag names
+            response.set_etag(etag, weak=True)
+
+    @staticmethod
+    def _close_body(response: Response) -> None:
+        """Release an unread body (e.g. a static file) that a cached copy replaces"""
+        close = getattr(response.response, 'close', None)
+        if close is not None:
+            close()
+        response.direct_passthrough = False
+
+    def _count(self, **deltas: int) -> None:
+        with self._lock:
+            for name, delta in deltas.items():
+                self._stats[name] += delta
+
+
+# Global response compressor and its cache of precompressed bodies
+response_compressor = ResponseCompressor(
+    min_bytes=settings.compression_min_bytes,
+    levels={
+        'gzip': settings.compression_gzip_level,
+        'zstd': settings.compression_zstd_level,
+        'br': settings.compression_brotli_level
+    },
+    cache=ResponseCache(
+        max_bytes=settings.compression_cache_max_bytes,
+        ttl=settings.cache_ttl,
+        enabled=settings.enable_cache
+    ),
+    enabled=settings.compression_enabled
+)
@@ -0,0 +1,104 @@
+"""
+backend/utils/concurrency.py
+Shared worker pool and fan-out helpers for upstream model calls
+"""
+
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, List, Optional
+
+from config.settings import settings
+
+# Process-wide pool for fan-out calls, bounded by MAX_WORKERS
+_executor = ThreadPoolExecutor(
+    max_workers=settings.max_workers,
+    thread_name_prefix='nyra-fanout'
+)
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Get the shared fan-out executor"""
+    return _executor
+
+
+def run_concurrently(calls: List[Callable[[], Any]],
+                     timeout: Optional[float] = None,
+                     executor: Optional[ThreadPoolExecutor] = None) -> List[Dict[str, Any]]:
+    """
+    Run calls on a bounded pool and collect one outcome per call, in input order.
+
+    Each outcome has 'result', 'error' and 'latency_ms'. The timeout applies to
+    each call from the moment it starts running; calls still queued once every
+    scheduling wave has had its turn are cancelled and reported as timed out.
+    A failing or slow call never affects the outcome of the others.
+    """
+    executor = executor or _executor
+    started: Dict[int, float] = {}
+    finished: Dict[int, float] = {}
+
+    def _timed(index, call):
+        started[index] = time.monotonic()
+        try:
+            return call()
+        finally:
+            finished[index] = time.monotonic()
+
+    submitted = time.monotonic()
+    futures = {executor.submit(_timed, i, call): i for i, call in enumerate(calls)}
+    outcomes: List[Optional[Dict[str, Any]]] = [None] * len(calls)
+
+    queue_deadline = None
+    if timeout is not None:
+        waves = math.ceil(len(calls) / max(executor._max_workers, 1)) or 1
+        queue_deadline = submitted + timeout * waves
+
+    pending = set(futures)
+    while pending:
+        now = time.monotonic()
+        next_deadline = None
+        if timeout is not None:
+            # Expire running calls past their own timeout and queued calls past the request deadline
+            for future in list(pending):
+                index = futures[future]
+                deadline = started[index] + timeout if index in started else queue_deadline
+                if now >= deadline:
+                    future.cancel()
+                    pending.discard(future)
+                    outcomes[index] = {
+                        'result': None,
+                        'error': f'Timed out after {timeout:g}s',
+                        'latency_ms': _elapsed_ms(started.get(index, now), now)
+                    }
+                elif next_deadline is None or deadline < next_deadline:
+                    next_deadline = deadline
+            if not pending:
+                break
+
+        done, pending = wait(
+            pending,
+            timeout=None if next_deadline is None else max(next_deadline - now, 0),
+            return_when=FIRST_COMPLETED
+        )
+        for future in done:
+            index = futures[future]
+            end = finished.get(index, time.monotonic())
+            try:
+                outcomes[index] = {
+                    'result': future.result(),
+                    'error': None,
+                    'latency_ms': _elapsed_ms(started.get(index, end), end)
+                }
+            except Exception as e:
+                outcomes[index] = {
+                    'result': None,
+                    'error': str(e),
+                    'latency_ms': _elapsed_ms(started.get(index, end), end)
+                }
+
+    return outcomes
+
+
+def _elapsed_ms(start: float, end: float) -> float:
+    """Milliseconds between two monotonic timestamps"""
+    return round((end - start) * 1000, 2)
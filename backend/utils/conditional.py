@@ -0,0 +1,84 @@
+"""
+backend/utils/conditional.py
+ETag / If-None-Match support and a memo of encoded bodies for deterministic endpoints
+"""
+
+import hashlib
+from functools import wraps
+from typing import Callable
+
+from flask import Response, g, make_response, request
+
+from config.settings import settings
+from backend.utils.cache import ResponseCache
+
+
+def body_etag(body: bytes) -> str:
+    """Strong entity tag for a response body"""
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def request_key() -> str:
+    """Hash of everything a deterministic endpoint's response depends on"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(request.method.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(request.full_path.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(request.get_data(cache=True))
+    return digest.hexdigest()
+
+
+def skip_memo() -> None:
+    """Mark this request's response as non-deterministic: no memo entry and no ETag"""
+    g.skip_memo = True
+
+
+def not_modified(etag: str) -> Response:
+    response = Response(status=304)
+    response.set_etag(etag)
+    return response
+
+
+def conditional(view: Callable) -> Callable:
+    """
+    Serve a deterministic JSON view with a content-hash ETag.
+
+    Encoded 200 bodies are memoized by request hash, so a repeated request is
+    answered from the memo without running the view or re-encoding JSON, and
+    a request whose If-None-Match already holds the ETag gets an empty 304.
+    Errors, streamed responses and responses the view marked with
+    skip_memo() (model output, partial failures) pass through untouched.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request_key()
+        entry = response_memo.get(key)
+
+        if entry is None:
+            response = make_response(view(*args, **kwargs))
+            if (response.status_code != 200 or response.is_streamed
+                    or response.mimetype != 'application/json' or g.get('skip_memo')):
+                return response
+            body = response.get_data()
+            etag = body_etag(body)
+            response_memo.set(key, (etag, body), size=len(body))
+        else:
+            etag, body = entry
+            response = Response(body, status=200, mimetype='application/json')
+
+        # Weak comparison, so compressed variants (W/ tags) revalidate too
+        if request.if_none_match.contains_weak(etag):
+            return not_modified(etag)
+        response.set_etag(etag)
+        return response
+
+    return wrapper
+
+
+# Global memo of encoded response bodies
+response_memo = ResponseCache(
+    max_bytes=settings.response_memo_max_bytes,
+    ttl=settings.cache_ttl,
+    enabled=settings.enable_cache
+)
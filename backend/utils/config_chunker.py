@@ -0,0 +1,125 @@
+"""
+backend/utils/config_chunker.py
+Split large DevOps configurations on resource, document or stage boundaries
+"""
+
+import math
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# Lines that start a new logical unit, by configuration family
+YAML_BOUNDARY = re.compile(r'^---\s*$')
+HCL_BOUNDARY = re.compile(
+    r'^(resource|data|module|variable|output|provider|locals|terraform|moved|import|check)\b'
+)
+DOCKERFILE_BOUNDARY = re.compile(r'^\s*FROM\s', re.IGNORECASE)
+
+CONFIG_FAMILIES = {
+    'yaml': ('kubernetes', 'k8s', 'helm', 'yaml', 'yml', 'compose', 'ansible', 'github', 'gitlab', 'cloudformation'),
+    'hcl': ('terraform', 'hcl', 'tf', 'opentofu', 'packer', 'nomad'),
+    'dockerfile': ('docker', 'containerfile')
+}
+
+
+def detect_family(config_type: str) -> str:
+    """Map a free-form config type to 'yaml', 'hcl', 'dockerfile' or 'text'"""
+    config_type = (config_type or '').lower()
+    # Compose files are YAML even though they mention docker
+    if 'compose' in config_type:
+        return 'yaml'
+    for family, markers in CONFIG_FAMILIES.items():
+        if any(marker in config_type for marker in markers):
+            return family
+    return 'text'
+
+
+def _segment_starts(lines: List[str], family: str) -> List[int]:
+    """Zero-based indexes of lines that begin a new segment"""
+    if family == 'yaml':
+        # The separator belongs to the document it opens
+        return [i for i, line in enumerate(lines) if YAML_BOUNDARY.match(line)]
+    if family == 'hcl':
+        starts = []
+        for i, line in enumerate(lines):
+            if HCL_BOUNDARY.match(line):
+                # Keep leading comments attached to the block they describe
+                j = i
+                while j > 0 and lines[j - 1].lstrip().startswith(('#', '//')):
+                    j -= 1
+                starts.append(j)
+        return starts
+    if family == 'dockerfile':
+        return [i for i, line in enumerate(lines) if DOCKERFILE_BOUNDARY.match(line)]
+    return [i for i in range(1, len(lines)) if not lines[i - 1].strip() and lines[i].strip()]
+
+
+def chunk_config(code: str, config_type: str, max_lines: int = 200,
+                 max_chunks: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Split a configuration into chunks of at most max_lines lines.
+
+    Segments are cut on natural boundaries for the config family and packed
+    greedily, so a chunk only breaks inside a segment when that segment alone
+    is longer than max_lines. Each chunk records its 1-based start and end
+    line in the original file. With max_chunks, max_lines is raised as far as
+    needed to stay within that many chunks.
+    """
+    lines = code.split('\n')
+    family = detect_family(config_type)
+    max_lines = max(int(max_lines), 1)
+
+    starts = sorted(set([0] + _segment_starts(lines, family)))
+    bounds = list(zip(starts, starts[1:] + [len(lines)]))
+
+    if not max_chunks:
+        return _pack(lines, bounds, max_lines)
+
+    max_lines = max(max_lines, math.ceil(len(lines) / max(int(max_chunks), 1)))
+    chunks = _pack(lines, bounds, max_lines)
+    # Greedy packing on boundaries can leave chunks part-full; grow until it fits
+    while len(chunks) > max_chunks:
+        max_lines = math.ceil(max_lines * 1.5)
+        chunks = _pack(lines, bounds, max_lines)
+    return chunks
+
+
+def _pack(lines: List[str], bounds: List[Tuple[int, int]], max_lines: int) -> List[Dict[str, Any]]:
+    """Pack segments (start, end) into chunks of at most max_lines lines"""
+    chunks: List[Dict[str, Any]] = []
+    current_start, current_end = None, None
+
+    def flush():
+        if current_start is None or current_end <= current_start:
+            return
+        text = '\n'.join(lines[current_start:current_end])
+        if text.strip():
+            chunks.append({
+                'index': len(chunks),
+                'start_line': current_start + 1,
+                'end_line': current_end,
+                'text': text
+            })
+
+    for start, end in bounds:
+        if current_start is not None and end - current_start <= max_lines:
+            current_end = end
+            continue
+
+        flush()
+        # Oversized segments are split on plain line counts
+        while end - start > max_lines:
+            current_start, current_end = start, start + max_lines
+            flush()
+            start += max_lines
+        current_start, current_end = start, end
+
+    flush()
+    return chunks
+
+
+def number_lines(text: str, start_line: int) -> str:
+    """Prefix each line with its line number in the original file"""
+    return '\n'.join(
+        f'{start_line + offset:>5} | {line}'
+        for offset, line in enumerate(text.split('\n'))
+    )
@@ -0,0 +1,65 @@
+"""
+backend/utils/fake_model.py
+Offline stand-in for genai.GenerativeModel with injectable latency and failures
+"""
+
+import random
+import threading
+import time
+from typing import Callable, Iterator, List, Optional, Union
+
+
+class FakeResponse:
+    """Mimics the parts of GenerateContentResponse the API uses"""
+
+    def __init__(self, text: str, chunks: Optional[List[str]] = None):
+        self.text = text
+        self._chunks = chunks or [text]
+
+    def __iter__(self) -> Iterator['FakeResponse']:
+        for chunk in self._chunks:
+            yield FakeResponse(chunk)
+
+
+class FakeGenerativeModel:
+    """
+    Deterministic fake Gemini model for offline development and tests.
+
+    latency is seconds per call, or a callable taking the zero-based call
+    number and returning seconds, so tests can make specific calls stall.
+    failure_rate makes that fraction of calls raise. Responses echo the
+    prompt unless a fixed response_text is given.
+    """
+
+    def __init__(self, model_name: str = 'fake-gemini',
+                 latency: Union[float, Callable[[int], float]] = 0.0,
+                 failure_rate: float = 0.0,
+                 response_text: Optional[str] = None,
+                 chunk_size: int = 16,
+                 generation_config=None,
+                 seed: Optional[int] = None):
+        self.model_name = model_name
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.response_text = response_text
+        self.chunk_size = chunk_size
+        self.generation_config = generation_config
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def generate_content(self, prompt, stream: bool = False, **kwargs) -> FakeResponse:
+        with self._lock:
+            call_number = self.calls
+            self.calls += 1
+            fail = self._random.random() < self.failure_rate
+
+        delay = self.latency(call_number) if callable(self.latency) else self.latency
+        if delay:
+            time.sleep(delay)
+        if fail:
+            raise RuntimeError('Fake upstream failure')
+
+        text = self.response_text if self.response_text is not None else f'Response to: {prompt}'
+        chunks = [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)] if stream else None
+        return FakeResponse(text, chunks)
@@ -0,0 +1,109 @@
+"""
+backend/utils/json_provider.py
+Pluggable JSON codec (orjson when available, stdlib otherwise) and the Flask provider using it
+"""
+
+import dataclasses
+import decimal
+import json
+import uuid
+from datetime import date, datetime
+from typing import Any, Optional
+
+from flask.json.provider import DefaultJSONProvider
+
+from config.settings import settings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON_BACKENDS = ('auto', 'orjson', 'stdlib')
+
+
+def resolve_backend(name: str) -> str:
+    """Concrete backend for a configured name; 'auto' prefers orjson"""
+    if name not in JSON_BACKENDS:
+        raise ValueError(f'Unknown JSON backend: {name}')
+    if name == 'stdlib' or orjson is None:
+        return 'stdlib'
+    return 'orjson'
+
+
+def _default(value: Any) -> Any:
+    """Encode types the JSON backends do not handle natively"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if hasattr(value, '__html__'):
+        return str(value.__html__())
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+class JSONCodec:
+    """Compact JSON encoding and decoding through the selected backend"""
+
+    def __init__(self, backend: str = 'auto'):
+        self.backend = resolve_backend(backend)
+        self._options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY if orjson else 0
+
+    def dumps_bytes(self, obj: Any) -> bytes:
+        if self.backend == 'orjson':
+            try:
+                return orjson.dumps(obj, default=_default, option=self._options)
+            except (TypeError, orjson.JSONEncodeError):
+                # Integers beyond 64 bits and similar edge cases: let the stdlib decide
+                pass
+        return self._stdlib_dumps(obj).encode('utf-8')
+
+    def dumps(self, obj: Any) -> str:
+        if self.backend == 'orjson':
+            return self.dumps_bytes(obj).decode('utf-8')
+        return self._stdlib_dumps(obj)
+
+    def loads(self, data: Any) -> Any:
+        if self.backend == 'orjson':
+            return orjson.loads(data)
+        return json.loads(data)
+
+    @staticmethod
+    def _stdlib_dumps(obj: Any) -> str:
+        return json.dumps(obj, default=_default, separators=(',', ':'))
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider that encodes responses and decodes request bodies
+    through the shared codec. Extra keyword arguments (indent, sort_keys and
+    so on) fall back to the default stdlib provider.
+    """
+
+    sort_keys = False
+
+    def __init__(self, app, codec: Optional[JSONCodec] = None):
+        super().__init__(app)
+        self.codec = codec or json_codec
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.codec.dumps(obj)
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return self.codec.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.codec.dumps_bytes(obj) + b'\n', mimetype=self.mimetype)
+
+
+# Global codec shared by the Flask provider and the streaming helpers
+json_codec = JSONCodec(settings.json_backend)
@@ -0,0 +1,243 @@
+"""
+backend/utils/language_detector.py
+Local character n-gram language identification for the supported languages
+"""
+
+import json
+import os
+import re
+import sys
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+PROFILES_PATH = os.path.join(DATA_DIR, 'language_profiles.json')
+SAMPLES_DIR = os.path.join(DATA_DIR, 'language_samples')
+
+MAX_NGRAM = 3
+# Most frequent n-grams kept per language profile
+PROFILE_SIZE = 1500
+# Only the head of a long text is scored
+MAX_CHARS = 1000
+
+NON_LETTER = re.compile(r'[\W\d_]+')
+SEPARATOR = 0
+SPACE = ord(' ')
+# An n-gram's key is its code points as digits in base 0x110000; three fit in 63 bits
+CODE_BASE = 0x110000
+# Fibonacci hashing of keys into a power-of-two feature space
+HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+
+# Code point ranges per writing system, sorted and non-overlapping
+SCRIPTS = ('latin', 'cyrillic', 'hangul', 'kana', 'han')
+SCRIPT_RANGES = (
+    (0x0041, 0x005A, 'latin'),
+    (0x0061, 0x007A, 'latin'),
+    (0x00C0, 0x024F, 'latin'),
+    (0x0400, 0x04FF, 'cyrillic'),
+    (0x1100, 0x11FF, 'hangul'),
+    (0x3040, 0x30FF, 'kana'),
+    (0x3130, 0x318F, 'hangul'),
+    (0x31F0, 0x31FF, 'kana'),
+    (0x3400, 0x4DBF, 'han'),
+    (0x4E00, 0x9FFF, 'han'),
+    (0xAC00, 0xD7AF, 'hangul'),
+)
+SCRIPT_LANGUAGES = {
+    'latin': ('en', 'es', 'fr', 'de', 'it', 'pt'),
+    'cyrillic': ('ru',),
+    'hangul': ('ko',),
+    'kana': ('ja',),
+    'han': ('zh', 'ja'),
+}
+
+_RANGE_STARTS = np.array([start for start, _, _ in SCRIPT_RANGES], dtype=np.int64)
+_RANGE_ENDS = np.array([end for _, end, _ in SCRIPT_RANGES], dtype=np.int64)
+_RANGE_SCRIPTS = np.array([SCRIPTS.index(script) for _, _, script in SCRIPT_RANGES], dtype=np.int64)
+
+
+def normalize(text: str) -> str:
+    """Lowercased letters only, with words separated and surrounded by single spaces"""
+    return f' {NON_LETTER.sub(" ", text.lower()).strip()} '
+
+
+def encode(texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Code points of all normalized texts joined by a zero separator, and the
+    index of the text each position belongs to
+    """
+    joined = '\0'.join(normalize(text) for text in texts)
+    codes = np.frombuffer(joined.encode('utf-32-le'), dtype=np.uint32).astype(np.int64)
+    return codes, np.cumsum(codes == SEPARATOR)
+
+
+def ngram_keys(codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(start positions, keys) of every 1..MAX_NGRAM-gram that stays within one text"""
+    positions, keys = [], []
+    for n in range(1, MAX_NGRAM + 1):
+        count = len(codes) - n + 1
+        if count <= 0:
+            break
+        valid = codes[:count] != SEPARATOR
+        key = codes[:count].copy()
+        for offset in range(1, n):
+            following = codes[offset:offset + count]
+            valid &= following != SEPARATOR
+            key += following * CODE_BASE ** offset
+        if n == 1:
+            # A lone space says nothing about the language
+            valid &= codes[:count] != SPACE
+        start = np.flatnonzero(valid)
+        positions.append(start)
+        keys.append(key[start])
+    return np.concatenate(positions), np.concatenate(keys)
+
+
+def gram_key(gram: str) -> int:
+    """Key of one n-gram string, matching ngram_keys"""
+    return sum(ord(char) * CODE_BASE ** offset for offset, char in enumerate(gram))
+
+
+def key_gram(key: int) -> str:
+    chars = []
+    while key:
+        key, code = divmod(key, CODE_BASE)
+        chars.append(chr(code))
+    return ''.join(chars)
+
+
+def hash_keys(keys: np.ndarray, feature_bits: int) -> np.ndarray:
+    """Feature indexes in [0, 2 ** feature_bits), as intp so gathers skip a conversion"""
+    hashed = (keys.astype(np.uint64) * np.uint64(HASH_MULTIPLIER)) >> np.uint64(64 - feature_bits)
+    return hashed.astype(np.intp)
+
+
+def build_profiles(samples: Dict[str, str], size: int = PROFILE_SIZE) -> Dict[str, Dict[str, int]]:
+    """The `size` most frequent n-grams of each language's sample text, with counts"""
+    profiles = {}
+    for language, text in sorted(samples.items()):
+        _, keys = ngram_keys(encode([text])[0])
+        unique, counts = np.unique(keys, return_counts=True)
+        top = np.lexsort((unique, -counts))[:size]
+        profiles[language] = {key_gram(int(unique[i])): int(counts[i]) for i in top}
+    return profiles
+
+
+def load_samples(directory: str = SAMPLES_DIR) -> Dict[str, str]:
+    samples = {}
+    for name in sorted(os.listdir(directory)):
+        if name.endswith('.txt'):
+            with open(os.path.join(directory, name), encoding='utf-8') as handle:
+                samples[name[:-4]] = handle.read()
+    return samples
+
+
+def load_profiles(path: str = PROFILES_PATH) -> Dict[str, Dict[str, int]]:
+    """Bundled profiles, or profiles built from the samples when the file is missing"""
+    if not os.path.exists(path):
+        return build_profiles(load_samples())
+    with open(path, encoding='utf-8') as handle:
+        return json.load(handle)
+
+
+def script_counts(codes: np.ndarray, text_ids: np.ndarray, count: int) -> np.ndarray:
+    """Letters per writing system for each text, shape (count, len(SCRIPTS))"""
+    index = np.searchsorted(_RANGE_STARTS, codes, side='right') - 1
+    inside = (index >= 0) & (codes <= _RANGE_ENDS[np.maximum(index, 0)])
+    scripts = _RANGE_SCRIPTS[index[inside]]
+    counts = np.bincount(text_ids[inside] * len(SCRIPTS) + scripts, minlength=count * len(SCRIPTS))
+    return counts.reshape(count, len(SCRIPTS))
+
+
+class LanguageDetector:
+    """
+    Multinomial naive Bayes over hashed character n-grams.
+
+    Profile counts are hashed into a dense (languages x features) matrix of
+    smoothed log-probabilities once, at construction. A batch is encoded as
+    one array of code points, so n-gram extraction, hashing and scoring are
+    numpy operations over the whole batch rather than per-text Python loops.
+    The text's dominant script narrows the candidates first, so Cyrillic,
+    Hangul and kana text never compete with the Latin-script languages.
+    """
+
+    def __init__(self, profiles: Dict[str, Dict[str, int]], feature_bits: int = 16,
+                 alpha: float = 0.1, default: str = 'en'):
+        self.languages = sorted(profiles)
+        self.default = default
+        self.feature_bits = feature_bits
+        n_features = 1 << feature_bits
+
+        counts = np.zeros((len(self.languages), n_features), dtype=np.float64)
+        for row, language in enumerate(self.languages):
+            grams = profiles[language]
+            keys = np.array([gram_key(gram) for gram in grams], dtype=np.int64)
+            np.add.at(counts[row], hash_keys(keys, feature_bits),
+                      np.fromiter(grams.values(), dtype=np.float64, count=len(grams)))
+
+        totals = counts.sum(axis=1, keepdims=True)
+        self.log_probs = np.log((counts + alpha) / (totals + alpha * n_features)).astype(np.float32)
+
+        index = {language: i for i, language in enumerate(self.languages)}
+        self.script_masks = np.full((len(SCRIPTS), len(self.languages)), -np.inf, dtype=np.float32)
+        for script, candidates in SCRIPT_LANGUAGES.items():
+            self.script_masks[SCRIPTS.index(script), [index[language] for language in candidates if language in index]] = 0.0
+
+    def detect(self, text: str) -> Tuple[str, float]:
+        """(language, confidence) for one text"""
+        return self.detect_batch([text])[0]
+
+    def detect_batch(self, texts: Sequence[str]) -> List[Tuple[str, float]]:
+        """
+        (language, confidence) per text, scored together in one vectorized pass.
+        Confidence is the posterior probability under a uniform prior; texts
+        without letters get the default language with confidence 0.
+        """
+        count = len(texts)
+        if not count:
+            return []
+        codes, text_ids = encode([text[:MAX_CHARS] for text in texts])
+
+        by_script = script_counts(codes, text_ids, count)
+        kana = SCRIPTS.index('kana')
+        han = SCRIPTS.index('han')
+        # Japanese mixes kanji with kana; Chinese never uses kana
+        mixed = by_script[:, kana] > 0
+        by_script[mixed, kana] += by_script[mixed, han]
+        by_script[mixed, han] = 0
+        scripts = by_script.argmax(axis=1)
+        has_letters = by_script.sum(axis=1) > 0
+
+        positions, keys = ngram_keys(codes)
+        features = hash_keys(keys, self.feature_bits)
+        owners = text_ids[positions]
+        scores = np.stack([
+            np.bincount(owners, weights=row[features], minlength=count)
+            for row in self.log_probs
+        ], axis=1)
+        scores += self.script_masks[scripts]
+
+        best = scores.argmax(axis=1)
+        confidence = 1.0 / np.exp(scores - scores[np.arange(count), best][:, None]).sum(axis=1)
+        return [
+            (self.languages[best[i]], round(float(confidence[i]), 4)) if has_letters[i] else (self.default, 0.0)
+            for i in range(count)
+        ]
+
+
+def main(argv: List[str]) -> None:
+    """Rebuild the bundled profiles from the sample texts: python -m backend.utils.language_detector"""
+    profiles = build_profiles(load_samples())
+    path = argv[1] if len(argv) > 1 else PROFILES_PATH
+    with open(path, 'w', encoding='utf-8') as handle:
+        json.dump(profiles, handle, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+        handle.write('\n')
+    print(f'Wrote {len(profiles)} profiles to {path}')
+
+
+# Global detector, built once from the bundled profiles
+language_detector = LanguageDetector(load_profiles())
+
+if __name__ == '__main__':
+    main(sys.argv)
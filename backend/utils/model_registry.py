@@ -0,0 +1,159 @@
+"""
+backend/utils/model_registry.py
+Process-wide registry of Gemini model instances on pooled, keep-alive gRPC channels
+"""
+
+import itertools
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import google.generativeai as genai
+
+from config.settings import settings
+from backend.utils.logger import setup_logger
+from backend.utils.fake_model import FakeGenerativeModel
+
+logger = setup_logger(__name__)
+
+GEMINI_HOST = 'generativelanguage.googleapis.com'
+
+
+def canonical_config(generation_config: Optional[Dict[str, Any]]) -> str:
+    """Stable string form of a generation config for use in keys"""
+    return json.dumps(generation_config or {}, sort_keys=True, separators=(',', ':'), default=str)
+
+
+class ModelRegistry:
+    """
+    Thread-safe registry of GenerativeModel instances keyed by model name and
+    generation config.
+
+    Each key holds one model per pooled channel and hands them out round-robin,
+    so concurrent requests spread over `pool_size` warm HTTP/2 connections
+    instead of building a new model (and client) per call. Channels are created
+    lazily on first use, which keeps them out of a pre-fork gunicorn master.
+    Callers choose generation configs per request, so only the `max_models`
+    most recently used keys are kept; channels are shared by all keys.
+    """
+
+    def __init__(self, pool_size: int, keepalive_ms: int = 30000, max_models: int = 64):
+        self.pool_size = max(int(pool_size), 1)
+        self.keepalive_ms = keepalive_ms
+        self.max_models = max(int(max_models), 1)
+        self._lock = threading.Lock()
+        self._clients: Optional[List[Any]] = None
+        self._models: 'OrderedDict[Tuple[str, str], List[Any]]' = OrderedDict()
+        self._cursor = itertools.count()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, model_name: str = 'gemini-pro',
+            generation_config: Optional[Dict[str, Any]] = None):
+        """Get a pooled model instance for this name and config"""
+        key = (model_name, canonical_config(generation_config))
+
+        with self._lock:
+            slots = self._models.get(key)
+            if slots is None:
+                self._misses += 1
+                slots = [
+                    self._build_model(model_name, generation_config, client)
+                    for client in self._get_clients()
+                ]
+                self._models[key] = slots
+                if len(self._models) > self.max_models:
+                    self._models.popitem(last=False)
+                    self._evictions += 1
+            else:
+                self._models.move_to_end(key)
+                self._hits += 1
+            return slots[next(self._cursor) % len(slots)]
+
+    def warm(self, model_names: List[str]) -> None:
+        """
+        Build channels and default models ahead of the first request. Call it
+        in each worker (e.g. a gunicorn post_fork hook), never before forking.
+        """
+        for model_name in model_names:
+            self.get(model_name)
+
+    def stats(self) -> Dict[str, Any]:
+        """Registry usage statistics"""
+        with self._lock:
+            return {
+                'pool_size': len(self._clients) if self._clients else 0,
+                'models': len(self._models),
+                'max_models': self.max_models,
+                'hits': self._hits,
+                'misses': self._misses,
+                'evictions': self._evictions
+            }
+
+    def clear(self) -> None:
+        """Drop all cached models and channels"""
+        with self._lock:
+            self._models.clear()
+            self._clients = None
+
+    def _get_clients(self) -> List[Any]:
+        """Build the channel pool once; caller holds the lock"""
+        if self._clients is None and settings.gemini_backend == 'fake':
+            self._clients = [None]
+        if self._clients is None:
+            try:
+                self._clients = [self._build_client() for _ in range(self.pool_size)]
+                logger.info(f'Gemini channel pool initialized: {self.pool_size} channels')
+            except Exception as e:
+                # None falls back to the library's default shared client
+                logger.warning(f'Gemini channel pool unavailable, using default client: {e}')
+                self._clients = [None]
+        return self._clients
+
+    def _build_client(self):
+        """Create a generative client on its own keep-alive gRPC channel"""
+        import grpc
+        from google.auth import api_key
+        from google.ai import generativelanguage as glm
+        from google.ai.generativelanguage_v1beta.services.generative_service.transports.grpc import (
+            GenerativeServiceGrpcTransport
+        )
+
+        credentials = api_key.Credentials(settings.gemini_api_key) if settings.gemini_api_key else None
+        channel = GenerativeServiceGrpcTransport.create_channel(
+            GEMINI_HOST,
+            credentials=credentials,
+            options=[
+                ('grpc.keepalive_time_ms', self.keepalive_ms),
+                ('grpc.keepalive_timeout_ms', 20000),
+                ('grpc.keepalive_permit_without_calls', 1),
+                ('grpc.http2.max_pings_without_data', 0),
+                ('grpc.max_send_message_length', -1),
+                ('grpc.max_receive_message_length', -1),
+            ]
+        )
+        # Start connecting now so the first request finds a warm channel
+        grpc.channel_ready_future(channel)
+
+        transport = GenerativeServiceGrpcTransport(channel=channel)
+        return glm.GenerativeServiceClient(transport=transport)
+
+    def _build_model(self, model_name, generation_config, client):
+        """Create a model bound to a pooled client"""
+        if settings.gemini_backend == 'fake':
+            return FakeGenerativeModel(
+                model_name,
+                latency=settings.fake_model_latency_ms / 1000,
+                generation_config=generation_config
+            )
+        
+        model = genai.GenerativeModel(model_name, generation_config=generation_config)
+        if client is not None:
+            model._client = client
+        return model
+
+
+# Global registry instance
+model_registry = ModelRegistry(settings.gemini_pool_size, settings.gemini_keepalive_ms, settings.gemini_max_models)
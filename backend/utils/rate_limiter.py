@@ -0,0 +1,168 @@
+"""
+backend/utils/rate_limiter.py
+Token-bucket quota governor for outbound model calls
+"""
+
+import fcntl
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict
+
+from config.settings import settings
+
+
+class QuotaExceeded(Exception):
+    """Raised when a call cannot be admitted within the allowed wait"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _LocalState:
+    """Bucket state shared by the threads of one process"""
+
+    def __init__(self, initial: Dict[str, float]):
+        self._lock = threading.Lock()
+        self._state = dict(initial)
+
+    def transact(self, fn: Callable[[Dict[str, float]], Any]) -> Any:
+        with self._lock:
+            return fn(self._state)
+
+
+class _FileState:
+    """Bucket state shared by every worker process through a locked file"""
+
+    def __init__(self, path: str, initial: Dict[str, float]):
+        self.path = path
+        self._initial = dict(initial)
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def transact(self, fn: Callable[[Dict[str, float]], Any]) -> Any:
+        # flock serializes processes; the thread lock serializes threads sharing the descriptor table
+        with self._lock, open(self.path, 'a+') as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                handle.seek(0)
+                raw = handle.read()
+                state = json.loads(raw) if raw else dict(self._initial)
+                result = fn(state)
+                handle.seek(0)
+                handle.truncate()
+                handle.write(json.dumps(state))
+                handle.flush()
+                return result
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+class QuotaGovernor:
+    """
+    Token bucket that paces callers to a per-minute quota.
+
+    A caller that finds the bucket empty reserves the next free token and
+    sleeps until it is due, so waiting callers are served in arrival order at
+    exactly the refill rate. Callers are rejected with QuotaExceeded instead of
+    queueing when the queue is already max_queue deep or their wait would
+    exceed max_wait. With a state path the bucket is shared across workers.
+    """
+
+    def __init__(self, rate_per_minute: int, burst: int, max_queue: int,
+                 max_wait: float, state_path: str = ''):
+        self.rate = max(rate_per_minute, 1) / 60.0
+        self.burst = max(burst, 1)
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        initial = {'tokens': float(self.burst), 'updated': time.time(), 'waiting': 0}
+        self._state = _FileState(state_path, initial) if state_path else _LocalState(initial)
+        self._stats_lock = threading.Lock()
+        self._admitted = 0
+        self._rejected = 0
+        self._queued = 0
+        self._total_wait = 0.0
+        self._max_wait_seen = 0.0
+
+    def acquire(self) -> float:
+        """Block until a token is available and return the time waited"""
+        wait = self._state.transact(self._reserve)
+
+        if wait is None:
+            with self._stats_lock:
+                self._rejected += 1
+            retry_after = self._state.transact(self._time_to_token)
+            raise QuotaExceeded('Upstream quota exhausted, try again later', retry_after)
+
+        if wait > 0:
+            try:
+                time.sleep(wait)
+            finally:
+                self._state.transact(self._leave_queue)
+
+        with self._stats_lock:
+            self._admitted += 1
+            if wait > 0:
+                self._queued += 1
+                self._total_wait += wait
+                self._max_wait_seen = max(self._max_wait_seen, wait)
+        return wait
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and wait statistics"""
+        state = self._state.transact(lambda s: self._refill(s) or dict(s))
+        with self._stats_lock:
+            return {
+                'rate_per_minute': round(self.rate * 60),
+                'burst': self.burst,
+                'tokens_available': round(max(state['tokens'], 0), 2),
+                'queue_depth': int(state['waiting']),
+                'max_queue': self.max_queue,
+                'admitted': self._admitted,
+                'rejected': self._rejected,
+                'queued': self._queued,
+                'avg_wait_ms': round(self._total_wait / self._queued * 1000, 2) if self._queued else 0.0,
+                'max_wait_ms': round(self._max_wait_seen * 1000, 2)
+            }
+
+    def _refill(self, state: Dict[str, float]) -> None:
+        now = time.time()
+        state['tokens'] = min(self.burst, state['tokens'] + (now - state['updated']) * self.rate)
+        state['updated'] = now
+
+    def _reserve(self, state: Dict[str, float]):
+        """Take a token, possibly in the future; None means reject"""
+        self._refill(state)
+        if state['tokens'] >= 1:
+            state['tokens'] -= 1
+            return 0.0
+
+        wait = (1 - state['tokens']) / self.rate
+        if state['waiting'] >= self.max_queue or wait > self.max_wait:
+            return None
+
+        # Tokens go negative: each reservation pushes the next caller one slot later
+        state['tokens'] -= 1
+        state['waiting'] += 1
+        return wait
+
+    def _leave_queue(self, state: Dict[str, float]) -> None:
+        state['waiting'] = max(state['waiting'] - 1, 0)
+
+    def _time_to_token(self, state: Dict[str, float]) -> float:
+        self._refill(state)
+        return max((1 - state['tokens']) / self.rate, 0.0)
+
+
+# Global governor for Gemini calls
+quota_governor = QuotaGovernor(
+    rate_per_minute=settings.rate_limit_per_minute,
+    burst=settings.rate_limit_burst,
+    max_queue=settings.rate_limit_max_queue,
+    max_wait=settings.rate_limit_max_wait,
+    state_path=settings.rate_limit_state_path
+)
@@ -0,0 +1,321 @@
+"""
+backend/utils/resilience.py
+Hedged requests and circuit breaking for upstream model calls, and the
+single entry point every Gemini call goes through
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+
+from flask import jsonify
+
+from config.settings import settings
+from backend.utils.rate_limiter import QuotaExceeded, quota_governor
+from backend.utils.singleflight import single_flight
+
+
+class CircuitOpenError(Exception):
+    """Raised when the circuit is open and calls are being shed"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LatencyTracker:
+    """Sliding window of recent call latencies"""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Latency at percentile p (0-100), or None without samples"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(int(round(p / 100 * (len(samples) - 1))), len(samples) - 1)
+        return samples[index]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._samples)
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open circuit breaker.
+
+    After failure_threshold consecutive failures the circuit opens and calls
+    fail fast with CircuitOpenError. Once reset_timeout has passed, a single
+    trial call is let through: success closes the circuit, failure re-opens it.
+    Exceptions listed in ignore (local admission errors, for example) neither
+    count as failures nor as successes.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float,
+                 ignore: Tuple[Type[BaseException], ...] = ()):
+        self.failure_threshold = max(failure_threshold, 1)
+        self.reset_timeout = reset_timeout
+        self.ignore = ignore
+        self._lock = threading.Lock()
+        self._state = 'closed'
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._rejected = 0
+        self._trips = 0
+
+    def call(self, fn: Callable[[], Any]) -> Any:
+        """Run fn through the breaker"""
+        trial = self._before_call()
+        try:
+            result = fn()
+        except self.ignore:
+            self._release_trial(trial)
+            raise
+        except Exception:
+            self._on_failure(trial)
+            raise
+        self._on_success()
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'state': self._state,
+                'consecutive_failures': self._failures,
+                'failure_threshold': self.failure_threshold,
+                'reset_timeout': self.reset_timeout,
+                'trips': self._trips,
+                'rejected': self._rejected
+            }
+
+    def _before_call(self) -> bool:
+        """Admit or shed a call; returns True for a half-open trial call"""
+        with self._lock:
+            if self._state == 'closed':
+                return False
+
+            remaining = self._opened_at + self.reset_timeout - time.monotonic()
+            if self._state == 'open' and remaining <= 0:
+                self._state = 'half_open'
+
+            if self._state == 'half_open' and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+
+            self._rejected += 1
+            raise CircuitOpenError('Upstream model temporarily unavailable', max(remaining, 0.0))
+
+    def _release_trial(self, trial: bool) -> None:
+        if trial:
+            with self._lock:
+                self._trial_in_flight = False
+
+    def _on_success(self) -> None:
+        with self._lock:
+            self._state = 'closed'
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def _on_failure(self, trial: bool) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if trial or self._failures >= self.failure_threshold:
+                if self._state != 'open':
+                    self._trips += 1
+                self._state = 'open'
+                self._opened_at = time.monotonic()
+
+
+class Hedger:
+    """
+    Send a backup attempt when the first is slower than the hedge delay and
+    return whichever succeeds first.
+
+    The delay is fixed when configured, otherwise it follows the tracked p95
+    latency once enough samples exist. Each attempt passes its own admission
+    step (the quota governor) before it is timed, so samples measure upstream
+    latency rather than queueing. Attempts run on a dedicated pool of
+    max_workers threads; when it is full, calls run inline and are not
+    hedged instead of waiting behind other requests' hedges. Losing attempts
+    are left to finish in the background; their result is discarded.
+    """
+
+    def __init__(self, enabled: bool, delay: float = 0.0, percentile: float = 95,
+                 min_samples: int = 20, max_workers: int = 8):
+        self.enabled = enabled
+        self.fixed_delay = delay
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.max_workers = max(int(max_workers), 1)
+        self.latency = LatencyTracker()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='nyra-hedge')
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._calls = 0
+        self._hedged = 0
+        self._hedge_wins = 0
+        self._saturated = 0
+
+    def delay(self) -> Optional[float]:
+        """Current hedge delay in seconds, or None when hedging is off"""
+        if not self.enabled:
+            return None
+        if self.fixed_delay > 0:
+            return self.fixed_delay
+        if len(self.latency) < self.min_samples:
+            return None
+        return self.latency.percentile(self.percentile)
+
+    def call(self, fn: Callable[[], Any], admit: Optional[Callable[[], Any]] = None) -> Any:
+        """Run fn, hedging it with a second attempt after the hedge delay; admit runs before each attempt"""
+        with self._lock:
+            self._calls += 1
+
+        # The first attempt is admitted before the hedge delay starts counting
+        if admit is not None:
+            admit()
+        delay = self.delay()
+        if delay is None or not self._reserve():
+            return self._timed(fn)
+
+        primary = self._executor.submit(self._pooled, fn, None)
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._reserve():
+            return primary.result()
+
+        with self._lock:
+            self._hedged += 1
+        backup = self._executor.submit(self._pooled, fn, admit)
+        pending = {primary, backup}
+        error = None
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+                if future is backup:
+                    with self._lock:
+                        self._hedge_wins += 1
+                return result
+
+        raise error
+
+    def stats(self) -> Dict[str, Any]:
+        delay = self.delay()
+        p50 = self.latency.percentile(50)
+        p95 = self.latency.percentile(95)
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'delay_ms': round(delay * 1000, 2) if delay is not None else None,
+                'p50_ms': round(p50 * 1000, 2) if p50 is not None else None,
+                'p95_ms': round(p95 * 1000, 2) if p95 is not None else None,
+                'calls': self._calls,
+                'hedged': self._hedged,
+                'hedge_wins': self._hedge_wins,
+                'in_flight': self._in_flight,
+                'max_workers': self.max_workers,
+                'saturated': self._saturated
+            }
+
+    def _reserve(self) -> bool:
+        """Claim a pool thread for one attempt, or count the call as saturated"""
+        with self._lock:
+            if self._in_flight >= self.max_workers:
+                self._saturated += 1
+                return False
+            self._in_flight += 1
+            return True
+
+    def _pooled(self, fn: Callable[[], Any], admit: Optional[Callable[[], Any]]) -> Any:
+        try:
+            return self._timed(fn, admit)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def _timed(self, fn: Callable[[], Any], admit: Optional[Callable[[], Any]] = None) -> Any:
+        if admit is not None:
+            admit()
+        started = time.perf_counter()
+        result = fn()
+        self.latency.record(time.perf_counter() - started)
+        return result
+
+
+# Global breaker and hedger for Gemini calls; local quota rejections are not upstream failures
+circuit_breaker = CircuitBreaker(
+    failure_threshold=settings.circuit_failure_threshold,
+    reset_timeout=settings.circuit_reset_timeout,
+    ignore=(QuotaExceeded,)
+)
+
+hedger = Hedger(
+    enabled=settings.hedge_requests,
+    delay=settings.hedge_delay_ms / 1000,
+    percentile=settings.hedge_percentile,
+    max_workers=settings.hedge_max_workers
+)
+
+
+def invoke(model: Any, prompt: Any, **kwargs: Any) -> Any:
+    """
+    Single choke point for Gemini calls.
+
+    The circuit breaker sheds calls during sustained upstream failure, each
+    attempt is admitted by the quota governor, and non-streaming calls are
+    hedged with a second attempt when they run past the hedge delay.
+    """
+    def attempt():
+        quota_governor.acquire()
+        return model.generate_content(prompt, **kwargs)
+
+    if kwargs.get('stream'):
+        return circuit_breaker.call(attempt)
+    return circuit_breaker.call(lambda: hedger.call(
+        lambda: model.generate_content(prompt, **kwargs),
+        admit=quota_governor.acquire
+    ))
+
+
+def invoke_text(model: Any, prompt: Any, key: str) -> str:
+    """Text of a non-streaming call, coalescing identical in-flight calls that share key"""
+    text, _ = single_flight.do(
+        key,
+        lambda: invoke(model, prompt).text,
+        timeout=settings.singleflight_timeout
+    )
+    return text
+
+
+def backpressure_response(error):
+    """429 when over quota, 503 while the circuit is open, with a retry hint"""
+    if isinstance(error, CircuitOpenError):
+        message, status = 'Service temporarily unavailable', 503
+    else:
+        message, status = 'Rate limit exceeded', 429
+
+    response = jsonify({
+        'error': message,
+        'details': str(error),
+        'retry_after': round(error.retry_after, 2)
+    })
+    response.headers['Retry-After'] = str(max(math.ceil(error.retry_after), 1))
+    return response, status
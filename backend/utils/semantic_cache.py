@@ -0,0 +1,185 @@
+"""
+backend/utils/semantic_cache.py
+Near-duplicate prompt cache backed by a local LSH index over hashed char n-grams
+"""
+
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+
+from config.settings import settings
+
+WHITESPACE = re.compile(r'\s+')
+# Tokens that change a prompt's meaning while barely moving its n-gram vector
+# ("150 USD" vs "750 USD", "is it safe" vs "is it not safe"); they must match exactly
+GUARD_TOKENS = re.compile(r"\d+(?:[.,]\d+)*|n't\b|\b(?:not|no|never|none|nor|neither|without|cannot)\b")
+
+
+class SemanticCache:
+    """
+    Cache that answers prompts which differ only in whitespace, casing or
+    small wording changes.
+
+    Prompts are embedded locally as L2-normalized hashed character n-grams.
+    An approximate nearest-neighbour index (random-hyperplane LSH split into
+    bands) narrows each lookup to the entries sharing the most bands, which
+    are then re-ranked by exact cosine similarity. Entries live in one namespace per
+    model/config so answers never cross generation settings. Numbers and
+    negations are folded into the bucket keys, so prompts that differ in
+    them never match however similar the rest is. The index is bounded by
+    entry count and response bytes, with LRU eviction and TTL.
+    """
+
+    def __init__(self, threshold: float = 0.98, max_entries: int = 10000,
+                 max_bytes: int = 32 * 1024 * 1024, ttl: int = 3600,
+                 n_features: int = 2 ** 14, bands: int = 8, band_bits: int = 8,
+                 max_candidates: int = 32, enabled: bool = True, seed: int = 13):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.enabled = enabled
+        self.bands = bands
+        self.band_bits = band_bits
+        self.max_candidates = max_candidates
+        self._vectorizer = HashingVectorizer(
+            analyzer='char_wb',
+            ngram_range=(3, 5),
+            n_features=n_features,
+            alternate_sign=False,
+            norm='l2',
+            dtype=np.float32
+        )
+        rng = np.random.default_rng(seed)
+        self._planes = rng.standard_normal((n_features, bands * band_bits)).astype(np.float32)
+        self._band_weights = (1 << np.arange(band_bits)).astype(np.int64)
+        self._entries: 'OrderedDict[int, Dict[str, Any]]' = OrderedDict()
+        self._buckets: Dict[Tuple[str, int, int], set] = {}
+        self._next_id = 0
+        self._size = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def lookup(self, namespace: str, prompt: str) -> Optional[Tuple[str, float]]:
+        """Return (cached_text, similarity) for the closest prompt above the threshold"""
+        if not self.enabled:
+            return None
+
+        vector, keys = self._embed(namespace, prompt)
+        dense = np.zeros(vector.shape[1], dtype=np.float32)
+        dense[vector.indices] = vector.data
+        now = time.monotonic()
+
+        with self._lock:
+            # Entries sharing the most bands are the likeliest neighbours
+            collisions = Counter()
+            for key in keys:
+                collisions.update(self._buckets.get(key, ()))
+
+            best_id, best_similarity = None, self.threshold
+            for entry_id, _ in collisions.most_common(self.max_candidates):
+                entry = self._entries[entry_id]
+                if entry['expires_at'] <= now:
+                    continue
+                similarity = float(dense[entry['indices']] @ entry['data'])
+                if similarity >= best_similarity:
+                    best_id, best_similarity = entry_id, similarity
+
+            if best_id is None:
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(best_id)
+            self._hits += 1
+            return self._entries[best_id]['text'], round(best_similarity, 4)
+
+    def add(self, namespace: str, prompt: str, text: str) -> None:
+        """Index a prompt and its response"""
+        if not self.enabled:
+            return
+
+        size = len(text.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+
+        vector, keys = self._embed(namespace, prompt)
+
+        with self._lock:
+            while self._entries and (len(self._entries) >= self.max_entries
+                                     or self._size + size > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = {
+                'indices': vector.indices,
+                'data': vector.data,
+                'keys': keys,
+                'text': text,
+                'size': size,
+                'expires_at': time.monotonic() + self.ttl
+            }
+            self._size += size
+            for key in keys:
+                self._buckets.setdefault(key, set()).add(entry_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+            self._size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'enabled': self.enabled,
+                'threshold': self.threshold,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'size_bytes': self._size,
+                'buckets': len(self._buckets),
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / lookups, 4) if lookups else 0.0,
+                'evictions': self._evictions
+            }
+
+    def _embed(self, namespace: str, prompt: str):
+        """Sparse unit vector plus the LSH bucket keys for each band"""
+        normalized = WHITESPACE.sub(' ', prompt).strip().lower()
+        vector = self._vectorizer.transform([normalized])
+        bits = np.asarray(vector @ self._planes).ravel() > 0
+        codes = bits.reshape(self.bands, self.band_bits).astype(np.int64) @ self._band_weights
+        scope = (namespace, tuple(GUARD_TOKENS.findall(normalized)))
+        keys = tuple((scope, band, int(code)) for band, code in enumerate(codes))
+        return vector, keys
+
+    def _remove(self, entry_id: int) -> None:
+        """Drop an entry and its bucket memberships; caller holds the lock"""
+        entry = self._entries.pop(entry_id)
+        self._size -= entry['size']
+        for key in entry['keys']:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[key]
+
+
+# Global semantic cache for Gemini prompts
+semantic_cache = SemanticCache(
+    threshold=settings.semantic_cache_threshold,
+    max_entries=settings.semantic_cache_max_entries,
+    max_bytes=settings.semantic_cache_max_bytes,
+    ttl=settings.cache_ttl,
+    enabled=settings.enable_cache and settings.semantic_cache_enabled
+)
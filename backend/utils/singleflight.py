@@ -0,0 +1,88 @@
+"""
+backend/utils/singleflight.py
+Coalesce identical in-flight calls into a single upstream request
+"""
+
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class _Call:
+    """State shared between the leader and followers of one in-flight call"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """
+    Run at most one call per key at a time.
+
+    The first caller for a key (the leader) runs the function inline, in its
+    own calling thread; concurrent callers with the same key block until it
+    finishes and receive the same result or the same exception. Nothing is
+    kept once the call finishes, so this is not a cache.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._leaders = 0
+        self._shared = 0
+        self._timeouts = 0
+
+    def do(self, key: str, fn: Callable[[], Any], timeout: Optional[float] = None) -> Tuple[Any, bool]:
+        """
+        Run fn for key, or wait for the in-flight call with the same key.
+
+        Returns (result, shared) where shared is True for followers. Followers
+        raise TimeoutError if the leader has not finished within timeout.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+                self._leaders += 1
+                leader = True
+            else:
+                call.followers += 1
+                self._shared += 1
+                leader = False
+
+        if not leader:
+            if not call.done.wait(timeout):
+                with self._lock:
+                    self._timeouts += 1
+                raise TimeoutError(f'Timed out after {timeout:g}s waiting for in-flight request')
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """Coalescing statistics"""
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                'leaders': self._leaders,
+                'shared': self._shared,
+                'timeouts': self._timeouts
+            }
+
+
+# Global single-flight group for Gemini calls
+single_flight = SingleFlight()
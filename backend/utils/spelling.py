@@ -0,0 +1,248 @@
+"""
+backend/utils/spelling.py
+Spelling suggestions from a precomputed symmetric-delete index
+"""
+
+import hashlib
+import os
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from config.settings import settings
+from backend.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+FREQUENCIES_PATH = os.path.join(DATA_DIR, 'spelling_frequencies_en.txt')
+
+MAX_DISTANCE = 2
+# Deletes are generated from this many leading characters only, which bounds
+# the index size without losing suggestions: long words rarely differ only
+# in their first characters
+PREFIX_LENGTH = 7
+
+# Distinct unknown words whose suggestions are remembered
+SUGGESTION_CACHE_SIZE = 8192
+
+# Letter histograms bound the edit distance from below: a-z, then anything else
+ALPHABET = 'abcdefghijklmnopqrstuvwxyz'
+
+
+def load_frequencies(path: str = FREQUENCIES_PATH) -> Dict[str, int]:
+    """Word -> corpus frequency from a 'word count' file; '#' lines are comments"""
+    frequencies = {}
+    with open(path, encoding='utf-8') as handle:
+        for line in handle:
+            if line.startswith('#'):
+                continue
+            word, count = line.split()
+            frequencies[word] = int(count)
+    return frequencies
+
+
+def deletes(term: str, distance: int) -> Set[str]:
+    """The term and every string obtained by deleting up to `distance` characters"""
+    found = {term}
+    frontier = {term}
+    for _ in range(distance):
+        frontier = {word[:i] + word[i + 1:] for word in frontier if len(word) > 1 for i in range(len(word))}
+        found |= frontier
+    return found
+
+
+def delete_hash(variant: str) -> int:
+    """Stable 64-bit key for a delete variant"""
+    return int.from_bytes(hashlib.blake2b(variant.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def letter_counts(word: str) -> np.ndarray:
+    counts = np.zeros(len(ALPHABET) + 1, dtype=np.int16)
+    for char in word:
+        position = ALPHABET.find(char)
+        counts[position if position >= 0 else len(ALPHABET)] += 1
+    return counts
+
+
+def letter_matrix(words: List[str], lengths: np.ndarray) -> np.ndarray:
+    """letter_counts for every word at once, shape (len(words), len(ALPHABET) + 1)"""
+    codes = np.frombuffer(''.join(words).encode('utf-32-le'), dtype=np.uint32).astype(np.int64)
+    buckets = np.where((codes >= ord('a')) & (codes <= ord('z')), codes - ord('a'), len(ALPHABET))
+    owners = np.repeat(np.arange(len(words)), lengths)
+    width = len(ALPHABET) + 1
+    return np.bincount(owners * width + buckets, minlength=len(words) * width).reshape(len(words), width).astype(np.int8)
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance, or limit + 1 once it must exceed limit"""
+    beyond = limit + 1
+    if abs(len(a) - len(b)) > limit:
+        return beyond
+
+    # Only the differing middle matters
+    prefix = 0
+    while prefix < len(a) and prefix < len(b) and a[prefix] == b[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < len(a) - prefix and suffix < len(b) - prefix and a[-1 - suffix] == b[-1 - suffix]:
+        suffix += 1
+    a = a[prefix:len(a) - suffix]
+    b = b[prefix:len(b) - suffix]
+    if not a or not b:
+        return min(max(len(a), len(b)), beyond)
+
+    # Cells further than `limit` from the diagonal always exceed it
+    previous_previous: List[int] = []
+    previous = [j if j <= limit else beyond for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        low, high = max(1, i - limit), min(len(b), i + limit)
+        current = [beyond] * (len(b) + 1)
+        current[0] = i if i <= limit else beyond
+        char = a[i - 1]
+        for j in range(low, high + 1):
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char != b[j - 1]))
+            if i > 1 and j > 1 and char == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, previous_previous[j - 2] + 1)
+            current[j] = value
+        if min(current[low - 1:high + 1]) > limit:
+            return beyond
+        previous_previous, previous = previous, current
+    return min(previous[-1], beyond)
+
+
+class SpellingIndex:
+    """
+    Symmetric-delete spelling index (the SymSpell approach).
+
+    Every dictionary word is stored under each string reachable from its
+    prefix by deleting up to MAX_DISTANCE characters. A lookup generates the
+    same deletes for the misspelling, so candidates are found with a few
+    hash probes instead of enumerating every possible edit, and only those
+    candidates are checked with a real edit distance.
+
+    The index is kept as two aligned numpy arrays, sorted delete hashes and
+    word ids, and saved as .npz next to a checksum of the word list, so it
+    is built once and later processes just load it.
+    """
+
+    def __init__(self, frequencies: Dict[str, int], keys: np.ndarray, word_ids: np.ndarray,
+                 max_distance: int = MAX_DISTANCE, prefix_length: int = PREFIX_LENGTH):
+        self.frequencies = frequencies
+        self.words = list(frequencies)
+        self.counts = np.fromiter(frequencies.values(), dtype=np.int64, count=len(self.words))
+        self.lengths = np.fromiter((len(word) for word in self.words), dtype=np.int64, count=len(self.words))
+        self.letters = letter_matrix(self.words, self.lengths)
+        self.keys = keys
+        self.word_ids = word_ids
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        # Typos recur across paragraphs and re-checks, so lookups are memoized per word
+        self._lookup_cached = lru_cache(maxsize=SUGGESTION_CACHE_SIZE)(self._lookup)
+
+    @classmethod
+    def build(cls, frequencies: Dict[str, int], max_distance: int = MAX_DISTANCE,
+              prefix_length: int = PREFIX_LENGTH) -> 'SpellingIndex':
+        hashes, ids = [], []
+        for word_id, word in enumerate(frequencies):
+            variants = deletes(word[:prefix_length], max_distance)
+            hashes.extend(delete_hash(variant) for variant in variants)
+            ids.extend([word_id] * len(variants))
+        keys = np.array(hashes, dtype=np.uint64)
+        order = np.argsort(keys, kind='stable')
+        return cls(frequencies, keys[order], np.array(ids, dtype=np.uint32)[order], max_distance, prefix_length)
+
+    @classmethod
+    def load(cls, path: str = '', frequencies_path: str = FREQUENCIES_PATH) -> 'SpellingIndex':
+        """Load the saved index for the word list, building and saving it when missing or stale"""
+        with open(frequencies_path, 'rb') as handle:
+            checksum = hashlib.blake2b(handle.read(), digest_size=16).hexdigest()
+        signature = f'{checksum}:{MAX_DISTANCE}:{PREFIX_LENGTH}'
+        frequencies = load_frequencies(frequencies_path)
+
+        if path and os.path.exists(path):
+            try:
+                with np.load(path) as saved:
+                    if str(saved['signature']) == signature:
+                        return cls(frequencies, saved['keys'], saved['word_ids'])
+            except (OSError, KeyError, ValueError) as e:
+                logger.warning(f'Spelling index at {path} unreadable, rebuilding: {str(e)}')
+
+        started = time.perf_counter()
+        index = cls.build(frequencies)
+        logger.info(f'Built spelling index: {len(index.keys)} deletes in {time.perf_counter() - started:.1f}s')
+        if path:
+            try:
+                directory = os.path.dirname(path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                # Written under a temporary name so concurrent workers never load half a file
+                partial = f'{path}.{os.getpid()}.npz'
+                np.savez(partial, keys=index.keys, word_ids=index.word_ids, signature=np.array(signature))
+                os.replace(partial, path)
+            except OSError as e:
+                logger.warning(f'Could not save spelling index: {str(e)}')
+        return index
+
+    def known(self, word: str) -> bool:
+        return word in self.frequencies
+
+    def suggest(self, word: str, limit: int = 3) -> List[Tuple[str, int]]:
+        """
+        (suggestion, distance) pairs for a lowercase word, closest first and
+        then most frequent; empty when nothing is within MAX_DISTANCE
+        """
+        return list(self._lookup_cached(word, limit))
+
+    def _lookup(self, word: str, limit: int) -> Tuple[Tuple[str, int], ...]:
+        variants = deletes(word[:self.prefix_length], self.max_distance)
+        probes = np.fromiter((delete_hash(variant) for variant in variants), dtype=np.uint64, count=len(variants))
+        starts = np.searchsorted(self.keys, probes, side='left')
+        ends = np.searchsorted(self.keys, probes, side='right')
+        hits = [self.word_ids[start:end] for start, end in zip(starts, ends) if end > start]
+        if not hits:
+            return ()
+
+        candidates = np.unique(np.concatenate(hits))
+        candidates = candidates[np.abs(self.lengths[candidates] - len(word)) <= self.max_distance]
+        # Each edit adds or removes at most one letter on either side, so letters
+        # missing from (or extra in) a candidate bound its distance from below
+        difference = self.letters[candidates] - letter_counts(word)
+        lower_bound = np.maximum(np.clip(difference, 0, None).sum(axis=1), np.clip(-difference, 0, None).sum(axis=1))
+
+        # Cheapest candidates first; once `limit` suggestions are found, the
+        # worst of them caps the distance still worth computing
+        bound = self.max_distance
+        scored: List[Tuple[int, int, str]] = []
+        for position in np.lexsort((-self.counts[candidates], lower_bound)):
+            if lower_bound[position] > bound:
+                break
+            candidate = self.words[candidates[position]]
+            distance = edit_distance(word, candidate, bound)
+            if distance <= bound:
+                scored = sorted(scored + [(distance, -self.frequencies[candidate], candidate)])[:limit]
+                if len(scored) == limit:
+                    bound = scored[-1][0]
+        return tuple((candidate, distance) for distance, _, candidate in scored)
+
+    def correction(self, word: str) -> Optional[str]:
+        suggestions = self.suggest(word, limit=1)
+        return suggestions[0][0] if suggestions else None
+
+
+def get_spelling_index() -> SpellingIndex:
+    """The process-wide spelling index, loaded (or built) on first use rather than at import"""
+    global _spelling_index
+    if _spelling_index is None:
+        with _spelling_index_lock:
+            if _spelling_index is None:
+                _spelling_index = SpellingIndex.load(settings.spelling_index_path)
+    return _spelling_index
+
+
+# Global spelling index, loaded once per process by get_spelling_index
+_spelling_index: Optional[SpellingIndex] = None
+_spelling_index_lock = threading.Lock()
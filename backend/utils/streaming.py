@@ -0,0 +1,42 @@
+"""
+backend/utils/streaming.py
+Server-sent events and NDJSON streaming helpers
+"""
+
+from typing import Any, Dict, Iterable
+
+from flask import Response, stream_with_context
+
+from backend.utils.json_provider import json_codec
+
+STREAM_MIMETYPES = {
+    'sse': 'text/event-stream',
+    'ndjson': 'application/x-ndjson'
+}
+
+
+def resolve_stream_format(value: Any) -> str:
+    """Map a request's 'stream' option to a stream format, or '' when not streaming"""
+    if value in (True, 'true', 'sse'):
+        return 'sse'
+    if value == 'ndjson':
+        return 'ndjson'
+    return ''
+
+
+def format_event(event: str, payload: Dict[str, Any], stream_format: str = 'sse') -> str:
+    """Encode one event as an SSE frame or an NDJSON line"""
+    if stream_format == 'ndjson':
+        return json_codec.dumps(dict(payload, event=event)) + '\n'
+    return f'event: {event}\ndata: {json_codec.dumps(payload)}\n\n'
+
+
+def streaming_response(events: Iterable[str], stream_format: str = 'sse') -> Response:
+    """Wrap an event generator in an unbuffered streaming response"""
+    response = Response(
+        stream_with_context(events),
+        mimetype=STREAM_MIMETYPES.get(stream_format, STREAM_MIMETYPES['sse'])
+    )
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
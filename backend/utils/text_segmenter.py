@@ -0,0 +1,128 @@
+"""
+backend/utils/text_segmenter.py
+Streaming sentence and word segmentation shared by the text services
+"""
+
+import re
+from itertools import islice
+from typing import Iterable, Iterator, Optional, Union
+
+# Latin terminators only end a sentence before whitespace, so decimals (3.14),
+# versions (v1.2) and hostnames (example.com) never split. CJK, Arabic and
+# Devanagari terminators end a sentence wherever they appear. A blank line
+# always ends one, so headings without punctuation stand alone.
+BOUNDARY = re.compile(
+    r'[.!?…‽]+["\'”’»)\]]*(?=\s)'
+    r'|[。！？｡؟۔।॥]+["\'”’」』)）]*'
+    r'|\n[ \t]*\n'
+)
+NEXT_CHAR = re.compile(r'\S')
+WORD = re.compile(r'\S+')
+
+# Tokens that end with a period without ending the sentence
+ABBREVIATIONS = frozenset({
+    'mr', 'mrs', 'ms', 'dr', 'prof', 'sr', 'jr', 'st', 'mt', 'vs', 'etc', 'approx', 'dept', 'eds',
+    'inc', 'ltd', 'co', 'corp', 'gen', 'gov', 'sen', 'rep', 'capt', 'lt', 'col', 'sgt', 'jan', 'feb',
+    'mar', 'apr', 'jun', 'jul', 'aug', 'sep', 'sept', 'oct', 'nov', 'dec', 'e.g', 'i.e', 'cf', 'a.m',
+    'p.m', 'u.s', 'u.k', 'ph.d'
+})
+# Abbreviations that are also ordinary words ("the answer is no."), so only taken as such before a number
+NUMBER_ABBREVIATIONS = frozenset({'no', 'nos', 'fig', 'figs', 'vol'})
+# Of those, the ones that still end a sentence when a capitalized word follows
+TERMINAL_ABBREVIATIONS = frozenset({'etc', 'inc', 'ltd', 'co', 'corp', 'a.m', 'p.m', 'u.s', 'u.k'})
+
+# How far back to look for the token before a period
+LOOKBEHIND = 32
+
+
+def _is_boundary(buffer: str, match: 're.Match') -> Optional[bool]:
+    """
+    Whether a candidate terminator ends a sentence. Returns None when the
+    answer depends on text that has not arrived yet.
+    """
+    start, end = match.span()
+    if buffer[start] not in '.…':
+        return True
+
+    # Usually a single space separates sentences, so try the next character first
+    next_char = buffer[end + 1] if end + 1 < len(buffer) else ''
+    if not next_char or next_char.isspace():
+        following = NEXT_CHAR.search(buffer, end)
+        if following is None:
+            return None
+        next_char = following.group()
+
+    # The token the period belongs to, without leading brackets or quotes
+    window = max(0, start - LOOKBEHIND)
+    word_start = max(buffer.rfind(' ', window, start), buffer.rfind('\n', window, start), window - 1) + 1
+    word = buffer[word_start:start].lstrip('(["\'“‘').lower()
+    if word in NUMBER_ABBREVIATIONS and next_char.isdigit():
+        # No. 5, Fig. 3
+        return False
+    if word in ABBREVIATIONS or (len(word) == 1 and word.isalpha()):
+        # Titles and initials never end a sentence; etc. and Inc. do before a capital
+        return word in TERMINAL_ABBREVIATIONS and next_char.isupper()
+    if '.' in word and word.replace('.', '').isalpha():
+        # Dotted abbreviations such as e.g or U.S.A
+        return next_char.isupper()
+
+    # "approx. five", "... and then": a lowercase continuation is the same sentence
+    return not next_char.islower()
+
+
+def iter_sentences(source: Union[str, Iterable[str]], max_sentences: Optional[int] = None) -> Iterator[str]:
+    """
+    Yield trimmed sentences from a string or from an iterable of text chunks.
+
+    Sentences are produced as soon as their boundary is certain and only the
+    unfinished tail is buffered, so memory does not grow with the document.
+    With max_sentences the scan stops once that many have been produced.
+    """
+    if max_sentences is not None and max_sentences <= 0:
+        return
+    chunks = (source,) if isinstance(source, str) else source
+    buffer = ''
+    emitted = 0
+
+    for chunk in chunks:
+        buffer += chunk
+        start = 0
+        for match in BOUNDARY.finditer(buffer):
+            boundary = _is_boundary(buffer, match)
+            if boundary is None or (match.end() == len(buffer) and match.group()[0] != '\n'):
+                # A closing quote or the next word may still be on its way
+                break
+            if not boundary:
+                continue
+            sentence = buffer[start:match.end()].strip()
+            start = match.end()
+            if sentence:
+                yield sentence
+                emitted += 1
+                if max_sentences is not None and emitted >= max_sentences:
+                    return
+        buffer = buffer[start:]
+
+    tail = buffer.strip()
+    if tail:
+        yield tail
+
+
+def iter_words(text: str) -> Iterator[str]:
+    """Yield whitespace-separated words without splitting the whole text"""
+    for match in WORD.finditer(text):
+        yield match.group()
+
+
+def first_sentences(text: Union[str, Iterable[str]], count: int) -> list:
+    """The first `count` sentences; stops scanning once they are found"""
+    return list(iter_sentences(text, max_sentences=count))
+
+
+def first_words(text: str, count: int) -> list:
+    """The first `count` words; stops scanning once they are found"""
+    return list(islice(iter_words(text), count))
+
+
+def count_sentences(source: Union[str, Iterable[str]]) -> int:
+    return sum(1 for _ in iter_sentences(source))
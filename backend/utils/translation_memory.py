@@ -0,0 +1,159 @@
+"""
+backend/utils/translation_memory.py
+Segment-level translation memory: an in-process LRU in front of a shared SQLite store
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Tuple
+
+from config.settings import settings
+from backend.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# SQLite's default limit on bound parameters is 999
+LOOKUP_BATCH = 500
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS segments (
+    digest TEXT NOT NULL,
+    source TEXT NOT NULL,
+    target TEXT NOT NULL,
+    translation TEXT NOT NULL,
+    PRIMARY KEY (digest, source, target)
+) WITHOUT ROWID
+'''
+
+
+def segment_digest(segment: str) -> str:
+    """Stable key for a source segment, identical across processes and restarts"""
+    return hashlib.blake2b(segment.encode('utf-8'), digest_size=20).hexdigest()
+
+
+class TranslationMemory:
+    """
+    Stores translations per segment under (digest, source, target).
+
+    Lookups go to a bounded in-process LRU first and to SQLite for the
+    rest. The database runs in WAL mode, so gunicorn workers share one file
+    and translations survive restarts. Without a path only the LRU is kept.
+    The database file is opened on first use, not at construction.
+    """
+
+    def __init__(self, path: str = '', max_entries: int = 50000):
+        self.path = path
+        self.max_entries = max_entries
+        self._lru: 'OrderedDict[Tuple[str, str, str], str]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stored': 0}
+
+    def lookup(self, digests: Iterable[str], source: str, target: str) -> Dict[str, str]:
+        """Translations known for the given segment digests"""
+        found: Dict[str, str] = {}
+        missing = []
+        unique = list(dict.fromkeys(digests))
+        with self._lock:
+            for digest in unique:
+                key = (digest, source, target)
+                translation = self._lru.get(key)
+                if translation is None:
+                    missing.append(digest)
+                else:
+                    self._lru.move_to_end(key)
+                    found[digest] = translation
+            self._stats['memory_hits'] += len(found)
+
+        if missing and self.path:
+            from_disk = self._select(missing, source, target)
+            with self._lock:
+                for digest, translation in from_disk.items():
+                    self._remember((digest, source, target), translation)
+                self._stats['disk_hits'] += len(from_disk)
+            found.update(from_disk)
+
+        with self._lock:
+            self._stats['misses'] += len(unique) - len(found)
+        return found
+
+    def store(self, translations: Dict[str, str], source: str, target: str) -> None:
+        """Remember translations keyed by segment digest"""
+        if not translations:
+            return
+        with self._lock:
+            for digest, translation in translations.items():
+                self._remember((digest, source, target), translation)
+            self._stats['stored'] += len(translations)
+
+        if self.path:
+            try:
+                connection = self._connection()
+                with connection:
+                    connection.executemany(
+                        'INSERT OR REPLACE INTO segments (digest, source, target, translation) VALUES (?, ?, ?, ?)',
+                        [(digest, source, target, translation) for digest, translation in translations.items()]
+                    )
+            except sqlite3.Error as e:
+                logger.warning(f'Translation memory write failed: {e}')
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._stats, memory_entries=len(self._lru), max_entries=self.max_entries,
+                        persistent=bool(self.path))
+
+    def clear(self) -> None:
+        """Forget everything, on disk too"""
+        with self._lock:
+            self._lru.clear()
+        if self.path:
+            connection = self._connection()
+            with connection:
+                connection.execute('DELETE FROM segments')
+
+    def _select(self, digests: list, source: str, target: str) -> Dict[str, str]:
+        found: Dict[str, str] = {}
+        try:
+            connection = self._connection()
+            for offset in range(0, len(digests), LOOKUP_BATCH):
+                batch = digests[offset:offset + LOOKUP_BATCH]
+                rows = connection.execute(
+                    'SELECT digest, translation FROM segments WHERE source = ? AND target = ? '
+                    f'AND digest IN ({",".join("?" * len(batch))})',
+                    [source, target, *batch]
+                )
+                found.update(rows)
+        except sqlite3.Error as e:
+            logger.warning(f'Translation memory read failed: {e}')
+        return found
+
+    def _remember(self, key: Tuple[str, str, str], translation: str) -> None:
+        """Add to the LRU; caller holds the lock"""
+        self._lru[key] = translation
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread, created on first use"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+
+# Global translation memory shared by translator service instances; in-process only unless a path is set
+translation_memory = TranslationMemory(
+    path=settings.translation_memory_path,
+    max_entries=settings.translation_memory_max_entries
+)
@@ -3,14 +3,152 @@ backend/utils/validators.py
 Request validation utilities
 """
 
-from typing import Dict, Any, List
-from flask import Request
+import re
+from functools import wraps
+from typing import Dict, Any, List, Callable, Optional, Sequence, Tuple
+from flask import Request, g, jsonify, request as current_request
+
+MISSING = object()
+
+EMAIL_PATTERN = re.compile(r'^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}$')
+
+TYPE_NAMES = {
+    str: 'a string',
+    int: 'an integer',
+    float: 'a number',
+    bool: 'a boolean',
+    list: 'a list',
+    dict: 'an object'
+}
+
+
+class SchemaError(ValueError):
+    """Raised when a request body does not match its schema"""
+
+
+class Field:
+    """
+    One request body field: expected type, whether it is required, its
+    default, and an optional maximum that numeric values are clamped to
+    """
+    
+    __slots__ = ('name', 'kind', 'required', 'default', 'choices', 'maximum', 'message')
+    
+    def __init__(self, name: str, kind: Optional[type] = None, required: bool = False,
+                 default: Any = MISSING, choices: Optional[Sequence[Any]] = None,
+                 maximum: Any = None, message: Optional[str] = None):
+        self.name = name
+        self.kind = kind
+        self.required = required
+        self.default = default
+        self.choices = frozenset(choices) if choices is not None else None
+        self.maximum = maximum
+        self.message = message
+
+
+def _type_check(kind: Optional[type]) -> Optional[Callable[[Any], bool]]:
+    """Compiled isinstance check; bools never pass as numbers"""
+    if kind is None:
+        return None
+    if kind is int:
+        return lambda value: type(value) is int
+    if kind is float:
+        return lambda value: isinstance(value, (int, float)) and not isinstance(value, bool)
+    return lambda value: isinstance(value, kind)
+
+
+class Schema:
+    """
+    Request body schema compiled once per route.
+    
+    Construction flattens the fields into tuples of required names, type
+    checks, choice sets and defaults, so validating a body is a few dict
+    lookups per field. Defaults and maximums may be callables, evaluated per
+    request, for values read from settings or mutable containers.
+    """
+    
+    def __init__(self, *fields: Field, one_of: Sequence[Tuple[Sequence[str], str]] = (),
+                 message: Optional[str] = None):
+        self.fields = fields
+        self._required = tuple(
+            (f.name, f.message or f'{f.name} is required') for f in fields if f.required
+        )
+        self._one_of = tuple((tuple(names), error) for names, error in one_of)
+        # An empty body reports the first missing requirement, as the hand-written checks did
+        first_error = (self._required or self._one_of or ((None, 'Request body is required'),))[0][1]
+        self.message = message or first_error
+        self._checks = tuple(
+            (f.name, _type_check(f.kind), f'{f.name} must be {TYPE_NAMES.get(f.kind, f.kind.__name__)}')
+            for f in fields if f.kind is not None
+        )
+        self._choices = tuple(
+            (f.name, f.choices, f'{f.name} must be one of: {", ".join(sorted(map(str, f.choices)))}')
+            for f in fields if f.choices is not None
+        )
+        self._defaults = tuple((f.name, f.default) for f in fields if f.default is not MISSING)
+        self._maximums = tuple((f.name, f.maximum) for f in fields if f.maximum is not None)
+    
+    def validate(self, data: Any) -> Dict[str, Any]:
+        """Check a parsed body and return a copy with defaults filled in"""
+        if not isinstance(data, dict) or not data:
+            raise SchemaError(self.message)
+        
+        for name, error in self._required:
+            if name not in data:
+                raise SchemaError(error)
+        for names, error in self._one_of:
+            if not any(name in data for name in names):
+                raise SchemaError(error)
+        
+        for name, check, error in self._checks:
+            value = data.get(name)
+            if value is not None and not check(value):
+                raise SchemaError(error)
+        for name, choices, error in self._choices:
+            if name in data and data[name] not in choices:
+                raise SchemaError(error)
+        
+        body = dict(data)
+        for name, default in self._defaults:
+            if body.get(name) is None:
+                body[name] = default() if callable(default) else default
+        for name, maximum in self._maximums:
+            limit = maximum() if callable(maximum) else maximum
+            if isinstance(body.get(name), (int, float)) and body[name] > limit:
+                body[name] = limit
+        return body
+
+
+def parsed_body() -> Any:
+    """The request's JSON body, parsed once per request (None when absent or malformed)"""
+    if 'parsed_body' not in g:
+        g.parsed_body = current_request.get_json(silent=True)
+    return g.parsed_body
+
+
+def request_body() -> Dict[str, Any]:
+    """The body validated by the route's schema, falling back to the raw parsed body"""
+    return g.get('validated_body') or parsed_body()
+
+
+def validate_body(schema: Schema) -> Callable:
+    """Validate the JSON body against a compiled schema before the view runs; 400 on mismatch"""
+    def decorator(view: Callable) -> Callable:
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                g.validated_body = schema.validate(parsed_body())
+            except SchemaError as e:
+                return jsonify({'error': str(e)}), 400
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
 
 
 def validate_request(request: Request, required_fields: List[str]) -> tuple[bool, str]:
     """Validate request has required fields"""
     
-    data = request.get_json()
+    data = parsed_body()
     
     if not data:
         return False, 'Request body is required'
@@ -26,6 +164,12 @@ def validate_request(request: Request, required_fields: List[str]) -> tuple[bool
     return True, 'Valid'
 
 
+def validate_email(email: str) -> bool:
+    """Validate email address format"""
+    
+    return bool(email) and EMAIL_PATTERN.match(email) is not None
+
+
 def validate_sql_query(query: str) -> tuple[bool, str]:
     """Validate SQL query"""
     
@@ -0,0 +1,206 @@
+"""
+backend/utils/workflow.py
+Dependency-aware parallel scheduler for DAG workflows, memoized by node inputs
+"""
+
+import hashlib
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, List, Optional
+
+from config.settings import settings
+from backend.utils.cache import ResponseCache, canonical_key
+from backend.utils.concurrency import get_executor
+
+
+class WorkflowError(ValueError):
+    """Raised for malformed workflow graphs"""
+
+
+def parse_workflow(raw: Any, max_nodes: int) -> Dict[str, Dict[str, Any]]:
+    """
+    Validate a workflow payload and return its nodes keyed by id.
+
+    The payload is either a list of nodes or a dict with a 'nodes' list. Each
+    node needs a unique string 'id' and may list the ids it takes 'inputs' from.
+    """
+    nodes = raw.get('nodes') if isinstance(raw, dict) else raw
+    if not isinstance(nodes, list) or not nodes:
+        raise WorkflowError('Workflow must contain a non-empty list of nodes')
+    if len(nodes) > max_nodes:
+        raise WorkflowError(f'Workflow exceeds the maximum of {max_nodes} nodes')
+
+    parsed: Dict[str, Dict[str, Any]] = {}
+    for node in nodes:
+        if not isinstance(node, dict) or not isinstance(node.get('id'), str) or not node['id']:
+            raise WorkflowError('Every workflow node needs a string id')
+        if node['id'] in parsed:
+            raise WorkflowError(f'Duplicate workflow node id: {node["id"]}')
+
+        inputs = node.get('inputs', [])
+        if not isinstance(inputs, list) or not all(isinstance(i, str) for i in inputs):
+            raise WorkflowError(f'Inputs of node {node["id"]} must be a list of node ids')
+        parsed[node['id']] = dict(node, inputs=list(dict.fromkeys(inputs)))
+
+    topological_order(parsed)
+    return parsed
+
+
+def topological_order(nodes: Dict[str, Dict[str, Any]]) -> List[str]:
+    """Order nodes so every node follows its inputs; raises WorkflowError on cycles"""
+    remaining = {}
+    dependents: Dict[str, List[str]] = {node_id: [] for node_id in nodes}
+    for node_id, spec in nodes.items():
+        for dependency in spec.get('inputs', []):
+            if dependency not in nodes:
+                raise WorkflowError(f'Node {node_id} depends on unknown node {dependency}')
+            dependents[dependency].append(node_id)
+        remaining[node_id] = len(spec.get('inputs', []))
+
+    ready = deque(node_id for node_id, count in remaining.items() if count == 0)
+    order = []
+    while ready:
+        node_id = ready.popleft()
+        order.append(node_id)
+        for dependent in dependents[node_id]:
+            remaining[dependent] -= 1
+            if remaining[dependent] == 0:
+                ready.append(dependent)
+
+    if len(order) != len(nodes):
+        cyclic = sorted(node_id for node_id in nodes if node_id not in order)
+        raise WorkflowError(f'Workflow contains a cycle through: {", ".join(cyclic)}')
+    return order
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class WorkflowScheduler:
+    """
+    Runs each workflow node as soon as all of its inputs are available.
+
+    Ready nodes are dispatched in parallel, at most max_concurrency at a time,
+    and receive their inputs' outputs as a dict. A node's result is memoized
+    under its own definition, the run context and the digests of its inputs,
+    so re-running a workflow with one changed node recomputes only that node
+    and whatever is downstream of it. A failed or timed-out node marks its
+    descendants as skipped without stopping independent branches.
+    """
+
+    def __init__(self, max_concurrency: int, memo: Optional[ResponseCache] = None,
+                 executor: Optional[ThreadPoolExecutor] = None):
+        self.max_concurrency = max(int(max_concurrency), 1)
+        self.memo = memo
+        self.executor = executor or get_executor()
+
+    def run(self, nodes: Dict[str, Dict[str, Any]],
+            execute: Callable[[str, Dict[str, Any], Dict[str, str]], str],
+            context: Any = None, timeout: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """Run the graph and return one outcome per node, in topological order"""
+        order = topological_order(nodes)
+        dependents: Dict[str, List[str]] = {node_id: [] for node_id in nodes}
+        waiting = {}
+        for node_id in order:
+            waiting[node_id] = set(nodes[node_id]['inputs'])
+            for dependency in nodes[node_id]['inputs']:
+                dependents[dependency].append(node_id)
+
+        run_started = time.monotonic()
+        outputs: Dict[str, str] = {}
+        outcomes: Dict[str, Dict[str, Any]] = {}
+        ready = deque(node_id for node_id in order if not waiting[node_id])
+        running: Dict[Any, tuple] = {}
+
+        def release(node_id):
+            for dependent in dependents[node_id]:
+                waiting[dependent].discard(node_id)
+                if not waiting[dependent]:
+                    ready.append(dependent)
+
+        def record(node_id, started, result=None, error=None, memoized=False):
+            now = time.monotonic()
+            outcomes[node_id] = {
+                'status': 'failed' if error else 'success',
+                'result': result,
+                'error': error,
+                'memoized': memoized,
+                'inputs': nodes[node_id]['inputs'],
+                'started_ms': round((started - run_started) * 1000, 2),
+                'latency_ms': round((now - started) * 1000, 2)
+            }
+            if error is None:
+                outputs[node_id] = result
+                release(node_id)
+
+        while ready or running:
+            while ready and len(running) < self.max_concurrency:
+                node_id = ready.popleft()
+                spec = nodes[node_id]
+                inputs = {dependency: outputs[dependency] for dependency in spec['inputs']}
+                key = canonical_key(
+                    node=spec,
+                    context=context,
+                    inputs={dependency: _digest(text) for dependency, text in inputs.items()}
+                )
+
+                cached = self.memo.get(key) if self.memo is not None else None
+                if cached is not None:
+                    record(node_id, time.monotonic(), result=cached, memoized=True)
+                    continue
+
+                future = self.executor.submit(execute, node_id, spec, inputs)
+                running[future] = (node_id, key, time.monotonic())
+
+            if not running:
+                continue
+
+            wait_for = None
+            if timeout is not None:
+                earliest = min(started for _, _, started in running.values())
+                wait_for = max(earliest + timeout - time.monotonic(), 0)
+
+            done, _ = wait(list(running), timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                node_id, key, started = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    record(node_id, started, error=str(e))
+                    continue
+                result = '' if result is None else str(result)
+                if self.memo is not None:
+                    self.memo.set(key, result)
+                record(node_id, started, result=result)
+
+            if timeout is not None:
+                # Abandon nodes running past their own timeout; their results are discarded
+                now = time.monotonic()
+                for future, (node_id, _, started) in list(running.items()):
+                    if now - started >= timeout:
+                        future.cancel()
+                        del running[future]
+                        record(node_id, started, error=f'Timed out after {timeout:g}s')
+
+        ordered = {}
+        for node_id in order:
+            ordered[node_id] = outcomes.get(node_id) or {
+                'status': 'skipped',
+                'result': None,
+                'error': 'Upstream dependency failed',
+                'memoized': False,
+                'inputs': nodes[node_id]['inputs'],
+                'started_ms': None,
+                'latency_ms': 0.0
+            }
+        return ordered
+
+
+# Global memo of workflow node results
+workflow_memo = ResponseCache(
+    max_bytes=settings.workflow_memo_max_bytes,
+    ttl=settings.cache_ttl,
+    enabled=settings.enable_cache
+)
@@ -0,0 +1,80 @@
+"""
+benchmarks/bench_compression.py
+Bandwidth and CPU cost of response compression per encoding and level, buffered and streamed
+
+Run with: python -m benchmarks.bench_compression
+"""
+
+import random
+import time
+
+from backend.utils.compression import AVAILABLE_ENCODINGS, StreamCompressor, compress_bytes
+from backend.utils.json_provider import json_codec
+from benchmarks.bench_json import build_payloads
+
+LEVELS = {
+    'gzip': (1, 6, 9),
+    'zstd': (1, 3, 9, 19),
+    'br': (1, 5, 9, 11),
+}
+
+
+def encode(payload):
+    if isinstance(payload, list):
+        return [json_codec.dumps_bytes(item) + b'\n' for item in payload]
+    return json_codec.dumps_bytes(payload)
+
+
+def timed(fn, budget=0.5):
+    """Mean milliseconds per call, repeating until the time budget is spent"""
+    calls = 0
+    started = time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= budget:
+            return elapsed / calls * 1000
+
+
+def stream(lines, encoding, level):
+    """What the middleware does for NDJSON: compress and flush every line"""
+    compressor = StreamCompressor(encoding, level)
+    size = 0
+    for line in lines:
+        size += len(compressor.compress(line)) + len(compressor.flush())
+    return size + len(compressor.finish())
+
+
+def main():
+    print(f'Available encodings: {", ".join(AVAILABLE_ENCODINGS)} (install zstandard / brotli for the rest)\n')
+    payloads = build_payloads(random.Random(11))
+
+    print(f'{"payload":<36} {"codec":<8} {"size KB":>9} {"ratio":>7} {"ms":>9} {"MB/s":>8}')
+    for endpoint, payload in payloads.items():
+        encoded = encode(payload)
+        if isinstance(encoded, list):
+            # Buffered size of the whole stream, for comparison with the streamed rows below
+            encoded = b''.join(encoded)
+        for encoding in AVAILABLE_ENCODINGS:
+            for level in LEVELS[encoding]:
+                size = len(compress_bytes(encoded, encoding, level))
+                ms = timed(lambda: compress_bytes(encoded, encoding, level))
+                print(f'{endpoint:<36} {f"{encoding}-{level}":<8} {size / 1024:>9.1f} '
+                      f'{size / len(encoded):>7.3f} {ms:>9.3f} {len(encoded) / 1024 / 1024 / (ms / 1000):>8.1f}')
+        print(f'{endpoint:<36} {"identity":<8} {len(encoded) / 1024:>9.1f}')
+
+    # Streamed NDJSON pays a flush per event so every line is decodable on arrival
+    lines = encode(payloads['/api/chrome-ai/batch (1000 lines)'])
+    total = sum(len(line) for line in lines)
+    print(f'\n{"streamed batch, flush per line":<36} {"codec":<8} {"size KB":>9} {"ratio":>7} {"ms":>9} {"MB/s":>8}')
+    for encoding in AVAILABLE_ENCODINGS:
+        for level in LEVELS[encoding]:
+            size = stream(lines, encoding, level)
+            ms = timed(lambda: stream(lines, encoding, level))
+            print(f'{"":<36} {f"{encoding}-{level}":<8} {size / 1024:>9.1f} '
+                  f'{size / total:>7.3f} {ms:>9.3f} {total / 1024 / 1024 / (ms / 1000):>8.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+benchmarks/bench_json.py
+Per-endpoint JSON encode/decode time: Flask's default encoder against the shared codec backends
+
+Run with: python -m benchmarks.bench_json
+"""
+
+import json
+import random
+import time
+from datetime import datetime
+
+from backend.utils.json_provider import JSONCodec, _default, orjson
+
+
+def flask_default_dumps(obj):
+    """What Flask's DefaultJSONProvider does for jsonify"""
+    return json.dumps(obj, default=_default, ensure_ascii=True, sort_keys=True)
+
+
+def build_payloads(rng):
+    words = ['cluster', 'latency', 'replica', 'ingress', 'budget', 'quota', 'pipeline', 'schema']
+
+    def sentence(n):
+        return ' '.join(rng.choice(words) for _ in range(n))
+
+    summarize = {
+        'type': 'chrome_ai_summarizer',
+        'config': {'text_ref': 'f' * 64, 'text_length': 48213, 'summary_type': 'tldr',
+                   'length': 'medium', 'use_nano': True},
+        'metadata': {'model': 'gemini-nano', 'processing': 'on-device', 'original_length': 48213}
+    }
+    devops = {
+        'success': True,
+        'analysis': '\n'.join(sentence(20) for _ in range(2000)),
+        'recommendations': [
+            {'text': sentence(25), 'priority': 'high', 'category': 'security', 'line': i}
+            for i in range(15)
+        ],
+        'severity_levels': {'critical': 2, 'high': 5, 'medium': 7, 'low': 1},
+        'metadata': {'chunks': 12, 'timestamp': datetime.utcnow().isoformat()}
+    }
+    workflow = {
+        'success': True,
+        'node_results': [
+            {'node': f'n{i}', 'status': 'success', 'result': sentence(400), 'memoized': bool(i % 2),
+             'inputs': [f'n{i - 1}'] if i else [], 'started_ms': i * 10.5, 'latency_ms': 812.4}
+            for i in range(20)
+        ],
+        'metadata': {'nodes': 20, 'max_concurrency': 4}
+    }
+    query_rows = {
+        'success': True,
+        'rows': [
+            {'date': '2024-01-%02d' % (i % 28 + 1), 'api_type': rng.choice(words),
+             'request_count': rng.randint(0, 10 ** 6), 'avg_response_time': rng.random() * 900,
+             'success_rate': rng.random()}
+            for i in range(10000)
+        ],
+        'total_rows': 10000
+    }
+    batch_events = [
+        {'event': 'result', 'success': True, 'batch_id': 'batch_' + 'a' * 32, 'index': i,
+         'type': 'rewrite', 'result': {'config': {'rewrite_goal': 'improve'}}, 'latency_ms': 1.2}
+        for i in range(1000)
+    ]
+    return {
+        '/api/chrome-ai/summarize': summarize,
+        '/api/gemini/analyze-devops': devops,
+        '/api/gemini/multi-agent (workflow)': workflow,
+        '/api/bigquery/execute': query_rows,
+        '/api/chrome-ai/batch (1000 lines)': batch_events,
+    }
+
+
+def timed(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    rng = random.Random(11)
+    codecs = {'stdlib': JSONCodec('stdlib')}
+    if orjson is not None:
+        codecs['orjson'] = JSONCodec('orjson')
+    else:
+        print('orjson not installed; comparing Flask defaults with the stdlib codec only\n')
+
+    print(f'{"endpoint":<36} {"size KB":>9} {"flask ms":>9} ' + ' '.join(f'{name + " ms":>10}' for name in codecs))
+    for endpoint, payload in build_payloads(rng).items():
+        if isinstance(payload, list):
+            # NDJSON streams encode one event per line
+            encode_default = lambda: [flask_default_dumps(item) for item in payload]
+            encoders = {name: (lambda c=c: [c.dumps(item) for item in payload]) for name, c in codecs.items()}
+            size = sum(len(flask_default_dumps(item)) for item in payload)
+        else:
+            encode_default = lambda: flask_default_dumps(payload)
+            encoders = {name: (lambda c=c: c.dumps_bytes(payload)) for name, c in codecs.items()}
+            size = len(flask_default_dumps(payload))
+
+        repeat = max(3, min(200, int(2e6 / max(size, 1))))
+        row = f'{endpoint:<36} {size / 1024:>9.1f} {timed(encode_default, repeat):>9.3f} '
+        row += ' '.join(f'{timed(encode, repeat):>10.3f}' for encode in encoders.values())
+        print(row)
+
+    # Request decoding for a large DevOps analysis body
+    body = json.dumps({'code': '\n'.join(f'  key_{i}: value_{i}' for i in range(40000)), 'type': 'kubernetes'})
+    print(f'\n{"decode 1 MB analyze-devops request":<36} {len(body) / 1024:>9.1f} '
+          f'{timed(lambda: json.loads(body), 20):>9.3f} '
+          + ' '.join(f'{timed(lambda c=c: c.loads(body), 20):>10.3f}' for c in codecs.values()))
+
+
+if __name__ == '__main__':
+    main()
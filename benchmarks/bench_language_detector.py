@@ -0,0 +1,68 @@
+"""
+benchmarks/bench_language_detector.py
+Language detection accuracy on held-out sample sentences and throughput, one call per snippet vs batched
+
+Run with: python -m benchmarks.bench_language_detector
+"""
+
+import random
+import time
+
+from backend.utils.language_detector import LanguageDetector, build_profiles, load_samples
+from backend.utils.text_segmenter import iter_sentences
+
+FOLDS = 5
+
+
+def held_out_accuracy(samples):
+    """Accuracy per snippet length, each fold scored with profiles built from the other folds"""
+    sentences = {language: list(iter_sentences(text)) for language, text in samples.items()}
+    hits = {20: 0, 60: 0, None: 0}
+    total = 0
+    for fold in range(FOLDS):
+        training = {
+            language: ' '.join(s for i, s in enumerate(items) if i % FOLDS != fold)
+            for language, items in sentences.items()
+        }
+        detector = LanguageDetector(build_profiles(training))
+        held_out = [(language, s) for language, items in sentences.items()
+                    for i, s in enumerate(items) if i % FOLDS == fold]
+        total += len(held_out)
+        for length in hits:
+            results = detector.detect_batch([s[:length] for _, s in held_out])
+            hits[length] += sum(result[0] == language for result, (language, _) in zip(results, held_out))
+    return {length: hits[length] / total for length in hits}, total
+
+
+def main():
+    samples = load_samples()
+    accuracy, total = held_out_accuracy(samples)
+    print(f'Held-out accuracy over {total} sentences ({FOLDS} folds)')
+    for length, value in accuracy.items():
+        print(f'  {"full sentence" if length is None else f"first {length} chars":<16} {value:.1%}')
+
+    detector = LanguageDetector(build_profiles(samples))
+    sentences = [s for text in samples.values() for s in iter_sentences(text)]
+    rng = random.Random(7)
+
+    print(f'\n{"snippet":<10} {"mode":<14} {"snippets/s":>12}')
+    for length in (20, 60, 200):
+        snippets = []
+        while len(snippets) < 10000:
+            start = rng.randrange(len(sentences))
+            snippets.append(' '.join(sentences[start:start + 6])[:length])
+
+        started = time.perf_counter()
+        for snippet in snippets[:1000]:
+            detector.detect(snippet)
+        print(f'{length:<10} {"one per call":<14} {1000 / (time.perf_counter() - started):>12,.0f}')
+
+        for batch_size in (100, 10000):
+            started = time.perf_counter()
+            for offset in range(0, len(snippets), batch_size):
+                detector.detect_batch(snippets[offset:offset + batch_size])
+            print(f'{length:<10} {f"batch {batch_size}":<14} {len(snippets) / (time.perf_counter() - started):>12,.0f}')
+
+
+if __name__ == '__main__':
+    main()
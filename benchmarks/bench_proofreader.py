@@ -0,0 +1,71 @@
+"""
+benchmarks/bench_proofreader.py
+Proofreading latency on long documents: full checks, unchanged re-checks and single-paragraph edits
+
+Run with: python -m benchmarks.bench_proofreader
+"""
+
+import random
+import time
+
+from backend.services.proofreader_service import ProofreaderService
+from config.settings import settings
+from backend.utils.spelling import SpellingIndex, load_frequencies
+from benchmarks.bench_summarizer import build_document
+
+TYPOS = ['recieve', 'teh', 'seperate', 'definately', 'occured', 'wierd', 'untill', 'goverment']
+SLIPS = ['the the', 'should of', 'in order to', 'very', ' ,', '..']
+
+
+def build_draft(target_bytes, seed=7):
+    """A generated document with a typo or rule violation in roughly every other sentence"""
+    rng = random.Random(seed)
+    paragraphs = []
+    for paragraph in build_document(target_bytes, seed).split('\n\n'):
+        words = paragraph.split(' ')
+        for _ in range(max(1, len(words) // 25)):
+            position = rng.randrange(1, len(words))
+            words.insert(position, rng.choice(TYPOS + SLIPS))
+        paragraphs.append(' '.join(words))
+    return '\n\n'.join(paragraphs)
+
+
+def timed(fn, repeat=1):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - started) / repeat * 1000, result
+
+
+def main():
+    frequencies = load_frequencies()
+    build_ms, _ = timed(lambda: SpellingIndex.build(frequencies))
+    load_ms, _ = timed(lambda: SpellingIndex.load(settings.spelling_index_path))
+    print(f'Spelling index: {build_ms:.0f} ms to build, {load_ms:.0f} ms to load from the saved file\n')
+
+    checks = ['grammar', 'spelling', 'punctuation', 'style']
+    print(f'{"document":>9} {"paragraphs":>11} {"issues":>7} {"full ms":>9} {"unchanged ms":>13} {"one edit ms":>12}')
+    for target_bytes in (16 * 1024, 256 * 1024, 1024 * 1024):
+        text = build_draft(target_bytes)
+        service = ProofreaderService(cache_max_bytes=256 * 1024 * 1024)
+
+        full_ms, result = timed(lambda: service.proofread(text, checks))
+        unchanged_ms, _ = timed(lambda: service.proofread(text, checks), repeat=10)
+
+        # Typing in one paragraph: each pause re-checks the document with that paragraph changed
+        paragraphs = text.split('\n\n')
+        middle = len(paragraphs) // 2
+        edits = []
+        for keystroke in range(10):
+            paragraphs[middle] += f' Another wrod {keystroke}.'
+            edits.append('\n\n'.join(paragraphs))
+        edits = iter(edits)
+        edit_ms, edited = timed(lambda: service.proofread(next(edits), checks), repeat=10)
+        assert edited['paragraphs']['from_cache'] == edited['paragraphs']['total'] - 1
+
+        print(f'{len(text) / 1024:>7.0f}KB {result["paragraphs"]["total"]:>11} {len(result["issues"]):>7} '
+              f'{full_ms:>9.1f} {unchanged_ms:>13.2f} {edit_ms:>12.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+benchmarks/bench_rewriter.py
+Chunked rewriting of long documents: a remote backend called sequentially vs
+concurrently, re-rewrites after a one-paragraph edit, and the local backend
+
+Run with: python -m benchmarks.bench_rewriter
+"""
+
+import time
+
+from backend.services.rewriter_service import LocalRewriteBackend, RewriterService
+from backend.utils.fake_model import FakeGenerativeModel
+from config.settings import settings
+from benchmarks.bench_summarizer import build_document
+
+# Simulated round trip per chunk for the remote backend
+LATENCY_SECONDS = 0.05
+
+
+class SimulatedRemoteBackend:
+    """Stands in for Gemini: a fixed round trip per chunk, returning the chunk unchanged"""
+
+    name = 'simulated'
+
+    def __init__(self, parallel):
+        self.parallel = parallel
+        self.model = FakeGenerativeModel(latency=LATENCY_SECONDS)
+
+    def rewrite(self, chunk, goal, tone, before='', after=''):
+        self.model.generate_content(chunk)
+        return chunk
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - started) * 1000, result
+
+
+def main():
+    print(f'Remote backend at {LATENCY_SECONDS * 1000:.0f} ms per chunk, {settings.max_workers} workers\n')
+    print(f'{"document":>9} {"chunks":>7} {"sequential ms":>14} {"parallel ms":>12} {"one edit ms":>12} {"local ms":>9}')
+    for target_bytes in (8 * 1024, 32 * 1024, 128 * 1024):
+        text = build_document(target_bytes)
+        sequential = RewriterService(backend=SimulatedRemoteBackend(parallel=False), cache_max_bytes=0)
+        parallel = RewriterService(backend=SimulatedRemoteBackend(parallel=True), cache_max_bytes=64 * 1024 * 1024)
+
+        sequential_ms, _ = timed(lambda: sequential.rewrite(text, 'improve'))
+        parallel_ms, result = timed(lambda: parallel.rewrite(text, 'improve'))
+        assert result['text'] == text
+
+        # Only the edited paragraph goes back to the backend
+        paragraphs = text.split('\n\n')
+        paragraphs[len(paragraphs) // 2] += ' One more sentence.'
+        edit_ms, edited = timed(lambda: parallel.rewrite('\n\n'.join(paragraphs), 'improve'))
+        assert edited['chunks']['rewritten'] == 1
+
+        local = RewriterService(backend=LocalRewriteBackend(), cache_max_bytes=0)
+        local_ms, _ = timed(lambda: local.rewrite(text, 'shorten', 'formal'))
+
+        print(f'{len(text) / 1024:>7.0f}KB {result["chunks"]["total"]:>7} {sequential_ms:>14.0f} {parallel_ms:>12.0f} '
+              f'{edit_ms:>12.1f} {local_ms:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+benchmarks/bench_semantic_cache.py
+Semantic cache lookup latency and hit rate against index size
+
+Run with: python -m benchmarks.bench_semantic_cache
+"""
+
+import random
+import time
+
+from backend.utils.semantic_cache import SemanticCache
+
+ACTIONS = ['explain how to optimize', 'write tests for', 'summarize the risks of',
+           'generate documentation for', 'review the security of', 'reduce the cost of']
+
+
+def build_vocabulary(size, rng):
+    """Pseudo-words, so prompts overlap in character n-grams about as much as real ones"""
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    return [''.join(rng.choice(letters) for _ in range(rng.randint(4, 9))) for _ in range(size)]
+
+
+def build_prompts(count, seed=3):
+    rng = random.Random(seed)
+    vocabulary = build_vocabulary(5000, rng)
+    return [
+        f'{rng.choice(ACTIONS)} this {" ".join(rng.sample(vocabulary, 12))}'
+        for _ in range(count)
+    ]
+
+
+def perturb(prompt, rng):
+    """Whitespace, casing and trivial wording changes"""
+    prompt = prompt.replace(' this ', rng.choice([' the ', ' this  ', ' THIS ']))
+    return ('  ' + prompt.upper() + ' ') if rng.random() < 0.3 else prompt + ' please'
+
+
+def main():
+    rng = random.Random(5)
+    print(f'{"entries":>8} {"insert us":>10} {"hit us":>8} {"miss us":>8} {"hit rate":>9} {"false hits":>11}')
+    for size in (1000, 5000, 20000):
+        cache = SemanticCache(threshold=0.9, max_entries=size)
+        prompts = build_prompts(size)
+
+        started = time.perf_counter()
+        for prompt in prompts:
+            cache.add('bench', prompt, f'answer for {prompt}')
+        insert_us = (time.perf_counter() - started) / size * 1e6
+
+        probes = rng.sample(prompts, 500)
+        started = time.perf_counter()
+        hits = [cache.lookup('bench', perturb(p, rng)) for p in probes]
+        hit_us = (time.perf_counter() - started) / len(probes) * 1e6
+        hit_rate = sum(1 for h in hits if h) / len(hits)
+        false_hits = sum(1 for p, h in zip(probes, hits) if h and h[0] != f'answer for {p}')
+
+        misses = build_prompts(500, seed=size)
+        started = time.perf_counter()
+        for prompt in misses:
+            cache.lookup('bench', prompt)
+        miss_us = (time.perf_counter() - started) / len(misses) * 1e6
+
+        print(f'{size:>8} {insert_us:>10.1f} {hit_us:>8.1f} {miss_us:>8.1f} {hit_rate:>9.2%} {false_hits:>11}')
+
+
+if __name__ == '__main__':
+    main()
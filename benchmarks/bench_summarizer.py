@@ -0,0 +1,60 @@
+"""
+benchmarks/bench_summarizer.py
+Extractive summarization latency on large documents, cold and from summaries_cache
+
+Run with: python -m benchmarks.bench_summarizer
+"""
+
+import random
+import time
+
+from backend.services.summarizer_service import SummarizerService
+
+TOPICS = [
+    ['cluster', 'node', 'replica', 'scheduler', 'pod', 'failover'],
+    ['query', 'partition', 'index', 'warehouse', 'schema', 'scan'],
+    ['budget', 'quota', 'billing', 'forecast', 'spend', 'invoice'],
+    ['latency', 'cache', 'throughput', 'bandwidth', 'timeout', 'retry'],
+]
+FILLER = ['the', 'team', 'reported', 'that', 'during', 'review', 'we', 'noticed', 'several',
+          'changes', 'in', 'our', 'weekly', 'results', 'and', 'next', 'steps', 'for', 'this']
+
+
+def build_document(target_bytes, seed=7):
+    """Paragraphs of sentences mixing filler words with one topic's vocabulary"""
+    rng = random.Random(seed)
+    paragraphs, size = [], 0
+    while size < target_bytes:
+        topic = rng.choice(TOPICS)
+        sentences = []
+        for _ in range(rng.randint(3, 8)):
+            words = [rng.choice(topic if rng.random() < 0.35 else FILLER) for _ in range(rng.randint(8, 24))]
+            sentences.append(' '.join(words).capitalize() + rng.choice(['.', '.', '.', '!', '?']))
+        paragraph = ' '.join(sentences)
+        paragraphs.append(paragraph)
+        size += len(paragraph) + 2
+    return '\n\n'.join(paragraphs)
+
+
+def main():
+    service = SummarizerService(cache_max_bytes=64 * 1024 * 1024)
+    print(f'{"document":>9} {"sentences":>10} {"length":>7} {"cold ms":>9} {"cached ms":>10}')
+    for target_bytes in (16 * 1024, 256 * 1024, 1024 * 1024, 4 * 1024 * 1024):
+        text = build_document(target_bytes)
+        for length in ('short', 'medium', 'long'):
+            service.summaries_cache.clear()
+            started = time.perf_counter()
+            result = service.summarize(text, length)
+            cold_ms = (time.perf_counter() - started) * 1000
+
+            started = time.perf_counter()
+            for _ in range(20):
+                service.summarize(text, length)
+            cached_ms = (time.perf_counter() - started) / 20 * 1000
+
+            print(f'{len(text) / 1024:>7.0f}KB {result["config"]["sentence_count"]:>10} {length:>7} '
+                  f'{cold_ms:>9.1f} {cached_ms:>10.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""
+benchmarks/bench_text_segmenter.py
+Sentence segmentation throughput and peak memory on a 16 MB document, full scans and early stops
+
+Run with: python -m benchmarks.bench_text_segmenter
+"""
+
+import time
+import tracemalloc
+
+from backend.utils.text_segmenter import count_sentences, first_sentences, first_words
+from benchmarks.bench_summarizer import build_document
+
+
+def measure(fn):
+    """(milliseconds, peak traced KB) for one call; timed without tracing, which slows allocation"""
+    started = time.perf_counter()
+    fn()
+    elapsed = (time.perf_counter() - started) * 1000
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024
+
+
+def main():
+    text = build_document(16 * 1024 * 1024)
+    chunks = [text[i:i + 64 * 1024] for i in range(0, len(text), 64 * 1024)]
+    print(f'Document: {len(text) / 1024 / 1024:.1f} MB\n')
+
+    cases = {
+        'text.split(".") (previous key points)': lambda: text.split('.')[:5],
+        'text.split()[:10] (previous headline)': lambda: text.split()[:10],
+        'first_sentences(text, 5)': lambda: first_sentences(text, 5),
+        'first_words(text, 10)': lambda: first_words(text, 10),
+        'count_sentences(text)': lambda: count_sentences(text),
+        'count_sentences(64 KB chunks)': lambda: count_sentences(chunks),
+    }
+    print(f'{"case":<42} {"ms":>10} {"peak KB":>10}')
+    for name, fn in cases.items():
+        elapsed, peak = measure(fn)
+        print(f'{name:<42} {elapsed:>10.2f} {peak:>10.0f}')
+
+    started = time.perf_counter()
+    count_sentences(text)
+    print(f'\nFull scan throughput: {len(text) / 1024 / 1024 / (time.perf_counter() - started):.1f} MB/s')
+
+
+if __name__ == '__main__':
+    main()
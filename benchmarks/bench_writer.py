@@ -0,0 +1,63 @@
+"""
+benchmarks/bench_writer.py
+Long-form writing latency: one sequential generation vs an outline plus
+sections drafted in parallel, with the time until the first section arrives
+
+Run with: python -m benchmarks.bench_writer
+"""
+
+import re
+import time
+
+from backend.services.writer_service import WriterService
+from backend.utils.fake_model import FakeGenerativeModel
+from config.settings import settings
+
+# Simulated model speed, about 100x faster than a real one so the run stays short
+SECONDS_PER_CALL = 0.05
+SECONDS_PER_WORD = 0.0002
+REQUESTED_WORDS = re.compile(r'about (\d+) words')
+
+
+class SimulatedBackend:
+    """Stands in for Gemini: latency grows with the words requested"""
+
+    name = 'simulated'
+
+    def complete(self, prompt, temperature, max_output_tokens=2048):
+        if prompt.startswith('Plan'):
+            count = int(re.search(r'exactly (\d+) sections', prompt).group(1))
+            FakeGenerativeModel(latency=SECONDS_PER_CALL).generate_content(prompt)
+            return '\n'.join(f'{index + 1}. Section {index + 1}' for index in range(count))
+        words = int(REQUESTED_WORDS.search(prompt).group(1))
+        FakeGenerativeModel(latency=SECONDS_PER_CALL + words * SECONDS_PER_WORD).generate_content(prompt)
+        return ' '.join(['word'] * words)
+
+
+def main():
+    backend = SimulatedBackend()
+    writer = WriterService(backend=backend)
+    print(f'{SECONDS_PER_CALL * 1000:.0f} ms per call + {SECONDS_PER_WORD * 1000:.1f} ms per word, '
+          f'{writer.concurrency} concurrent sections, {settings.long_form_section_words} words per section\n')
+    print(f'{"words":>6} {"sections":>9} {"sequential ms":>14} {"first section ms":>17} {"parallel ms":>12}')
+
+    for target_words in (1500, 3000, 6000):
+        started = time.perf_counter()
+        backend.complete(f'Write about {target_words} words', temperature=0.7)
+        sequential_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        first_ms = None
+        for event, payload in writer.generate_long_form('A report on caching', 'technical', 'report', target_words):
+            if event == 'section' and first_ms is None:
+                first_ms = (time.perf_counter() - started) * 1000
+            if event == 'done':
+                metadata = payload['metadata']
+        parallel_ms = (time.perf_counter() - started) * 1000
+        assert metadata['failed'] == 0
+
+        print(f'{target_words:>6} {metadata["sections"]:>9} {sequential_ms:>14.0f} {first_ms:>17.0f} {parallel_ms:>12.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -6,6 +6,7 @@
 #"""
 
 import os
+import tempfile
 from typing import Optional
 from pydantic import BaseSettings, validator
 from dotenv import load_dotenv
@@ -27,6 +28,22 @@ class Settings(BaseSettings):
     gemini_api_key: str = os.getenv('GEMINI_API_KEY', '')
     firebase_config_path: str = os.getenv('FIREBASE_CONFIG_PATH', 'config/firebase_config.json')
     
+    # Gemini connection pool
+    gemini_pool_size: int = int(os.getenv('GEMINI_POOL_SIZE', os.getenv('MAX_WORKERS', 4)))
+    gemini_keepalive_ms: int = int(os.getenv('GEMINI_KEEPALIVE_MS', 30000))
+    gemini_max_models: int = int(os.getenv('GEMINI_MAX_MODELS', 64))  # distinct (model, config) keys kept
+    gemini_max_output_tokens: int = int(os.getenv('GEMINI_MAX_OUTPUT_TOKENS', 2048))  # the model's output limit
+    gemini_backend: str = os.getenv('GEMINI_BACKEND', 'cloud')  # cloud, fake
+    fake_model_latency_ms: int = int(os.getenv('FAKE_MODEL_LATENCY_MS', 200))
+    
+    # Gemini tail latency and failure handling
+    hedge_requests: bool = os.getenv('HEDGE_REQUESTS', 'false').lower() == 'true'
+    hedge_delay_ms: int = int(os.getenv('HEDGE_DELAY_MS', 0))  # 0 follows observed latency
+    hedge_percentile: float = float(os.getenv('HEDGE_PERCENTILE', 95))
+    hedge_max_workers: int = int(os.getenv('HEDGE_MAX_WORKERS', 32))  # past this, calls run unhedged
+    circuit_failure_threshold: int = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', 5))
+    circuit_reset_timeout: float = float(os.getenv('CIRCUIT_RESET_TIMEOUT', 30))
+    
     # BigQuery configuration
     bigquery_dataset: str = os.getenv('BIGQUERY_DATASET', 'nyra_analytics')
     bigquery_table: str = os.getenv('BIGQUERY_TABLE', 'user_interactions')
@@ -35,11 +52,85 @@ class Settings(BaseSettings):
     cors_origins: list = os.getenv('CORS_ORIGINS', 'http://localhost:5000').split(',')
     log_level: str = os.getenv('LOG_LEVEL', 'INFO')
     max_workers: int = int(os.getenv('MAX_WORKERS', 4))
+    web_concurrency: int = int(os.getenv('WEB_CONCURRENCY', 1))  # gunicorn worker processes
     rate_limit_per_minute: int = int(os.getenv('RATE_LIMIT_PER_MINUTE', 60))
+    rate_limit_burst: int = int(os.getenv('RATE_LIMIT_BURST', 10))
+    rate_limit_max_queue: int = int(os.getenv('RATE_LIMIT_MAX_QUEUE', 50))
+    rate_limit_max_wait: float = float(os.getenv('RATE_LIMIT_MAX_WAIT', 30))
+    rate_limit_state_path: str = os.getenv('RATE_LIMIT_STATE_PATH', '')
+    
+    # Multi-agent orchestration
+    agent_timeout: float = float(os.getenv('AGENT_TIMEOUT', 30))
+    workflow_concurrency: int = int(os.getenv('WORKFLOW_CONCURRENCY', os.getenv('MAX_WORKERS', 4)))
+    workflow_max_nodes: int = int(os.getenv('WORKFLOW_MAX_NODES', 50))
+    workflow_memo_max_bytes: int = int(os.getenv('WORKFLOW_MEMO_MAX_BYTES', 16 * 1024 * 1024))
+    
+    # Hybrid routing
+    hybrid_threshold: float = float(os.getenv('HYBRID_THRESHOLD', 0.6))
+    hybrid_max_threshold: float = float(os.getenv('HYBRID_MAX_THRESHOLD', 0.95))
+    hybrid_exploration: float = float(os.getenv('HYBRID_EXPLORATION', 0.05))  # below-threshold share kept local
+    
+    # DevOps analysis
+    devops_chunk_lines: int = int(os.getenv('DEVOPS_CHUNK_LINES', 200))
+    devops_max_chunks: int = int(os.getenv('DEVOPS_MAX_CHUNKS', 16))  # chunk_lines grows to stay within this
+    
+    # Batch generation
+    batch_concurrency: int = int(os.getenv('BATCH_CONCURRENCY', os.getenv('MAX_WORKERS', 4)))
+    batch_max_items: int = int(os.getenv('BATCH_MAX_ITEMS', 1000))
+    
+    # Blob store: memory only unless a disk path is set
+    blob_store_path: str = os.getenv('BLOB_STORE_PATH', '')
+    blob_memory_max_bytes: int = int(os.getenv('BLOB_MEMORY_MAX_BYTES', 64 * 1024 * 1024))
+    blob_disk_max_bytes: int = int(os.getenv('BLOB_DISK_MAX_BYTES', 1024 * 1024 * 1024))
+    
+    # JSON codec: auto (orjson when installed), orjson, stdlib
+    json_backend: str = os.getenv('JSON_BACKEND', 'auto')
+    
+    # Response compression: gzip always, zstd/br when zstandard/brotli are installed
+    compression_enabled: bool = os.getenv('COMPRESSION_ENABLED', 'true').lower() == 'true'
+    compression_min_bytes: int = int(os.getenv('COMPRESSION_MIN_BYTES', 1024))
+    compression_gzip_level: int = int(os.getenv('COMPRESSION_GZIP_LEVEL', 6))
+    compression_zstd_level: int = int(os.getenv('COMPRESSION_ZSTD_LEVEL', 3))
+    compression_brotli_level: int = int(os.getenv('COMPRESSION_BROTLI_LEVEL', 5))
+    compression_cache_max_bytes: int = int(os.getenv('COMPRESSION_CACHE_MAX_BYTES', 16 * 1024 * 1024))
+    
+    # Server-side translation, opt-in: none (on-device only), cloud, gemini, auto (cloud with a project,
+    # gemini with an API key)
+    translation_backend: str = os.getenv('TRANSLATION_BACKEND', 'none')
+    translation_memory_path: str = os.getenv('TRANSLATION_MEMORY_PATH', '')
+    translation_memory_max_entries: int = int(os.getenv('TRANSLATION_MEMORY_MAX_ENTRIES', 50000))
+    
+    # Proofreading: symmetric-delete spelling index, built from the bundled word list on first use and
+    # saved outside the working tree; empty rebuilds it in memory in every process
+    spelling_index_path: str = os.getenv(
+        'SPELLING_INDEX_PATH', os.path.join(tempfile.gettempdir(), 'nyra', 'spelling_index.npz')
+    )
+    
+    # Server-side rewriting of long texts: local (on the server, rule-based), gemini (opt-in, sends the
+    # text to Gemini), auto (gemini with an API key, else local)
+    rewrite_backend: str = os.getenv('REWRITE_BACKEND', 'local')
+    rewrite_chunk_chars: int = int(os.getenv('REWRITE_CHUNK_CHARS', 2000))
+    rewrite_chunk_timeout: float = float(os.getenv('REWRITE_CHUNK_TIMEOUT', 30))
+    
+    # Long-form writing: an outline first, then sections drafted concurrently
+    long_form_section_words: int = int(os.getenv('LONG_FORM_SECTION_WORDS', 400))
+    long_form_max_sections: int = int(os.getenv('LONG_FORM_MAX_SECTIONS', 12))
+    long_form_max_words: int = int(os.getenv('LONG_FORM_MAX_WORDS', 6000))  # larger target_words are clamped
+    long_form_concurrency: int = int(os.getenv('LONG_FORM_CONCURRENCY', os.getenv('MAX_WORKERS', 4)))
     
     # Cache configuration
     enable_cache: bool = os.getenv('ENABLE_CACHE', 'true').lower() == 'true'
     cache_ttl: int = int(os.getenv('CACHE_TTL', 3600))
+    cache_max_bytes: int = int(os.getenv('CACHE_MAX_BYTES', 64 * 1024 * 1024))
+    singleflight_timeout: float = float(os.getenv('SINGLEFLIGHT_TIMEOUT', 60))
+    response_memo_max_bytes: int = int(os.getenv('RESPONSE_MEMO_MAX_BYTES', 16 * 1024 * 1024))
+    semantic_cache_enabled: bool = os.getenv('SEMANTIC_CACHE', 'false').lower() == 'true'  # opt-in
+    semantic_cache_threshold: float = float(os.getenv('SEMANTIC_CACHE_THRESHOLD', 0.98))
+    semantic_cache_max_entries: int = int(os.getenv('SEMANTIC_CACHE_MAX_ENTRIES', 10000))
+    semantic_cache_max_bytes: int = int(os.getenv('SEMANTIC_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    summary_cache_max_bytes: int = int(os.getenv('SUMMARY_CACHE_MAX_BYTES', 8 * 1024 * 1024))
+    proofread_cache_max_bytes: int = int(os.getenv('PROOFREAD_CACHE_MAX_BYTES', 8 * 1024 * 1024))
+    rewrite_cache_max_bytes: int = int(os.getenv('REWRITE_CACHE_MAX_BYTES', 16 * 1024 * 1024))
     
     # API endpoints
     gemini_nano_endpoint: str = 'chrome-ai://nano'
@@ -60,6 +60,11 @@ class APIClient {
         });
     }
 
+    async detectLanguageAPI(textOrTexts) {
+        const body = Array.isArray(textOrTexts) ? { texts: textOrTexts } : { text: textOrTexts };
+        return this.request('/api/chrome-ai/detect-language', 'POST', body);
+    }
+
     async writeAPI(context, tone = 'professional', contentType = 'general') {
         return this.request('/api/chrome-ai/write', 'POST', {
             context,
@@ -169,17 +169,17 @@ async function executeProofreader() {
     try {
         const response = await apiClient.proofreadAPI(input.value);
         
-        setTimeout(() => {
-            output.innerHTML = `
-                <div style="color: #10b981; margin-bottom: 8px;">Proofreading complete!</div>
-                <div style="font-size: 0.875rem;">
-                    Grammar issues: 0<br>
-                    Spelling issues: 0<br>
-                    Style suggestions: 2<br>
-                    <span style="color: #64748b;">Your text looks great!</span>
-                </div>
-            `;
-        }, 800);
+        const found = response.issues_found || {};
+        const total = (response.issues || []).length;
+        output.innerHTML = `
+            <div style="color: #10b981; margin-bottom: 8px;">Proofreading complete!</div>
+            <div style="font-size: 0.875rem;">
+                Grammar issues: ${(found.grammar || 0) + (found.punctuation || 0)}<br>
+                Spelling issues: ${found.spelling || 0}<br>
+                Style suggestions: ${found.style || 0}<br>
+                <span style="color: #64748b;">${total ? `${total} suggestions to review.` : 'Your text looks great!'}</span>
+            </div>
+        `;
         
         logInteraction('proofreader', 'success', true);
     } catch (error) {
@@ -2,8 +2,15 @@
 # tests/test_api.py
 # ============================================
 import unittest
+import gzip
 import json
+from unittest import mock
+from config.settings import settings
 from backend.app import app
+from backend.utils.fake_model import FakeGenerativeModel, FakeResponse
+from backend.utils.rate_limiter import QuotaExceeded
+from backend.services.rewriter_service import LocalRewriteBackend
+from backend.services.writer_service import GeminiWritingBackend
 
 class TestAPI(unittest.TestCase):
     """API tests"""
@@ -34,6 +41,262 @@ class TestAPI(unittest.TestCase):
             content_type='application/json'
         )
         self.assertEqual(response.status_code, 200)
+    
+    def test_batch_api(self):
+        """Test batch endpoint executes, deduplicates and streams NDJSON"""
+        operation = {'type': 'summarize', 'data': {'text': 'This is a test text.'}}
+        rewrite = {'type': 'rewrite', 'data': {'text': 'We should of left.'}}
+        with mock.patch.object(app.rewriter_service, 'backend', LocalRewriteBackend()):
+            response = self.app.post('/api/chrome-ai/batch',
+                json={'operations': [operation, operation, rewrite]},
+                content_type='application/json'
+            )
+            self.assertEqual(response.status_code, 200)
+            events = [json.loads(line) for line in response.data.decode().splitlines()]
+        results = [e for e in events if e['event'] == 'result']
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(r['success'] for r in results))
+        rewritten = next(r['result'] for r in results if r['type'] == 'rewrite')
+        self.assertEqual(rewritten['processing'], 'local')
+        self.assertEqual(rewritten['chunks']['failed'], 0)
+        self.assertEqual(rewritten['text'], 'We should have left.')
+        self.assertEqual(sum(r['deduplicated'] for r in results), 2)
+        self.assertEqual(events[-1]['metadata']['unique_operations'], 2)
+        self.assertNotEqual(events[0]['batch_id'], 'batch_3')
+    
+    def test_blob_reference(self):
+        """Test uploaded text can be referenced by hash instead of echoed"""
+        upload = self.app.post('/api/chrome-ai/blobs', json={'text': 'A long document.'})
+        self.assertIn(upload.status_code, (200, 201))
+        text_ref = json.loads(upload.data)['text_ref']
+        
+        response = self.app.post('/api/chrome-ai/summarize', json={'text_ref': text_ref})
+        self.assertEqual(response.status_code, 200)
+        config = json.loads(response.data)['config']
+        self.assertEqual(config['text_ref'], text_ref)
+        self.assertNotIn('text', config)
+        
+        missing = self.app.post('/api/chrome-ai/summarize', json={'text_ref': '0' * 64})
+        self.assertEqual(missing.status_code, 404)
+        
+        # Memory-only: oversized blobs are refused, and several workers cannot share refs
+        store = 'backend.api.chrome_ai.blob_store'
+        with mock.patch(f'{store}.disk_path', ''), mock.patch(f'{store}.memory_max_bytes', 4):
+            self.assertEqual(self.app.post('/api/chrome-ai/blobs', json={'text': 'too long'}).status_code, 413)
+            with mock.patch.object(settings, 'web_concurrency', 4):
+                self.assertEqual(self.app.post('/api/chrome-ai/blobs', json={'text': 'ok'}).status_code, 503)
+    
+    def test_long_form_sheds_before_streaming(self):
+        """Test the long-form outline runs before the stream, so rejections get a status code"""
+        payload = {'context': 'Quarterly report on warehouse throughput.', 'target_words': 600}
+        with mock.patch.object(app.writer_service, 'backend', GeminiWritingBackend()), \
+                mock.patch('backend.services.writer_service.model_registry.get',
+                           return_value=FakeGenerativeModel()), \
+                mock.patch('backend.utils.resilience.quota_governor.acquire',
+                           side_effect=QuotaExceeded('Upstream quota exhausted', 2.5)):
+            shed = self.app.post('/api/chrome-ai/write/long-form', json=payload)
+        self.assertEqual(shed.status_code, 429)
+        self.assertEqual(shed.headers['Retry-After'], '3')
+        self.assertEqual(shed.get_json()['error'], 'Rate limit exceeded')
+    
+    def test_conditional_etag(self):
+        """Test deterministic endpoints return an ETag and honour If-None-Match"""
+        payload = {'text': 'Check this text.'}
+        first = self.app.post('/api/chrome-ai/proofread', json=payload)
+        self.assertEqual(first.status_code, 200)
+        etag = first.headers['ETag']
+        
+        repeat = self.app.post('/api/chrome-ai/proofread', json=payload)
+        self.assertEqual(repeat.headers['ETag'], etag)
+        self.assertEqual(repeat.data, first.data)
+        
+        cached = self.app.post('/api/chrome-ai/proofread', json=payload, headers={'If-None-Match': etag})
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.data, b'')
+        
+        # Model-backed or partially failed fallbacks are neither memoized nor ETagged
+        class FlakyBackend:
+            name = 'gemini'
+            parallel = False
+            
+            def __init__(self):
+                self.calls = 0
+            
+            def rewrite(self, chunk, goal, tone, before='', after=''):
+                self.calls += 1
+                raise RuntimeError('upstream failure')
+        
+        backend = FlakyBackend()
+        body = {'text': 'Rewrite this sentence for the memo test.', 'fallback': True}
+        with mock.patch.object(app.rewriter_service, 'backend', backend):
+            for _ in range(2):
+                response = self.app.post('/api/chrome-ai/rewrite', json=body)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotIn('ETag', response.headers)
+        self.assertEqual(backend.calls, 2)
+    
+    def test_compression(self):
+        """Test large responses are compressed when accepted and small ones are not"""
+        response = self.app.get('/static/css/main.css', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        plain = self.app.get('/static/css/main.css')
+        self.assertNotIn('Content-Encoding', plain.headers)
+        self.assertEqual(gzip.decompress(response.data), plain.data)
+        
+        small = self.app.get('/health', headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', small.headers)
+    
+    def test_detect_language_api(self):
+        """Test language detection endpoint for one text and a batch"""
+        response = self.app.post('/api/chrome-ai/detect-language',
+            json={'text': 'Bonjour, comment allez-vous aujourd\'hui ?'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.data)['language'], 'fr')
+        
+        response = self.app.post('/api/chrome-ai/detect-language',
+            json={'texts': ['Guten Morgen, wie geht es dir?', 'Доброе утро, как дела?']}
+        )
+        results = json.loads(response.data)['results']
+        self.assertEqual([r['language'] for r in results], ['de', 'ru'])
+    
+    def test_generate_streaming(self):
+        """Test streamed generation sends chunk events, final metadata and errors"""
+        model = FakeGenerativeModel(response_text='Streaming works one chunk at a time.', chunk_size=8)
+        payload = {'prompt': 'Say something', 'stream': 'ndjson', 'cache': False}
+        with mock.patch('backend.api.gemini.get_gemini_model', return_value=model):
+            response = self.app.post('/api/gemini/generate', json=payload)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.mimetype, 'application/x-ndjson')
+            events = [json.loads(line) for line in response.data.decode().splitlines()]
+            chunks = [e['text'] for e in events if e['event'] == 'chunk']
+            self.assertEqual(''.join(chunks), 'Streaming works one chunk at a time.')
+            self.assertEqual(events[-1]['event'], 'done')
+            self.assertEqual(events[-1]['metadata']['chunks'], len(chunks))
+            self.assertEqual(events[-1]['metadata']['completion_tokens'], 7)
+            
+            # Shed before the stream starts: a real status code, not an in-stream error
+            with mock.patch('backend.api.gemini.quota_governor.acquire',
+                            side_effect=QuotaExceeded('Upstream quota exhausted', 2.5)):
+                shed = self.app.post('/api/gemini/generate', json=payload)
+            self.assertEqual(shed.status_code, 429)
+            self.assertEqual(shed.headers['Retry-After'], '3')
+        
+        class BrokenStream(FakeResponse):
+            def __iter__(self):
+                yield FakeResponse('Partial ')
+                raise RuntimeError('stream reset')
+        
+        broken = mock.Mock(generate_content=mock.Mock(return_value=BrokenStream('')))
+        with mock.patch('backend.api.gemini.get_gemini_model', return_value=broken):
+            response = self.app.post('/api/gemini/generate', json=dict(payload, prompt='Break'))
+            events = [json.loads(line) for line in response.data.decode().splitlines()]
+        self.assertEqual([e['event'] for e in events], ['chunk', 'error'])
+        self.assertEqual(events[-1]['details'], 'stream reset')
+    
+    def test_batch_generate_api(self):
+        """Test Gemini batch generation streams per-item results, dedupes and caps items"""
+        def generate_content(prompt, **kwargs):
+            if prompt == 'fail':
+                raise RuntimeError('upstream error')
+            return FakeResponse(f'Answer: {prompt}')
+        
+        model = mock.Mock(generate_content=mock.Mock(side_effect=generate_content))
+        items = [{'prompt': 'alpha', 'id': 'a'}, {'prompt': 'fail'}, {'prompt': 'alpha', 'id': 'b'}]
+        with mock.patch('backend.api.gemini.get_gemini_model', return_value=model):
+            response = self.app.post('/api/gemini/batch-generate', json={'items': items, 'cache': False})
+            body = response.data
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        self.assertTrue(body.endswith(b'\n'))
+        lines = body.decode().splitlines()
+        events = [json.loads(line) for line in lines]
+        
+        results = {e['index']: e for e in events if e['event'] == 'result'}
+        self.assertEqual(sorted(results), [0, 1, 2])
+        self.assertEqual(results[0]['generated_text'], 'Answer: alpha')
+        self.assertEqual((results[0]['id'], results[2]['id']), ('a', 'b'))
+        self.assertTrue(results[0]['deduplicated'] and results[2]['deduplicated'])
+        self.assertFalse(results[1]['success'])
+        self.assertEqual(results[1]['details'], 'upstream error')
+        self.assertEqual(model.generate_content.call_count, 2)
+        
+        metadata = events[-1]['metadata']
+        self.assertEqual(events[-1]['event'], 'done')
+        self.assertEqual((metadata['unique_items'], metadata['succeeded'], metadata['failed']), (2, 2, 1))
+        
+        with mock.patch.object(settings, 'batch_max_items', 2):
+            capped = self.app.post('/api/gemini/batch-generate', json={'items': items})
+        self.assertEqual(capped.status_code, 400)
+    
+    def test_analyze_devops_chunked_maps_lines(self):
+        """Test chunked DevOps analysis merges chunk reports and maps cited lines to the file"""
+        def generate_content(prompt, **kwargs):
+            if '(lines 1-150 of 300)' in prompt:
+                return FakeResponse('## Review\nYou should fix line 123.\nConsider caching on lines 12-14.')
+            return FakeResponse('Critical: you should encrypt line 200, not line 5.\nRecommend lines 250\u2013251.')
+        
+        code = '\n'.join(f'setting_{i} = {i}' + ('\n' if i == 150 else '') for i in range(1, 300))
+        model = mock.Mock(generate_content=mock.Mock(side_effect=generate_content))
+        with mock.patch('backend.api.gemini.get_gemini_model', return_value=model):
+            response = self.app.post('/api/gemini/analyze-devops', json={
+                'code': code, 'type': 'text', 'chunked': True, 'chunk_lines': 150, 'cache': False
+            })
+        self.assertEqual(response.status_code, 200)
+        result = json.loads(response.data)
+        self.assertEqual([c['lines'] for c in result['metadata']['chunks']], [[1, 150], [151, 300]])
+        
+        recommendations = result['recommendations']
+        self.assertEqual([r['config_lines'] for r in recommendations], [[123], [12, 13, 14], [200], [250, 251]])
+        self.assertEqual([r['chunk'] for r in recommendations], [0, 0, 1, 1])
+        analysis_lines = result['analysis'].split('\n')
+        for recommendation in recommendations:
+            self.assertEqual(analysis_lines[recommendation['line_number'] - 1], recommendation['recommendation'])
+        self.assertEqual(result['severity_levels']['critical'], 1)
+    
+    def test_generate_code_cache_keeps_parameters_apart(self):
+        """Test code generation reuses identical requests but misses on a changed language or wording"""
+        model = mock.Mock(generate_content=mock.Mock(side_effect=lambda prompt, **kwargs: FakeResponse(prompt)))
+        description = 'Write a function that sorts a list of invoice totals in ascending order'
+        with mock.patch('backend.api.gemini.get_gemini_model', return_value=model):
+            def generate(**body):
+                response = self.app.post('/api/gemini/generate-code', json=dict({'description': description}, **body))
+                self.assertEqual(response.status_code, 200)
+                return json.loads(response.data)
+            
+            first = generate(language='python')
+            self.assertTrue(generate(language='python')['metadata']['cache_hit'])
+            rust = generate(language='rust')
+            descending = generate(language='python', description=description.replace('ascending', 'descending'))
+        
+        self.assertFalse(rust['metadata']['cache_hit'])
+        self.assertIn('production-ready rust code', rust['generated_code'])
+        self.assertFalse(descending['metadata']['cache_hit'])
+        self.assertIn('descending', descending['generated_code'])
+        self.assertNotEqual(first['generated_code'], descending['generated_code'])
+        self.assertEqual(model.generate_content.call_count, 3)
+    
+    def test_hybrid_learns_only_from_feedback(self):
+        """Test cloud-routed hybrid decisions are not auto-labeled, while explicit feedback is logged"""
+        model = FakeGenerativeModel(response_text='A long enhanced analysis of several unrelated aspects.')
+        router = app.hybrid_router
+        logged = router.get_stats()['outcomes_logged']
+        with mock.patch.object(router, 'exploration_rate', 0), \
+                mock.patch('backend.api.gemini.get_gemini_model', return_value=model):
+            response = self.app.post('/api/gemini/hybrid-decision', json={
+                'query': 'What is the capital of France?', 'nano_result': 'Paris.', 'force_cloud': True
+            })
+        self.assertEqual(response.status_code, 200)
+        body = json.loads(response.data)
+        self.assertEqual(body['route'], 'cloud')
+        self.assertEqual(router.get_stats()['outcomes_logged'], logged)
+        
+        feedback = self.app.post('/api/gemini/hybrid-feedback', json={
+            'decision_id': body['routing']['decision_id'], 'local_sufficient': True
+        })
+        self.assertEqual(feedback.status_code, 200)
+        self.assertEqual(router.get_stats()['outcomes_logged'], logged + 1)
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,8 +1,35 @@
 # ============================================
 # tests/test_services.py
 # ============================================
+import os
+import tempfile
+import threading
+import time
 import unittest
-from backend.utils.validators import validate_email, validate_sql_query
+from unittest import mock
+from config.settings import settings
+from backend.utils.validators import Field, Schema, SchemaError, validate_email, validate_sql_query
+from backend.utils.concurrency import run_concurrently
+from backend.utils.blob_store import BlobStore, BlobTooLargeError, resolve_text
+from backend.utils.cache import ResponseCache
+from backend.utils.semantic_cache import SemanticCache
+from backend.utils.singleflight import SingleFlight
+from backend.utils.config_chunker import chunk_config
+from backend.utils.analysis_extractor import extract_analysis
+from backend.utils.rate_limiter import QuotaExceeded, QuotaGovernor
+from backend.utils.resilience import CircuitBreaker, CircuitOpenError, Hedger, hedger
+from backend.utils.fake_model import FakeGenerativeModel
+from backend.utils.model_registry import ModelRegistry
+from backend.utils.language_detector import language_detector
+from backend.utils.text_segmenter import first_sentences, iter_sentences
+from backend.utils.translation_memory import TranslationMemory
+from backend.utils.workflow import WorkflowError, WorkflowScheduler, parse_workflow
+from backend.services.hybrid_router import HybridRouter
+from backend.services.proofreader_service import ProofreaderService
+from backend.services.rewriter_service import GeminiRewriteBackend, LocalRewriteBackend, RewriterService
+from backend.services.summarizer_service import SummarizerService
+from backend.services.translator_service import GeminiTranslationBackend, TranslatorService
+from backend.services.writer_service import GeminiWritingBackend, WriterService
 
 class TestServices(unittest.TestCase):
     """Service tests"""
@@ -19,6 +46,578 @@ class TestServices(unittest.TestCase):
         
         valid, msg = validate_sql_query('DROP TABLE users')
         self.assertFalse(valid)
+    
+    def test_run_concurrently_partial_failure(self):
+        """Test fan-out keeps order and isolates slow and failing calls"""
+        def fail():
+            raise RuntimeError('boom')
+        
+        outcomes = run_concurrently([
+            lambda: 'fast',
+            lambda: time.sleep(1) or 'slow',
+            fail
+        ], timeout=0.2)
+        
+        self.assertEqual(outcomes[0]['result'], 'fast')
+        self.assertIn('Timed out', outcomes[1]['error'])
+        self.assertEqual(outcomes[2]['error'], 'boom')
+        self.assertTrue(all('latency_ms' in o for o in outcomes))
+    
+    def test_model_registry_pools_and_bounds_models(self):
+        """Test pooled models are reused per config and old configs are evicted"""
+        registry = ModelRegistry(pool_size=2, max_models=2)
+        with mock.patch.object(settings, 'gemini_backend', 'fake'):
+            first = registry.get('gemini-pro', {'temperature': 0.1})
+            self.assertIs(registry.get('gemini-pro', {'temperature': 0.1}), first)
+            registry.get('gemini-pro', {'temperature': 0.2})
+            registry.get('gemini-pro', {'temperature': 0.1})
+            registry.get('gemini-pro', {'temperature': 0.3})
+        
+        stats = registry.stats()
+        self.assertEqual((stats['models'], stats['evictions']), (2, 1))
+        self.assertEqual((stats['hits'], stats['misses']), (2, 3))
+        self.assertIsInstance(first, FakeGenerativeModel)
+    
+    def test_response_cache_lru_by_size(self):
+        """Test response cache evicts least recently used entries by byte size"""
+        cache = ResponseCache(max_bytes=10, ttl=60)
+        key_a = cache.make_key('a', 'gemini-pro', {'temperature': 0.7})
+        key_b = cache.make_key('b', 'gemini-pro', {'temperature': 0.7})
+        key_c = cache.make_key('c', 'gemini-pro', {'temperature': 0.7})
+        
+        cache.set(key_a, 'aaaa')
+        cache.set(key_b, 'bbbb')
+        self.assertEqual(cache.get(key_a), 'aaaa')
+        cache.set(key_c, 'cccc')
+        
+        self.assertIsNone(cache.get(key_b))
+        self.assertEqual(cache.get(key_c), 'cccc')
+        self.assertEqual(cache.stats()['evictions'], 1)
+    
+    def test_workflow_scheduler_parallel_and_memoized(self):
+        """Test independent nodes run in parallel and only changed nodes and descendants rerun"""
+        def build(research_prompt):
+            return parse_workflow({'nodes': [
+                {'id': 'research', 'prompt': research_prompt},
+                {'id': 'risks', 'prompt': 'risks'},
+                {'id': 'draft', 'inputs': ['research', 'risks']}
+            ]}, max_nodes=10)
+        
+        calls = []
+        def execute(node_id, spec, inputs):
+            calls.append(node_id)
+            time.sleep(0.1)
+            return f'{node_id}:{spec.get("prompt", "")}:' + ','.join(sorted(inputs.values()))
+        
+        scheduler = WorkflowScheduler(max_concurrency=4, memo=ResponseCache(max_bytes=10000, ttl=60))
+        started = time.perf_counter()
+        outcomes = scheduler.run(build('v1'), execute)
+        self.assertLess(time.perf_counter() - started, 0.3)
+        self.assertEqual(outcomes['draft']['result'], 'draft::research:v1:,risks:risks:')
+        
+        calls.clear()
+        outcomes = scheduler.run(build('v2'), execute)
+        self.assertEqual(sorted(calls), ['draft', 'research'])
+        self.assertTrue(outcomes['risks']['memoized'])
+    
+    def test_workflow_failures_and_cycles(self):
+        """Test a failed node skips its descendants and cyclic graphs are rejected"""
+        nodes = parse_workflow([{'id': 'a'}, {'id': 'b', 'inputs': ['a']}, {'id': 'c'}], max_nodes=10)
+        
+        def execute(node_id, spec, inputs):
+            if node_id == 'a':
+                raise RuntimeError('boom')
+            return node_id
+        
+        outcomes = WorkflowScheduler(max_concurrency=2).run(nodes, execute)
+        self.assertEqual([o['status'] for o in outcomes.values()], ['failed', 'success', 'skipped'])
+        
+        with self.assertRaises(WorkflowError):
+            parse_workflow([{'id': 'a', 'inputs': ['b']}, {'id': 'b', 'inputs': ['a']}], max_nodes=10)
+    
+    def test_blob_store_tiers_and_dedupe(self):
+        """Test blobs dedupe by content and are served from disk once evicted from memory"""
+        with tempfile.TemporaryDirectory() as path:
+            store = BlobStore(memory_max_bytes=10, disk_path=path, disk_max_bytes=1000)
+            ref, created = store.put_text('héllo world')
+            self.assertTrue(created)
+            self.assertEqual(store.put_text('héllo world'), (ref, False))
+            
+            self.assertEqual(store.get_text(ref), 'héllo world')
+            self.assertEqual(b''.join(store.iter_bytes(ref, chunk_size=4)), 'héllo world'.encode('utf-8'))
+            self.assertEqual(store.stats()['disk_hits'], 1)
+            self.assertIsNone(store.get_text('0' * 64))
+            
+            reopened = BlobStore(memory_max_bytes=1000, disk_path=path)
+            self.assertEqual(reopened.get_text(ref), 'héllo world')
+    
+    def test_blob_store_is_lazy_and_stores_only_uploads(self):
+        """Test the disk tier is created on first use and inline request text is not stored"""
+        with tempfile.TemporaryDirectory() as path:
+            disk_path = os.path.join(path, 'blobs')
+            store = BlobStore(memory_max_bytes=1000, disk_path=disk_path)
+            self.assertFalse(os.path.exists(disk_path))
+            
+            self.assertEqual(resolve_text(store, {'text': 'inline'}, 'text'), ('inline', None))
+            self.assertEqual(store.stats()['puts'], 0)
+            self.assertFalse(os.path.exists(disk_path))
+            
+            ref, _ = store.put_text('uploaded')
+            self.assertTrue(os.path.isdir(disk_path))
+            self.assertEqual(resolve_text(store, {'text_ref': ref}, 'text'), ('uploaded', ref))
+        
+        # Without a disk tier, a blob the memory tier cannot hold is refused instead of dropped
+        with self.assertRaises(BlobTooLargeError):
+            BlobStore(memory_max_bytes=4).put_text('too long')
+    
+    def test_request_schema(self):
+        """Test compiled schemas fill typed defaults and reject bad bodies"""
+        schema = Schema(
+            Field('prompt', str, required=True, message='Prompt is required'),
+            Field('temperature', float, default=0.7),
+            Field('tags', list, default=list),
+            Field('tone', str, choices=['casual', 'formal']),
+            Field('words', int, maximum=lambda: 100)
+        )
+        
+        body = schema.validate({'prompt': 'hi', 'temperature': 1})
+        self.assertEqual(body, {'prompt': 'hi', 'temperature': 1, 'tags': []})
+        self.assertEqual(schema.validate({'prompt': 'hi', 'words': 10 ** 9})['words'], 100)
+        self.assertIsNot(body['tags'], schema.validate({'prompt': 'x'})['tags'])
+        
+        for bad in (None, {}, {'temperature': 0.5}, {'prompt': 'hi', 'temperature': True},
+                    {'prompt': 'hi', 'tone': 'angry'}):
+            with self.assertRaises(SchemaError):
+                schema.validate(bad)
+        with self.assertRaisesRegex(SchemaError, 'Prompt is required'):
+            schema.validate({})
+    
+    def test_response_cache_key_is_canonical(self):
+        """Test cache key ignores generation config ordering"""
+        self.assertEqual(
+            ResponseCache.make_key('p', 'gemini-pro', {'temperature': 0.1, 'max_output_tokens': 5}),
+            ResponseCache.make_key('p', 'gemini-pro', {'max_output_tokens': 5, 'temperature': 0.1})
+        )
+    
+    def test_single_flight_shares_result(self):
+        """Test concurrent identical calls share one upstream call"""
+        group = SingleFlight()
+        calls = []
+        
+        def upstream():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'shared'
+        
+        outcomes = run_concurrently([lambda: group.do('key', upstream, timeout=5)] * 3)
+        
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([o['result'][0] for o in outcomes], ['shared'] * 3)
+        self.assertEqual(sorted(o['result'][1] for o in outcomes), [False, True, True])
+    
+    def test_chunk_config_on_hcl_blocks(self):
+        """Test Terraform configs are chunked on block boundaries with original line numbers"""
+        code = '\n'.join([
+            'provider "aws" {',
+            '  region = "us-east-1"',
+            '}',
+            'resource "aws_s3_bucket" "logs" {',
+            '  bucket = "logs"',
+            '}'
+        ])
+        
+        chunks = chunk_config(code, 'terraform', max_lines=3)
+        
+        self.assertEqual([(c['start_line'], c['end_line']) for c in chunks], [(1, 3), (4, 6)])
+        self.assertTrue(chunks[1]['text'].startswith('resource'))
+        
+        large = '\n\n'.join(f'resource "aws_s3_bucket" "b{i}" {{\n  bucket = "b{i}"\n}}' for i in range(100))
+        capped = chunk_config(large, 'terraform', max_lines=4, max_chunks=8)
+        self.assertLessEqual(len(capped), 8)
+        self.assertEqual((capped[0]['start_line'], capped[-1]['end_line']), (1, large.count('\n') + 1))
+    
+    def test_extract_analysis(self):
+        """Test recommendations and severity levels are extracted from analysis text"""
+        analysis = '\n'.join([
+            '## Security',
+            'Critical: you should encrypt the bucket.',
+            'Consider caching responses to improve speed.',
+            'Minor formatting issue.'
+        ])
+        
+        recommendations, severity = extract_analysis(analysis)
+        
+        self.assertEqual([r['line_number'] for r in recommendations], [2, 3])
+        self.assertEqual(recommendations[0]['priority'], 'critical')
+        self.assertEqual(recommendations[0]['category'], 'security')
+        self.assertEqual(recommendations[1]['priority'], 'medium')
+        self.assertEqual(recommendations[1]['category'], 'performance')
+        self.assertEqual(severity, {'critical': 1, 'high': 0, 'medium': 0, 'low': 1})
+    
+    def test_quota_governor_queues_then_rejects(self):
+        """Test governor paces callers at the quota and fast-fails past the queue limit"""
+        governor = QuotaGovernor(rate_per_minute=600, burst=1, max_queue=1, max_wait=1)
+        
+        self.assertEqual(governor.acquire(), 0.0)
+        outcomes = run_concurrently([governor.acquire, governor.acquire])
+        
+        waits = [o['result'] for o in outcomes if o['result'] is not None]
+        self.assertEqual(len(waits), 1)
+        self.assertGreater(waits[0], 0)
+        self.assertTrue(any(o['error'] for o in outcomes))
+        self.assertEqual(governor.stats()['rejected'], 1)
+        
+        # A wait beyond max_wait is rejected outright, with a retry hint
+        slow = QuotaGovernor(rate_per_minute=6, burst=1, max_queue=5, max_wait=1)
+        slow.acquire()
+        with self.assertRaises(QuotaExceeded) as rejected:
+            slow.acquire()
+        self.assertGreater(rejected.exception.retry_after, 1)
+    
+    def test_hedger_uses_faster_backup(self):
+        """Test a stalled first attempt is hedged and the backup result returned"""
+        model = FakeGenerativeModel(latency=lambda call: 2.0 if call == 0 else 0.01)
+        hedger = Hedger(enabled=True, delay=0.05)
+        
+        started = time.perf_counter()
+        response = hedger.call(lambda: model.generate_content('hello'))
+        
+        self.assertEqual(response.text, 'Response to: hello')
+        self.assertLess(time.perf_counter() - started, 1.0)
+        self.assertEqual(hedger.stats()['hedge_wins'], 1)
+        
+        # Time spent waiting for admission is not upstream latency and does not trigger a hedge
+        queued = Hedger(enabled=True, delay=0.05)
+        queued.call(lambda: 'ok', admit=lambda: time.sleep(0.2))
+        self.assertLess(queued.latency.percentile(50), 0.05)
+        self.assertEqual(queued.stats()['hedged'], 0)
+        
+        # A full hedge pool runs the call without a backup
+        saturated = Hedger(enabled=True, delay=0.01, max_workers=1)
+        self.assertEqual(saturated.call(lambda: time.sleep(0.1) or 'slow'), 'slow')
+        self.assertEqual((saturated.stats()['hedged'], saturated.stats()['saturated']), (0, 1))
+    
+    def test_service_backends_share_the_gemini_call_path(self):
+        """Test service Gemini backends are admitted, hedged and coalesced like the Gemini routes"""
+        model = FakeGenerativeModel(response_text='["uno", "dos"]')
+        backends = [
+            lambda: GeminiTranslationBackend().translate(['one', 'two'], 'en', 'es'),
+            lambda: GeminiRewriteBackend().rewrite('Some text.', 'improve', 'neutral'),
+            lambda: GeminiWritingBackend().complete('Write it', temperature=0.7)
+        ]
+        with mock.patch('backend.utils.model_registry.model_registry.get', return_value=model), \
+                mock.patch('backend.utils.resilience.quota_governor.acquire') as acquire:
+            calls = hedger.stats()['calls']
+            self.assertEqual(backends[0](), ['uno', 'dos'])
+            backends[1]()
+            backends[2]()
+        
+        self.assertEqual(acquire.call_count, 3)
+        self.assertEqual(hedger.stats()['calls'] - calls, 3)
+        self.assertEqual(model.calls, 3)
+    
+    def test_circuit_breaker_opens_and_recovers(self):
+        """Test breaker fast-fails after repeated failures and closes after a good trial"""
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.1)
+        failing = FakeGenerativeModel(failure_rate=1.0)
+        
+        for _ in range(2):
+            with self.assertRaises(RuntimeError):
+                breaker.call(lambda: failing.generate_content('x'))
+        with self.assertRaises(CircuitOpenError):
+            breaker.call(lambda: failing.generate_content('x'))
+        
+        time.sleep(0.15)
+        breaker.call(lambda: FakeGenerativeModel().generate_content('x'))
+        self.assertEqual(breaker.stats()['state'], 'closed')
+    
+    def test_hybrid_router_scores_and_learns(self):
+        """Test good local answers stay local, refusals go to cloud, and thresholds are learned"""
+        router = HybridRouter(default_threshold=0.6, min_samples=4, exploration_rate=0)
+        query = 'What is the capital of France?'
+        
+        local = router.decide(query, 'The capital of France is Paris, on the Seine.')
+        cloud = router.decide(query, "I'm sorry, I can't answer that.")
+        self.assertEqual(local['route'], 'local')
+        self.assertEqual(cloud['route'], 'cloud')
+        self.assertTrue(cloud['signals']['refusal'])
+        
+        for score in (0.1, 0.2, 0.3, 0.4):
+            router.decisions[f'd{score}'] = score
+            router.record_outcome(f'd{score}', score >= 0.3)
+        self.assertEqual(router.threshold, 0.3)
+        
+        # Even when every local answer was rated insufficient, the threshold stays reachable
+        for index in range(8):
+            router.decisions[f'bad{index}'] = 0.9
+            router.record_outcome(f'bad{index}', False)
+        self.assertEqual(router.threshold, router.max_threshold)
+        self.assertLess(router.threshold, 1.0)
+        
+        # Exploration keeps some below-threshold answers local so feedback keeps arriving
+        explorer = HybridRouter(default_threshold=0.99, exploration_rate=1.0)
+        explored = explorer.decide(query, 'Paris.')
+        self.assertEqual((explored['route'], explored['explore']), ('local', True))
+        self.assertEqual(explorer.decide(query, 'Paris.', force_cloud=True)['route'], 'cloud')
+    
+    def test_semantic_cache_near_duplicates(self):
+        """Test near-duplicate prompts hit, unrelated prompts and other namespaces miss"""
+        cache = SemanticCache(threshold=0.9, max_entries=2)
+        cache.add('pro', 'Explain how to optimize this Kubernetes deployment', 'answer')
+        
+        hit = cache.lookup('pro', '  explain how to  optimize this kubernetes deployment ')
+        self.assertEqual(hit[0], 'answer')
+        self.assertGreaterEqual(hit[1], 0.9)
+        self.assertIsNone(cache.lookup('pro', 'Write a haiku about autumn leaves'))
+        self.assertIsNone(cache.lookup('flash', 'Explain how to optimize this Kubernetes deployment'))
+        
+        cache.add('pro', 'first other prompt', 'a')
+        cache.add('pro', 'second other prompt', 'b')
+        self.assertEqual(cache.stats()['entries'], 2)
+        self.assertEqual(cache.stats()['evictions'], 1)
+        
+        # Numbers and negations must match exactly, however close the rest of the prompt is
+        guarded = SemanticCache(threshold=0.9)
+        guarded.add('pro', 'Is it safe to mix bleach and vinegar for cleaning the bathroom?', 'safety answer')
+        self.assertIsNone(guarded.lookup('pro', 'Is it not safe to mix bleach and vinegar for cleaning the bathroom?'))
+        guarded.add('pro', 'Convert 150 USD to EUR at the current exchange rate', 'conversion answer')
+        self.assertIsNone(guarded.lookup('pro', 'Convert 750 USD to EUR at the current exchange rate'))
+        self.assertEqual(guarded.lookup('pro', 'convert 150 USD to EUR at the current exchange rate ')[0],
+                         'conversion answer')
+    
+    def test_extractive_summary(self):
+        """Test TextRank picks central sentences in order and caches the result"""
+        service = SummarizerService(cache_max_bytes=1024 * 1024)
+        text = (
+            'Solar power is growing fast across many countries. '
+            'My cat likes to sleep on the windowsill all day. '
+            'Cheap solar panels make solar power competitive with coal. '
+            'Many countries now install more solar power than coal each year. '
+            'The weather was nice yesterday afternoon in town.'
+        )
+        result = service.summarize(text, 'short')
+        self.assertEqual(len(result['sentences']), 2)
+        self.assertTrue(all('solar' in sentence.lower() for sentence in result['sentences']))
+        self.assertLess(text.index(result['sentences'][0]), text.index(result['sentences'][1]))
+        
+        self.assertIs(service.summarize(text, 'short'), result)
+        self.assertEqual(service.summaries_cache.stats()['hits'], 1)
+        self.assertEqual(len(service.summarize(text, 'long')['sentences']), 5)
+    
+    def test_sentence_segmenter(self):
+        """Test abbreviations, decimals and CJK punctuation, streamed and with early stop"""
+        text = ('Dr. Smith paid $3.50 for v1.2 at example.com. Then he left! '
+                'It was approx. five p.m. when it ended.\n\nHeading\n\n这是第一句。这是第二句！')
+        expected = [
+            'Dr. Smith paid $3.50 for v1.2 at example.com.',
+            'Then he left!',
+            'It was approx. five p.m. when it ended.',
+            'Heading',
+            '这是第一句。',
+            '这是第二句！'
+        ]
+        self.assertEqual(list(iter_sentences(text)), expected)
+        self.assertEqual(list(iter_sentences(text[i:i + 7] for i in range(0, len(text), 7))), expected)
+        
+        # Abbreviations that double as words only hold a sentence open before a number
+        self.assertEqual(list(iter_sentences('The answer is no. Nothing else.')),
+                         ['The answer is no.', 'Nothing else.'])
+        self.assertEqual(list(iter_sentences('See No. 5 and Fig. 3 here. We ate figs. They were ripe.')),
+                         ['See No. 5 and Fig. 3 here.', 'We ate figs.', 'They were ripe.'])
+        self.assertEqual(list(iter_sentences('It was well edited. Ed was pleased. Smith et al. Reported it.')),
+                         ['It was well edited.', 'Ed was pleased.', 'Smith et al.', 'Reported it.'])
+        
+        def endless():
+            while True:
+                yield 'One more sentence. '
+        self.assertEqual(first_sentences(endless(), 3), ['One more sentence.'] * 3)
+    
+    def test_translation_memory_retranslates_changed_segments(self):
+        """Test only edited segments reach the backend, and the memory persists on disk"""
+        class UpperBackend:
+            name = 'upper'
+            batch_size = 2
+            
+            def __init__(self):
+                self.segments = []
+            
+            def translate(self, segments, source, target):
+                self.segments.extend(segments)
+                return [segment.upper() for segment in segments]
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'memory', 'tm.sqlite3')
+            backend = UpperBackend()
+            service = TranslatorService(backend=backend, memory=TranslationMemory(path))
+            self.assertFalse(os.path.exists(os.path.dirname(path)))
+            text = 'First point here. Second point here.\n\nThird point here.'
+            
+            result = service.translate(text, 'en', 'fr')
+            self.assertEqual(result['translation'], 'FIRST POINT HERE. SECOND POINT HERE.\n\nTHIRD POINT HERE.')
+            self.assertEqual(result['segments']['translated'], 3)
+            
+            edited = service.translate(text.replace('Third', 'Fourth'), 'en', 'fr')
+            self.assertEqual(edited['segments']['from_memory'], 2)
+            self.assertEqual(backend.segments[-1], 'Fourth point here.')
+            
+            # A fresh process sees the same memory through SQLite
+            restarted = TranslatorService(backend=UpperBackend(), memory=TranslationMemory(path))
+            self.assertEqual(restarted.translate(text, 'en', 'fr')['segments']['translated'], 0)
+            self.assertEqual(restarted.translate(text, 'en', 'de')['segments']['translated'], 3)
+        
+        # Sentences are rejoined with their original spacing, none between CJK sentences
+        cjk = TranslatorService(backend=UpperBackend(), memory=TranslationMemory()).translate(
+            '这是第一句。这是第二句！  Done here.', 'zh', 'en')
+        self.assertEqual(cjk['translation'], '这是第一句。这是第二句！  DONE HERE.')
+        
+        # Without explicit configuration nothing leaves the device
+        with mock.patch.object(settings, 'gemini_api_key', 'key'):
+            self.assertIsNone(TranslatorService(memory=TranslationMemory()).backend)
+    
+    def test_language_detection(self):
+        """Test local language detection across scripts, single and batched"""
+        samples = {
+            'en': 'Please send me the report before the meeting tomorrow.',
+            'es': 'Por favor, envíame el informe antes de la reunión de mañana.',
+            'fr': 'Merci de m\'envoyer le rapport avant la réunion de demain.',
+            'de': 'Bitte schick mir den Bericht vor dem Treffen morgen.',
+            'it': 'Per favore, mandami il rapporto prima della riunione di domani.',
+            'pt': 'Por favor, envie-me o relatório antes da reunião de amanhã.',
+            'ru': 'Пожалуйста, пришлите мне отчёт до завтрашней встречи.',
+            'ja': '明日の会議の前にレポートを送ってください。',
+            'ko': '내일 회의 전에 보고서를 보내 주세요.',
+            'zh': '请在明天开会之前把报告发给我。'
+        }
+        for language, text in samples.items():
+            self.assertEqual(language_detector.detect(text)[0], language)
+        
+        results = language_detector.detect_batch(list(samples.values()) * 50 + ['1234 !!'])
+        self.assertEqual([language for language, _ in results[:10]], list(samples))
+        self.assertEqual(results[-1], ('en', 0.0))
+        self.assertEqual(TranslatorService(backend=None).detect_language(samples['de']), 'de')
+    
+    def test_proofreader_checks_only_changed_paragraphs(self):
+        """Test the index loads lazily, then spelling, rule checks and per-paragraph caching"""
+        with mock.patch('backend.services.proofreader_service.get_spelling_index') as get_index:
+            ProofreaderService()
+            get_index.assert_not_called()
+        
+        proofreader = ProofreaderService(cache_max_bytes=1024 * 1024)
+        text = 'I recieve the the letter.\n\nWe should of left, see https://exmaple.com now.\n\nAll good here.'
+        checks = proofreader.check_types
+        
+        result = proofreader.proofread(text, checks)
+        found = {(issue['rule'], issue['original']): issue for issue in result['issues']}
+        self.assertEqual(found[('misspelling', 'recieve')]['suggestions'][0], 'receive')
+        self.assertIn(('repeated_word', 'the the'), found)
+        self.assertIn(('modal_of', 'should of'), found)
+        self.assertFalse(any('exmaple' in original for _, original in found))
+        for issue in result['issues']:
+            self.assertEqual(text[issue['offset']:issue['offset'] + issue['length']], issue['original'])
+        self.assertEqual(result['paragraphs'], {'total': 3, 'from_cache': 0})
+        
+        edited = text.replace('All good here.', 'All good, I beleive.')
+        again = proofreader.proofread(edited, checks)
+        self.assertEqual(again['paragraphs'], {'total': 3, 'from_cache': 2})
+        self.assertEqual(again['issues'][-1]['suggestions'][0], 'believe')
+        self.assertEqual(again['issues'][:len(result['issues'])], result['issues'])
+        self.assertEqual(proofreader.proofread(text, ['style'])['config']['issues_found']['spelling'], 0)
+    
+    def test_rewriter_memoizes_unchanged_chunks(self):
+        """Test chunked rewriting keeps paragraph order and only rewrites changed chunks"""
+        class RecordingBackend(LocalRewriteBackend):
+            parallel = True
+            
+            def __init__(self):
+                super().__init__()
+                self.calls = []
+            
+            def rewrite(self, chunk, goal, tone, before='', after=''):
+                self.calls.append(chunk)
+                rewritten = super().rewrite(chunk, goal, tone, before, after)
+                return rewritten[0].lower() + rewritten[1:].rstrip('.')
+        
+        backend = RecordingBackend()
+        rewriter = RewriterService(backend=backend, chunk_chars=40, cache_max_bytes=1024 * 1024)
+        text = 'We should of left it.\n\nThey\'re here. The plan is ready. We commence soon.\n\nDone.'
+        
+        result = rewriter.rewrite(text, 'simplify', 'formal')
+        self.assertEqual(result['text'], 'We should have left it.\n\nThey are here. The plan is ready. We start soon.\n\nDone.')
+        self.assertEqual(result['chunks'], {'total': 4, 'unique': 4, 'from_cache': 0, 'rewritten': 4, 'failed': 0})
+        self.assertEqual(result['config']['original_length'], len(text))
+        self.assertNotIn('original_text', result['config'])
+        
+        backend.calls.clear()
+        edited = rewriter.rewrite(text.replace('Done.', 'Finished.'), 'simplify', 'formal')
+        self.assertEqual(backend.calls, ['Finished.'])
+        self.assertEqual(edited['chunks']['from_cache'], 3)
+        self.assertTrue(edited['text'].endswith('\n\nFinished.'))
+        
+        # A remote backend gets the chunk deadline even for a single chunk
+        release = threading.Event()
+        
+        class HangingBackend:
+            name = 'gemini'
+            parallel = True
+            
+            def rewrite(self, chunk, goal, tone, before='', after=''):
+                release.wait(5)
+                return chunk
+        
+        with mock.patch.object(settings, 'rewrite_chunk_timeout', 0.1):
+            started = time.perf_counter()
+            stalled = RewriterService(backend=HangingBackend()).rewrite('One short chunk.', 'improve')
+        release.set()
+        self.assertLess(time.perf_counter() - started, 0.5)
+        self.assertEqual((stalled['chunks']['failed'], stalled['text']), (1, 'One short chunk.'))
+        
+        rewriter.rewrite(text, 'simplify', 'casual')
+        self.assertEqual(len(backend.calls), 5)
+    
+    def test_writer_streams_sections_as_drafted(self):
+        """Test long-form writing plans an outline, then streams sections in completion order"""
+        class ScriptedBackend:
+            name = 'scripted'
+            
+            def __init__(self):
+                self.max_output_tokens = []
+            
+            def complete(self, prompt, temperature, max_output_tokens=2048):
+                self.max_output_tokens.append(max_output_tokens)
+                if prompt.startswith('Plan'):
+                    return '```json\n[{"title": "Intro", "points": ["why"]}, {"title": "Details"}, "Wrap-up"]\n```'
+                if '"Intro"' in prompt:
+                    time.sleep(0.2)
+                if '"Details"' in prompt:
+                    raise RuntimeError('upstream failure')
+                return 'Drafted body text. '
+        
+        backend = ScriptedBackend()
+        writer = WriterService(backend=backend, concurrency=3)
+        events = list(writer.generate_long_form('Quarterly report', 'formal', 'report', 1200))
+        
+        self.assertEqual([event for event, _ in events], ['outline', 'section', 'section', 'section', 'done'])
+        outline = events[0][1]['sections']
+        self.assertEqual([section['title'] for section in outline], ['Intro', 'Details', 'Wrap-up'])
+        self.assertEqual(outline[0]['target_words'], 400)
+        sections = [payload for event, payload in events if event == 'section']
+        self.assertEqual(sections[-1]['index'], 0)
+        self.assertEqual(sections[-1]['text'], 'Drafted body text.')
+        self.assertFalse(next(s for s in sections if s['index'] == 1)['success'])
+        self.assertEqual(events[-1][1]['metadata']['failed'], 1)
+        self.assertLess(events[-1][1]['metadata']['total_latency_ms'], 400)
+        # 400 words per section round up to one of a few token budgets
+        self.assertEqual(sorted(set(backend.max_output_tokens[1:])), [1024])
+        
+        config = writer.generate_content('Quarterly report', 'formal', 'report')['config']
+        self.assertEqual(config['context_length'], len('Quarterly report'))
+        self.assertNotIn('context', config)
+        
+        # The Gemini backend never asks for more than the model can return
+        model = FakeGenerativeModel(response_text='Body.')
+        with mock.patch('backend.utils.model_registry.model_registry.get', return_value=model) as get_model:
+            GeminiWritingBackend().complete('Write it', temperature=0.7, max_output_tokens=10 ** 6)
+        self.assertEqual(get_model.call_args[0][1]['max_output_tokens'], settings.gemini_max_output_tokens)
 
 if __name__ == '__main__':
     unittest.main()